@@ -1,6 +1,6 @@
 from flask import Blueprint, request, jsonify, session
 from werkzeug.security import check_password_hash, generate_password_hash
-from Utils.firebase_utils import db, get_user_by_email, get_user_by_email_with_metadata, update_user_oauth_tokens, update_user_password
+from Utils.firebase_utils import db, get_user_by_email, get_user_by_email_with_metadata, update_user_oauth_tokens, update_user_password, invalidate_user_cache
 import logging
 import os
 import requests
@@ -206,6 +206,7 @@ def login():
                     'permissions': permissions,
                     'permission_metadata': permission_metadata
                 })
+                invalidate_user_cache(user_id=user.get('id'))
                 logger.info(f"Updated user {email} with permission_metadata: {permission_metadata}")
             except Exception as e:
                 logger.error(f"Failed to update user permissions: {e}")
@@ -353,6 +354,7 @@ def google_auth():
                     'last_google_login': datetime.now().isoformat()
                 }
                 user_ref.update(update_data)
+                invalidate_user_cache(user_id=user.get('id'))
                 
                 # Update local user object
                 user['google_id'] = idinfo.get('sub')
@@ -573,6 +575,7 @@ def google_oauth_callback():
                 'last_google_login': datetime.now().isoformat()
             }
             user_ref.update(update_data)
+            invalidate_user_cache(user_id=user.get('id'))
             
             # Update local user object
             user['google_id'] = user_info.get('id')
@@ -797,6 +800,7 @@ def login_with_stored_credentials():
             user_ref.update({
                 'last_google_login': datetime.now().isoformat()
             })
+            invalidate_user_cache(user_id=user.get('id'))
         except Exception as e:
             logger.error(f"Failed to update last login timestamp: {e}")
         
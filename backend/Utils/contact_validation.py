@@ -0,0 +1,179 @@
+# contact_validation.py - Sheet-wide normalization and validation of recipient contact columns
+import re
+
+# Same address rule as email_utils.is_valid_email, compiled once
+EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+EMAIL_SPLIT_RE = re.compile(r'[\n,]+')
+# Separators people type into phone cells; WhatsApp numbers are digits with an optional leading '+'
+PHONE_SEPARATORS_RE = re.compile(r'[\s\-().]+')
+PHONE_RE = re.compile(r'^\+?\d{4,15}$')
+
+NAME_COLUMN = 'Name'
+COUNTRY_CODE_COLUMN = 'Country Code'
+CONTACT_NO_COLUMN = 'Contact No.'
+EMAIL_TO_COLUMN = 'Email ID - To'
+EMAIL_CC_COLUMN = 'Email ID - CC'
+EMAIL_BCC_COLUMN = 'Email ID - BCC'
+
+
+def _column(rows, headers, name):
+    """All values of one column (stripped strings, '' where the column or cell is missing)"""
+    if name not in headers:
+        return [''] * len(rows)
+    index = headers.index(name)
+    return [str(row[index]).strip() if index < len(row) and row[index] is not None else '' for row in rows]
+
+
+def normalize_emails(values):
+    """
+    Split each cell on commas/newlines and validate every address.
+
+    Returns:
+        list: (comma-separated valid addresses or None, [invalid addresses]) per cell
+    """
+    normalized = []
+    for value in values:
+        if not value:
+            normalized.append((None, []))
+            continue
+        addresses = [a.strip() for a in EMAIL_SPLIT_RE.split(value) if a.strip()]
+        valid = [a for a in addresses if EMAIL_RE.match(a)]
+        invalid = [a for a in addresses if not EMAIL_RE.match(a)]
+        normalized.append((','.join(valid) if valid else None, invalid))
+    return normalized
+
+
+def normalize_phones(country_codes, numbers):
+    """
+    Combine country code and number columns into WhatsApp numbers.
+
+    Returns:
+        list: (recipient_phone, failure reason or None) per row; reasons match the send-time checks
+    """
+    normalized = []
+    for country_code, phone_no in zip(country_codes, numbers):
+        if not country_code:
+            normalized.append(('', "Missing Country Code"))
+            continue
+        if not phone_no:
+            normalized.append(('', "Missing Contact No."))
+            continue
+        recipient_phone = PHONE_SEPARATORS_RE.sub('', f"{country_code}{phone_no}")
+        if not PHONE_RE.match(recipient_phone):
+            normalized.append((recipient_phone, f"Invalid phone number format (Country Code: {country_code}, Contact No.: {phone_no})"))
+            continue
+        normalized.append((recipient_phone, None))
+    return normalized
+
+
+class RecipientTable:
+    """
+    Result of validate_recipients.
+
+    recipients: One dict per usable row: {'row_index', 'data', 'contacts', 'channels' (still to
+        send on), 'channel_errors' ({channel: reason} for requested channels that cannot be used),
+        'warnings'}
+    rejected: One dict per row with no usable channel: {'row_index', 'row_number', 'name', 'reasons'}
+    """
+
+    def __init__(self, total_rows):
+        self.total_rows = total_rows
+        self.recipients = []
+        self.rejected = []
+
+    def report(self):
+        """Rejected-rows report for API responses"""
+        return {
+            "checked_rows": self.total_rows,
+            "valid_rows": len(self.recipients),
+            "rejected_rows": self.rejected,
+            "channel_issues": sum(1 for r in self.recipients if r['channel_errors']),
+            "warnings": [f"Row {r['row_index'] + 2}: {w}" for r in self.recipients for w in r['warnings']]
+        }
+
+
+def validate_recipients(headers, rows, channels):
+    """
+    Normalize and validate every contact column of the sheet before anything is sent.
+
+    Args:
+        headers: Sheet header row
+        rows: Data rows
+        channels: Requested channel names ('email', 'whatsapp')
+
+    Returns:
+        RecipientTable
+    """
+    table = RecipientTable(len(rows))
+    names = _column(rows, headers, NAME_COLUMN)
+    country_codes = _column(rows, headers, COUNTRY_CODE_COLUMN)
+    numbers = _column(rows, headers, CONTACT_NO_COLUMN)
+    phones = normalize_phones(country_codes, numbers)
+    emails_to = normalize_emails(_column(rows, headers, EMAIL_TO_COLUMN))
+    emails_cc = normalize_emails(_column(rows, headers, EMAIL_CC_COLUMN))
+    emails_bcc = normalize_emails(_column(rows, headers, EMAIL_BCC_COLUMN))
+
+    for row_index, row in enumerate(rows):
+        name = names[row_index] or 'unknown'
+        if not any(str(cell).strip() for cell in row):
+            table.rejected.append({"row_index": row_index, "row_number": row_index + 2, "name": name, "reasons": ["Empty row"]})
+            continue
+
+        recipient_phone, phone_error = phones[row_index]
+        email_to, invalid_to = emails_to[row_index]
+        email_cc, invalid_cc = emails_cc[row_index]
+        email_bcc, invalid_bcc = emails_bcc[row_index]
+
+        channel_errors = {}
+        warnings = []
+        if 'whatsapp' in channels and phone_error:
+            channel_errors['whatsapp'] = phone_error
+        if 'email' in channels:
+            if email_to is None:
+                channel_errors['email'] = f"Invalid email address: {', '.join(invalid_to)}" if invalid_to else "No email found for recipient"
+            elif invalid_to:
+                warnings.append(f"Skipped invalid To address(es): {', '.join(invalid_to)}")
+            if invalid_cc or invalid_bcc:
+                warnings.append(f"Skipped invalid CC/BCC address(es): {', '.join(invalid_cc + invalid_bcc)}")
+
+        usable = [channel for channel in channels if channel not in channel_errors]
+        if channels and not usable:
+            table.rejected.append({
+                "row_index": row_index,
+                "row_number": row_index + 2,
+                "name": name,
+                "reasons": [channel_errors[channel] for channel in channels]
+            })
+            continue
+
+        table.recipients.append({
+            "row_index": row_index,
+            "data": dict(zip(headers, row)),
+            "contacts": {
+                'country_code': country_codes[row_index],
+                'phone_no': numbers[row_index],
+                'recipient_phone': recipient_phone,
+                'email_to': email_to,
+                'email_cc': email_cc,
+                'email_bcc': email_bcc
+            },
+            "channels": usable,
+            "channel_errors": channel_errors,
+            "warnings": warnings
+        })
+    return table
+
+
+def recipient_contacts(headers, row):
+    """Normalized contacts of a single row (same rules as validate_recipients)"""
+    recipient_phone, _ = normalize_phones(
+        _column([row], headers, COUNTRY_CODE_COLUMN), _column([row], headers, CONTACT_NO_COLUMN)
+    )[0]
+    return {
+        'country_code': _column([row], headers, COUNTRY_CODE_COLUMN)[0],
+        'phone_no': _column([row], headers, CONTACT_NO_COLUMN)[0],
+        'recipient_phone': recipient_phone,
+        'email_to': normalize_emails(_column([row], headers, EMAIL_TO_COLUMN))[0][0],
+        'email_cc': normalize_emails(_column([row], headers, EMAIL_CC_COLUMN))[0][0],
+        'email_bcc': normalize_emails(_column([row], headers, EMAIL_BCC_COLUMN))[0][0]
+    }
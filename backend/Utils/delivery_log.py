@@ -0,0 +1,198 @@
+# delivery_log.py - Append-only, columnar log of send attempts shared by all notification flows
+import threading
+from array import array
+
+CHANNEL_LABELS = {'email': 'Email', 'whatsapp': 'WhatsApp'}
+
+# Status codes stored per record. INVALID is a failure found before sending (bad contact data);
+# it is reported as 'failed' with an 'invalid' flag so retries can skip it.
+SUCCESS = 0
+FAILED = 1
+SKIPPED = 2
+INVALID = 3
+STATUS_CODES = {'success': SUCCESS, 'failed': FAILED, 'skipped': SKIPPED, 'invalid': INVALID}
+STATUS_NAMES = {SUCCESS: 'success', FAILED: 'failed', SKIPPED: 'skipped', INVALID: 'failed'}
+
+# Result codes returned by send_email_gmail_api / send_email_oauth
+EMAIL_FAILURE_REASONS = {
+    'TOKEN_EXPIRED': "Email token expired",
+    'USER_NOT_LOGGED_IN': "User session expired",
+    'NO_GMAIL_ACCESS': "Gmail access not configured for this user",
+    'NO_GOOGLE_ACCESS_TOKEN': "No Google access token found",
+    'INVALID_RECIPIENT': "Invalid recipient email address",
+    'GMAIL_AUTH_FAILED': "Gmail authentication failed",
+    'GMAIL_PERMISSION_DENIED': "Gmail permission denied",
+    'GMAIL_API_ERROR': "Gmail API error",
+    'GMAIL_SEND_ERROR': "Failed to send email"
+}
+
+
+def email_failure_reason(result):
+    """Log reason for a non-True result of an email send"""
+    if isinstance(result, str):
+        return EMAIL_FAILURE_REASONS.get(result, f"Unknown error: {result}")
+    return "Failed to send email"
+
+
+def channel_failure_reason(channel_status):
+    """'Email: reason | WhatsApp: reason' for the failed channels of a channel_status dict"""
+    return " | ".join(f"{CHANNEL_LABELS.get(channel, channel)}: {status['reason'] or 'Failed'}"
+                      for channel, status in channel_status.items() if status['status'] in ('failed', 'skipped'))
+
+
+class DeliveryLog:
+    """
+    One record per send attempt: recipient, channel, status code, reason, seconds and bytes.
+
+    Records live in parallel typed arrays; recipients, channels and reasons are interned, so an
+    append is a handful of integer writes under one lock and is safe from dispatch workers.
+    ``to_delivery_stats`` builds the delivery_stats dict used by the API responses and the log
+    report; when a recipient has several records for a channel the last one wins.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Recipients: (name, contact, row_index) -> id
+        self._recipient_ids = {}
+        self._recipients = []
+        # Interned channel names and reasons
+        self._channel_ids = {}
+        self._channels = []
+        self._reason_ids = {'': 0}
+        self._reasons = ['']
+        # Record columns
+        self.recipient = array('l')
+        self.channel = array('B')
+        self.status = array('B')
+        self.reason = array('l')
+        self.seconds = array('f')
+        self.nbytes = array('q')
+
+    def __len__(self):
+        return len(self.recipient)
+
+    def _intern(self, ids, values, value):
+        index = ids.get(value)
+        if index is None:
+            index = ids[value] = len(values)
+            values.append(value)
+        return index
+
+    def recipient_id(self, name, contact='', row_index=None):
+        """Register a recipient (once) and return its id; registration order is report order"""
+        with self._lock:
+            return self._intern(self._recipient_ids, self._recipients, (name, contact or '', row_index))
+
+    def append(self, recipient_id, channel, status, reason='', seconds=0.0, nbytes=0):
+        """Add one record for a registered recipient; status is a code or a name from STATUS_CODES"""
+        code = STATUS_CODES[status] if isinstance(status, str) else status
+        with self._lock:
+            self.recipient.append(recipient_id)
+            self.channel.append(self._intern(self._channel_ids, self._channels, channel))
+            self.status.append(code)
+            self.reason.append(self._intern(self._reason_ids, self._reasons, reason or ''))
+            self.seconds.append(seconds or 0.0)
+            self.nbytes.append(int(nbytes or 0))
+
+    def record(self, name, channel, status, reason='', seconds=0.0, nbytes=0, contact='', row_index=None):
+        """Register the recipient if needed and add one record"""
+        self.append(self.recipient_id(name, contact, row_index), channel, status, reason, seconds, nbytes)
+
+    def merge(self, other):
+        """Append all recipients and records of another log"""
+        with other._lock:
+            recipients = list(other._recipients)
+            rows = list(zip(other.recipient, other.channel, other.status, other.reason, other.seconds, other.nbytes))
+            channels = list(other._channels)
+            reasons = list(other._reasons)
+        ids = [self.recipient_id(*recipient) for recipient in recipients]
+        for recipient, channel, status, reason, seconds, nbytes in rows:
+            self.append(ids[recipient], channels[channel], status, reasons[reason], seconds, nbytes)
+
+    def _latest(self):
+        """{recipient id: {channel: (status code, reason, seconds)}} keeping the last record per channel"""
+        latest = {}
+        with self._lock:
+            recipients = list(self._recipients)
+            for i in range(len(self.recipient)):
+                latest.setdefault(self.recipient[i], {})[self._channels[self.channel[i]]] = (
+                    self.status[i], self._reasons[self.reason[i]], round(self.seconds[i], 3)
+                )
+        return recipients, latest
+
+    def to_delivery_stats(self, total_recipients=None, channels=None, label_reasons=True):
+        """
+        Serialize to the delivery_stats dict.
+
+        Args:
+            total_recipients: Overrides the number of registered recipients
+            channels: When given, channels a recipient has no record for are listed in its
+                channel_status as 'not_enabled'
+            label_reasons: Prefix each reason with its channel label ('Email: ...'); pass False
+                when the recorded reasons already name the channel
+        """
+        recipients, latest = self._latest()
+        delivery_stats = {
+            "total_recipients": len(recipients) if total_recipients is None else total_recipients,
+            "successful_deliveries": 0,
+            "failed_deliveries": 0,
+            "failed_contacts": [],
+            "channel_logs": {"email": [], "whatsapp": []}
+        }
+        for recipient_id, (name, contact, row_index) in enumerate(recipients):
+            records = latest.get(recipient_id)
+            if not records:
+                continue
+            channel_status = {}
+            for channel, (code, reason, seconds) in records.items():
+                channel_status[channel] = {'status': STATUS_NAMES[code], 'reason': reason, 'seconds': seconds}
+                if code == INVALID:
+                    channel_status[channel]['invalid'] = True
+                if code == SUCCESS:
+                    delivery_stats["channel_logs"].setdefault(channel, []).append(name)
+            if any(code == SUCCESS for code, _, _ in records.values()):
+                delivery_stats["successful_deliveries"] += 1
+            else:
+                delivery_stats["failed_deliveries"] += 1
+            if all(code == SUCCESS for code, _, _ in records.values()):
+                continue
+            if label_reasons:
+                reason = channel_failure_reason(channel_status)
+            else:
+                reason = " | ".join(status['reason'] for status in channel_status.values()
+                                    if status['status'] != 'success' and status['reason']) or "No delivery methods attempted"
+            for channel in channels or ():
+                channel_status.setdefault(channel, {'status': 'not_enabled', 'reason': ''})
+            contact_entry = {"name": name, "contact": contact, "reason": reason, "channel_status": channel_status}
+            # Lets a retry find the recipient's row in the stored run
+            if row_index is not None:
+                contact_entry["row_index"] = row_index
+            delivery_stats["failed_contacts"].append(contact_entry)
+        delivery_stats["successful_contacts"] = delivery_stats["channel_logs"]
+        return delivery_stats
+
+    def metrics(self):
+        """Per-channel counts by status, total/average seconds and bytes sent"""
+        metrics = {}
+        with self._lock:
+            for i in range(len(self.recipient)):
+                channel = metrics.setdefault(self._channels[self.channel[i]], {
+                    'attempts': 0, 'success': 0, 'failed': 0, 'skipped': 0, 'seconds': 0.0, 'bytes': 0
+                })
+                channel['attempts'] += 1
+                channel['success' if self.status[i] == SUCCESS else
+                        'skipped' if self.status[i] == SKIPPED else 'failed'] += 1
+                channel['seconds'] += self.seconds[i]
+                channel['bytes'] += self.nbytes[i]
+        for channel in metrics.values():
+            sent = channel['success'] + channel['failed']
+            channel['seconds'] = round(channel['seconds'], 3)
+            channel['avg_seconds'] = round(channel['seconds'] / sent, 3) if sent else 0.0
+        return metrics
+
+
+def as_delivery_stats(delivery_stats):
+    """Accept a DeliveryLog or an already serialized delivery_stats dict"""
+    if isinstance(delivery_stats, DeliveryLog):
+        return delivery_stats.to_delivery_stats()
+    return delivery_stats
@@ -0,0 +1,214 @@
+# dispatch_utils.py - Bounded-concurrency, rate-limited delivery of rendered messages per channel
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from Utils.latency_stats import latency_stats
+from Utils.fanout import FanoutPlan
+from Utils.delivery_log import channel_failure_reason
+
+# Email goes to the Gmail API, WhatsApp to the single Node session, so WhatsApp gets fewer workers
+DISPATCH_CHANNELS = {
+    'email': {
+        'workers': int(os.getenv('DISPATCH_EMAIL_WORKERS', '4')),
+        'rate_per_second': float(os.getenv('DISPATCH_EMAIL_RATE_PER_SECOND', '5'))
+    },
+    'whatsapp': {
+        'workers': int(os.getenv('DISPATCH_WHATSAPP_WORKERS', '2')),
+        'rate_per_second': float(os.getenv('DISPATCH_WHATSAPP_RATE_PER_SECOND', '1'))
+    }
+}
+
+
+class RateLimiter:
+    """Hands out evenly spaced send slots; a rate of 0 or None means unlimited"""
+
+    def __init__(self, rate_per_second):
+        self.interval = 1.0 / rate_per_second if rate_per_second else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _bind_request_context(fn):
+    # Senders read the logged-in user from the Flask session; give each task its own copy
+    # of the request context when dispatching from inside a request
+    try:
+        from flask import has_request_context, copy_current_request_context
+    except ImportError:
+        return fn
+    return copy_current_request_context(fn) if has_request_context() else fn
+
+
+class ChannelDispatcher:
+    """
+    Sends per-recipient payloads through one worker pool per channel.
+
+    Args:
+        channels: {channel: {'workers': int, 'rate_per_second': float}} (defaults to DISPATCH_CHANNELS)
+        logger: Logger for failures
+    """
+
+    def __init__(self, channels=None, logger=None):
+        self.channels = channels or DISPATCH_CHANNELS
+        self.logger = logger or logging.getLogger(__name__)
+        self._limiters = {name: RateLimiter(config.get('rate_per_second')) for name, config in self.channels.items()}
+
+    def _send(self, channel, sender, payload):
+        self._limiters[channel].acquire()
+        started = time.monotonic()
+        try:
+            success, reason = sender(payload)
+        except Exception as e:
+            self.logger.error(f"Error sending {channel} to {payload.get('name')}: {e}")
+            success, reason = False, f"Exception: {str(e)}"
+        seconds = round(time.monotonic() - started, 3)
+        if success:
+            # Feeds the duration estimates of dry-run plans
+            latency_stats.record(f"{channel}_send", seconds)
+        return success, reason, seconds
+
+    def dispatch(self, payloads, senders, on_result=None, log=None, sizes=None):
+        """
+        Send every payload on every channel it lists.
+
+        Args:
+            payloads: List of dicts with 'name', 'contact' and 'channels' (list of channel names)
+            senders: {channel: callable(payload) -> (success, failure_reason)}
+            on_result: Optional callable(payload, channel, success, reason, seconds), called as sends finish
+            log: Optional DeliveryLog that every result is appended to
+            sizes: {channel: bytes sent per message}, recorded in the log
+
+        Returns:
+            list: One channel_status dict per payload, {channel: {'status', 'reason', 'seconds'}}
+        """
+        statuses = [{} for _ in payloads]
+        sizes = sizes or {}
+        recipient_ids = [log.recipient_id(p['name'], p.get('contact', ''), p.get('row_index')) for p in payloads] if log is not None else None
+        executors = {}
+        futures = {}
+        try:
+            for channel, sender in senders.items():
+                jobs = [(i, p) for i, p in enumerate(payloads) if channel in p.get('channels', ())]
+                if not jobs:
+                    continue
+                config = self.channels.get(channel, {})
+                executors[channel] = ThreadPoolExecutor(
+                    max_workers=max(1, min(config.get('workers', 1), len(jobs))),
+                    thread_name_prefix=f"dispatch-{channel}"
+                )
+                for i, payload in jobs:
+                    task = _bind_request_context(lambda c=channel, s=sender, p=payload: self._send(c, s, p))
+                    futures[executors[channel].submit(task)] = (i, channel)
+
+            for future in as_completed(futures):
+                i, channel = futures[future]
+                success, reason, seconds = future.result()
+                statuses[i][channel] = {'status': 'success' if success else 'failed', 'reason': reason, 'seconds': seconds}
+                if log is not None:
+                    log.append(recipient_ids[i], channel, 'success' if success else 'failed', reason, seconds, sizes.get(channel, 0))
+                if on_result:
+                    try:
+                        on_result(payloads[i], channel, success, reason, seconds)
+                    except Exception as e:
+                        self.logger.warning(f"Dispatch progress callback failed: {e}")
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=True)
+        return statuses
+
+    def dispatch_deduplicated(self, payloads, senders, on_result=None, log=None, sizes=None):
+        """
+        Like dispatch, but sends are collapsed first (see fanout.FanoutPlan): rows whose email
+        renders the same share one message and exact WhatsApp repeats are sent once. on_result
+        and the log get every original payload a send stood for; the bytes of a shared send are
+        counted once.
+
+        Returns:
+            tuple: (one channel_status dict per payload, fan-out summary)
+        """
+        plan = FanoutPlan(payloads)
+        sizes = sizes or {}
+        recipient_ids = [log.recipient_id(p['name'], p.get('contact', ''), p.get('row_index')) for p in payloads] if log is not None else None
+        members = {id(unit): indices for unit, indices in zip(plan.units, plan.members)}
+
+        def fan_out(unit, channel, success, reason, seconds):
+            for n, i in enumerate(members[id(unit)]):
+                if log is not None:
+                    log.append(recipient_ids[i], channel, 'success' if success else 'failed', reason, seconds,
+                               sizes.get(channel, 0) if n == 0 else 0)
+                if on_result:
+                    on_result(payloads[i], channel, success, reason, seconds)
+
+        unit_statuses = self.dispatch(plan.units, senders, on_result=fan_out if (on_result or log is not None) else None)
+        summary = plan.summary()
+        if summary['sends_saved']:
+            self.logger.info(f"Fan-out collapsed {summary['sends_saved']} duplicate send(s): {summary['channels']}")
+        return plan.expand(unit_statuses), summary
+
+
+def _delivered(channel_status):
+    return any(s['status'] == 'success' for s in channel_status.values())
+
+
+def _failed_contact(payload, channel_status):
+    contact = {
+        "name": payload['name'],
+        "contact": payload.get('contact', ''),
+        "reason": channel_failure_reason(channel_status),
+        "channel_status": channel_status
+    }
+    # Lets a retry find the recipient's row in the stored run
+    if payload.get('row_index') is not None:
+        contact["row_index"] = payload['row_index']
+    return contact
+
+
+def merge_retry_stats(delivery_stats, retried_contacts, payloads, statuses):
+    """
+    Fold the results of re-sending some failed_contacts into an earlier delivery_stats.
+
+    Args:
+        delivery_stats: The previous run's stats (not modified)
+        retried_contacts: Entries of its failed_contacts that were re-sent
+        payloads: The re-rendered payload for each retried contact
+        statuses: channel_status dicts returned by ChannelDispatcher.dispatch for the payloads
+
+    Returns:
+        dict: New delivery_stats; contacts whose channels all succeeded drop out of failed_contacts
+    """
+    merged = {
+        **delivery_stats,
+        "channel_logs": {channel: list(names) for channel, names in delivery_stats.get("channel_logs", {}).items()}
+    }
+    merged["channel_logs"].setdefault("email", [])
+    merged["channel_logs"].setdefault("whatsapp", [])
+    retried_ids = {id(contact) for contact in retried_contacts}
+    failed_contacts = [c for c in delivery_stats.get("failed_contacts", []) if id(c) not in retried_ids]
+
+    for contact, payload, channel_status in zip(retried_contacts, payloads, statuses):
+        previous = contact.get("channel_status") or {}
+        combined = {**previous, **channel_status}
+        if _delivered(combined) and not _delivered(previous):
+            merged["successful_deliveries"] = merged.get("successful_deliveries", 0) + 1
+            merged["failed_deliveries"] = max(0, merged.get("failed_deliveries", 0) - 1)
+        for channel, status in channel_status.items():
+            if status['status'] == 'success':
+                merged["channel_logs"].setdefault(channel, []).append(payload['name'])
+        if any(status['status'] == 'failed' for status in combined.values()):
+            failed_contacts.append(_failed_contact({**payload, 'row_index': contact.get('row_index')}, combined))
+
+    merged["failed_contacts"] = failed_contacts
+    merged["successful_contacts"] = merged["channel_logs"]
+    return merged
@@ -0,0 +1,224 @@
+# docx_table_builder.py - Build complete python-docx tables from 2-D lists in one XML pass
+import re
+from functools import lru_cache
+from xml.sax.saxutils import escape
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls
+from docx.table import Table
+
+# Characters that are not allowed in XML 1.0 text
+_INVALID_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+_PROFESSIONAL_BORDERS = (
+    ('top', 'single', '16', 'e69138'),
+    ('left', 'single', '16', 'e69138'),
+    ('bottom', 'single', '16', 'e69138'),
+    ('right', 'single', '16', 'e69138'),
+    ('insideH', 'single', '4', '000000'),
+    ('insideV', 'single', '4', '000000'),
+)
+_SIMPLE_BORDERS = tuple((side, 'single', '4', '000000') for side in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV'))
+_NO_BORDERS = tuple((side, 'nil', None, None) for side in ('top', 'left', 'bottom', 'right', 'insideH', 'insideV'))
+
+# Visual presets matching format_table_professional / format_table_simple and the 'Table Grid' style
+TABLE_PRESETS = {
+    'professional': {
+        'borders': _PROFESSIONAL_BORDERS,
+        'table_style': None,
+        'header_fill': 'f9cb9c',
+        'band_fills': ('FFFFFF', 'e8f0fe'),  # even rows, odd rows
+        'header_size': 11,
+        'body_size': 10,
+        'header_align': 'center',
+        'body_align': ('left', 'center'),  # first column, other columns
+        'fixed_layout': True,
+    },
+    'simple': {
+        'borders': _SIMPLE_BORDERS,
+        'table_style': None,
+        'header_fill': None,
+        'band_fills': None,
+        'header_size': 10,
+        'body_size': 9,
+        'header_align': 'center',
+        'body_align': ('center', 'center'),
+        'fixed_layout': False,
+    },
+    'grid': {
+        'borders': None,
+        'table_style': 'TableGrid',
+        'header_fill': None,
+        'band_fills': None,
+        'header_size': 11,
+        'body_size': 11,
+        'header_align': 'left',
+        'body_align': ('left', 'left'),
+        'fixed_layout': False,
+    },
+    'plain': {
+        'borders': _NO_BORDERS,
+        'table_style': None,
+        'header_fill': None,
+        'band_fills': None,
+        'header_size': 10,
+        'body_size': 10,
+        'header_align': 'left',
+        'body_align': ('left', 'left'),
+        'fixed_layout': False,
+    },
+}
+
+_TWIPS_PER_INCH = 1440
+_EMU_PER_TWIP = 635
+
+
+def _borders_xml(borders):
+    if not borders:
+        return ''
+    parts = []
+    for side, val, size, color in borders:
+        if val == 'nil':
+            parts.append(f'<w:{side} w:val="nil"/>')
+        else:
+            parts.append(f'<w:{side} w:val="{val}" w:sz="{size}" w:space="0" w:color="{color}"/>')
+    return f"<w:tblBorders>{''.join(parts)}</w:tblBorders>"
+
+
+@lru_cache(maxsize=256)
+def _tc_pr(width, fill):
+    shading = f'<w:shd w:val="clear" w:color="auto" w:fill="{fill}"/>' if fill else ''
+    return f'<w:tcPr><w:tcW w:w="{width}" w:type="dxa"/>{shading}<w:vAlign w:val="center"/></w:tcPr>'
+
+
+@lru_cache(maxsize=64)
+def _p_pr(align, keep_together):
+    keep = '<w:keepLines/>' if keep_together else ''
+    return f'<w:pPr>{keep}<w:jc w:val="{align}"/></w:pPr>'
+
+
+@lru_cache(maxsize=64)
+def _r_pr(bold, size_pt):
+    half_points = int(round(size_pt * 2))
+    bold_xml = '<w:b/>' if bold else ''
+    return f'<w:rPr>{bold_xml}<w:sz w:val="{half_points}"/><w:szCs w:val="{half_points}"/></w:rPr>'
+
+
+def _run_xml(text, r_pr):
+    if text == '':
+        return ''
+    text = _INVALID_XML_CHARS.sub('', text)
+    pieces = []
+    for line_no, line in enumerate(text.split('\n')):
+        if line_no:
+            pieces.append('<w:br/>')
+        for tab_no, chunk in enumerate(line.split('\t')):
+            if tab_no:
+                pieces.append('<w:tab/>')
+            if chunk:
+                pieces.append(f'<w:t xml:space="preserve">{escape(chunk)}</w:t>')
+    return f"<w:r>{r_pr}{''.join(pieces)}</w:r>"
+
+
+def _column_widths(doc, num_cols, column_widths):
+    """Column widths in twips; columns without an explicit width (inches) share the remaining width"""
+    block_width = int(doc._block_width) // _EMU_PER_TWIP
+    explicit = list(column_widths or [])[:num_cols]
+    explicit += [None] * (num_cols - len(explicit))
+    fixed = [int(w * _TWIPS_PER_INCH) if w else None for w in explicit]
+    remaining_cols = sum(1 for w in fixed if w is None)
+    remaining = max(block_width - sum(w for w in fixed if w), 0)
+    share = remaining // remaining_cols if remaining_cols else 0
+    return [w if w is not None else max(share, _TWIPS_PER_INCH // 4) for w in fixed]
+
+
+def build_table_xml(rows, widths, preset='professional', header=True, column_alignments=None,
+                    center_dashes=False, bold_body=False, keep_together_cols=(), alignment='center'):
+    """
+    Return the complete ``w:tbl`` XML for a 2-D list of values.
+
+    Args:
+        rows: List of rows; shorter rows are padded with empty cells
+        widths: Column widths in twips
+        preset: Key of TABLE_PRESETS
+        header: Treat the first row as a header (bold, header fill, header alignment)
+        column_alignments: Per-column data alignment ('left'/'center'/None for the preset default)
+        center_dashes: Center data cells whose value is just '-'
+        bold_body: Make data rows bold as well
+        keep_together_cols: Columns whose paragraphs get keep-lines
+        alignment: Table alignment on the page ('center' or 'left')
+    """
+    spec = TABLE_PRESETS[preset]
+    num_cols = len(widths)
+    column_alignments = list(column_alignments or [])
+    column_alignments += [None] * (num_cols - len(column_alignments))
+    keep_cols = set(keep_together_cols)
+
+    tbl_pr = (
+        '<w:tblPr>'
+        + (f'<w:tblStyle w:val="{spec["table_style"]}"/>' if spec['table_style'] else '')
+        + '<w:tblW w:w="0" w:type="auto"/>'
+        + f'<w:jc w:val="{alignment}"/>'
+        + '<w:tblCellSpacing w:w="0" w:type="dxa"/>'
+        + _borders_xml(spec['borders'])
+        + ('<w:tblLayout w:type="fixed"/>' if spec['fixed_layout'] else '')
+        + '<w:tblLook w:firstRow="1" w:lastRow="0" w:firstColumn="0" w:lastColumn="0" w:noHBand="0" w:noVBand="1"/>'
+        + '</w:tblPr>'
+    )
+    grid = '<w:tblGrid>' + ''.join(f'<w:gridCol w:w="{w}"/>' for w in widths) + '</w:tblGrid>'
+
+    parts = [f'<w:tbl {nsdecls("w")}>', tbl_pr, grid]
+    row_pr = '<w:trPr><w:cantSplit/></w:trPr>'
+    first_align, other_align = spec['body_align']
+    for row_idx, row in enumerate(rows):
+        is_header = header and row_idx == 0
+        if is_header:
+            fill = spec['header_fill']
+            r_pr = _r_pr(True, spec['header_size'])
+        else:
+            fill = spec['band_fills'][row_idx % 2] if spec['band_fills'] else None
+            r_pr = _r_pr(bold_body, spec['body_size'])
+
+        parts.append('<w:tr>')
+        parts.append(row_pr)
+        for col_idx in range(num_cols):
+            value = row[col_idx] if col_idx < len(row) else ''
+            text = '' if value is None else str(value)
+            if is_header:
+                align = spec['header_align']
+            elif center_dashes and text.strip() == '-':
+                align = 'center'
+            else:
+                align = column_alignments[col_idx] or (first_align if col_idx == 0 else other_align)
+            parts.append('<w:tc>')
+            parts.append(_tc_pr(widths[col_idx], fill))
+            parts.append(f'<w:p>{_p_pr(align, col_idx in keep_cols)}{_run_xml(text, r_pr)}</w:p>')
+            parts.append('</w:tc>')
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+    return ''.join(parts)
+
+
+def add_table_from_rows(doc, rows, preset='professional', column_widths=None, **options):
+    """
+    Append a fully formatted table to a python-docx Document in a single XML pass.
+
+    This replaces doc.add_table() + per-cell text assignment + format_table_professional /
+    format_table_simple, which create and restyle OXML elements cell by cell.
+
+    Args:
+        doc: python-docx Document
+        rows: 2-D list of cell values (first row is the header unless header=False)
+        preset: 'professional', 'simple', 'grid' or 'plain' (see TABLE_PRESETS)
+        column_widths: Optional list of widths in inches (None entries share the remaining width)
+        **options: Passed to build_table_xml (header, column_alignments, center_dashes, ...)
+
+    Returns:
+        docx.table.Table: The inserted table
+    """
+    num_cols = max((len(row) for row in rows), default=0)
+    if num_cols == 0:
+        raise ValueError("Cannot build a table without columns")
+    widths = _column_widths(doc, num_cols, column_widths)
+    tbl = parse_xml(build_table_xml(rows, widths, preset=preset, **options))
+    doc.element.body._insert_tbl(tbl)
+    return Table(tbl, doc._body)
@@ -6,7 +6,8 @@ from email.mime.base import MIMEBase
 from email import encoders
 from email.header import Header
 import email.utils
-from Utils.firebase_utils import get_user_by_email_with_metadata
+from Utils.firebase_utils import get_user_by_email_with_metadata, invalidate_user_cache
+from Utils.upload_buffers import as_attachment_list, attachment_exists, attachment_name, read_attachment
 import re
 import base64
 from google.auth.transport.requests import Request
@@ -66,18 +67,24 @@ def send_email_gmail_api(user_email, recipient_email, subject, body, attachment_
         
         # Use provided tokens first, then fall back to database/session
         if not access_token or not refresh_token:
+            provided_access_token, provided_refresh_token = access_token, refresh_token
             # Get Google OAuth tokens from database first
             access_token = user.get('google_access_token')
             refresh_token = user.get('google_refresh_token')
             
-            # If not in database, check session (for GSI flow)
+            # If not in database, check session (for GSI flow); background jobs such as
+            # scheduled reactor runs have no request, so their callers pass the tokens instead
             if not access_token:
-                from flask import session
-                session_user = session.get('user', {})
+                from flask import session, has_request_context
+                session_user = session.get('user', {}) if has_request_context() else {}
                 if session_user.get('email') == user_email:
                     access_token = session_user.get('google_access_token')
                     refresh_token = session_user.get('google_refresh_token')
                     logger.info(f"Retrieved Google tokens from session for user: {user_email}")
+            
+            # A partial set of provided tokens is still better than none
+            if not access_token and provided_access_token:
+                access_token, refresh_token = provided_access_token, provided_refresh_token
         else:
             logger.info(f"Using provided Google tokens for user: {user_email}")
         
@@ -113,6 +120,7 @@ def send_email_gmail_api(user_email, recipient_email, subject, body, attachment_
                     'google_access_token': credentials.token,
                     'last_token_refresh': credentials.expiry.isoformat() if credentials.expiry else None
                 })
+                invalidate_user_cache(user_id=user.get('id'))
             except Exception as e:
                 logger.warning(f"Failed to update refreshed token: {e}")
         
@@ -142,20 +150,18 @@ def send_email_gmail_api(user_email, recipient_email, subject, body, attachment_
         
         # Add attachments if any
         if attachment_paths:
-            if isinstance(attachment_paths, str):
-                attachment_paths = [attachment_paths]
-            for attachment_path in attachment_paths:
+            # Paths or in-memory UploadBuffers
+            for attachment_path in as_attachment_list(attachment_paths):
                 try:
-                    if os.path.exists(attachment_path):
-                        with open(attachment_path, 'rb') as f:
-                            part = MIMEBase('application', 'octet-stream')
-                            part.set_payload(f.read())
-                            encoders.encode_base64(part)
-                            part.add_header(
-                                'Content-Disposition',
-                                f'attachment; filename={os.path.basename(attachment_path)}'
-                            )
-                            message.attach(part)
+                    if attachment_exists(attachment_path):
+                        part = MIMEBase('application', 'octet-stream')
+                        part.set_payload(read_attachment(attachment_path))
+                        encoders.encode_base64(part)
+                        part.add_header(
+                            'Content-Disposition',
+                            f'attachment; filename={attachment_name(attachment_path)}'
+                        )
+                        message.attach(part)
                     else:
                         logger.warning(f"Attachment file not found: {attachment_path}")
                 except Exception as e:
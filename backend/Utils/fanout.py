@@ -0,0 +1,142 @@
+# fanout.py - Collapse per-recipient sends that carry the same content into as few messages as each channel allows
+import os
+import json
+
+# Upper bound on recipients merged into one email (Gmail accepts more; keeps bounces and headers manageable)
+FANOUT_EMAIL_MAX_RECIPIENTS = int(os.getenv('FANOUT_EMAIL_MAX_RECIPIENTS', '50'))
+
+
+def _content_key(payload):
+    return json.dumps(payload.get('template_contents') or {}, sort_keys=True)
+
+
+def _to_key(payload):
+    return tuple(sorted({address.lower() for address in split_addresses(payload.get('email_to'))}))
+
+
+# What has to be identical for two payloads to share one send. Attachments are the same for
+# every payload of a run, so they are not part of the key.
+FANOUT_KEYS = {
+    # Email: same rendered subject, body, CC and BCC -> one message for all their To addresses
+    'email': lambda p: (p.get('subject'), p.get('email_content'), p.get('email_cc'), p.get('email_bcc')),
+    # WhatsApp: one chat per number, so only exact repeats (same number and messages) collapse
+    'whatsapp': lambda p: (p.get('recipient_phone'), _content_key(p), p.get('caption_message'))
+}
+
+
+def split_addresses(addresses):
+    return [a.strip() for a in (addresses or '').split(',') if a.strip()]
+
+
+def merge_addresses(address_lists):
+    """Comma-separated union of address lists, in first-seen order, compared case-insensitively"""
+    merged = {}
+    for addresses in address_lists:
+        for address in addresses:
+            merged.setdefault(address.lower(), address)
+    return ','.join(merged.values())
+
+
+def chunk_addresses(addresses, size=FANOUT_EMAIL_MAX_RECIPIENTS):
+    """Split a list of addresses into groups of at most `size`"""
+    size = max(1, size)
+    return [addresses[i:i + size] for i in range(0, len(addresses), size)]
+
+
+class FanoutPlan:
+    """
+    Groups per-recipient payloads into send units.
+
+    Each unit is a payload for a single channel plus the indices of the original payloads it
+    stands for. Email payloads with the same rendered content share one message: if they are
+    all addressed to the same people it goes out unchanged, otherwise their To addresses are
+    merged into the BCC of one message per FANOUT_EMAIL_MAX_RECIPIENTS addresses (marked
+    'email_undisclosed'; the sender addresses it to themselves), so CC/BCC recipients get one
+    copy and nobody sees the other rows' addresses. ``expand`` maps the per-unit results back
+    onto every original payload, so delivery stats stay per recipient.
+
+    Args:
+        payloads: Rendered payloads as passed to ChannelDispatcher.dispatch
+        keys: {channel: callable(payload) -> hashable}; channels without a key are not grouped
+        max_email_recipients: Most To addresses merged into one email
+    """
+
+    def __init__(self, payloads, keys=None, max_email_recipients=FANOUT_EMAIL_MAX_RECIPIENTS):
+        self.payload_count = len(payloads)
+        self.units = []
+        self.members = []
+        self.requested = {}
+        keys = FANOUT_KEYS if keys is None else keys
+
+        groups = {}  # (channel, key) -> [payload index, ...]
+        order = []
+        for index, payload in enumerate(payloads):
+            for channel in payload.get('channels', ()):
+                self.requested[channel] = self.requested.get(channel, 0) + 1
+                key_fn = keys.get(channel)
+                group_key = (channel, key_fn(payload)) if key_fn else (channel, ('single', index))
+                if group_key not in groups:
+                    groups[group_key] = []
+                    order.append(group_key)
+                groups[group_key].append(index)
+
+        for group_key in order:
+            channel = group_key[0]
+            indices = groups[group_key]
+            if channel == 'email' and len({_to_key(payloads[i]) for i in indices}) > 1:
+                self._add_email_units(payloads, indices, max_email_recipients)
+            else:
+                self._add_unit(payloads[indices[0]], channel, indices)
+
+    def _add_unit(self, payload, channel, indices, **overrides):
+        unit = {**payload, 'channels': [channel], **overrides}
+        if len(indices) > 1:
+            unit['name'] = f"{payload['name']} (+{len(indices) - 1} more)"
+        self.units.append(unit)
+        self.members.append(indices)
+
+    def _add_email_units(self, payloads, indices, max_email_recipients):
+        # Rows without an address fail on their own instead of riding along a merged message
+        missing = [i for i in indices if not split_addresses(payloads[i].get('email_to'))]
+        if missing:
+            self._add_unit(payloads[missing[0]], 'email', missing)
+        # A payload's addresses always travel together, so each payload belongs to exactly one unit
+        chunks = []
+        for index in indices:
+            addresses = split_addresses(payloads[index].get('email_to'))
+            if not addresses:
+                continue
+            if chunks and len(chunks[-1][1]) + len(addresses) <= max_email_recipients:
+                chunks[-1][0].append(index)
+                chunks[-1][1].extend(addresses)
+            else:
+                chunks.append(([index], list(addresses)))
+        for chunk_indices, addresses in chunks:
+            first = payloads[chunk_indices[0]]
+            self._add_unit(first, 'email', chunk_indices,
+                           email_to=merge_addresses([addresses]),
+                           email_bcc=merge_addresses([addresses, split_addresses(first.get('email_bcc'))]),
+                           email_undisclosed=True)
+
+    def expand(self, unit_statuses):
+        """
+        Per-payload channel_status dicts from the per-unit ones returned by dispatch.
+        """
+        statuses = [{} for _ in range(self.payload_count)]
+        for unit, indices, unit_status in zip(self.units, self.members, unit_statuses):
+            for channel, status in unit_status.items():
+                for index in indices:
+                    statuses[index][channel] = dict(status)
+        return statuses
+
+    def summary(self):
+        """{channel: {'requested', 'sent', 'saved'}} and the total sends saved"""
+        sent = {}
+        for unit in self.units:
+            channel = unit['channels'][0]
+            sent[channel] = sent.get(channel, 0) + 1
+        channels = {
+            channel: {'requested': requested, 'sent': sent.get(channel, 0), 'saved': requested - sent.get(channel, 0)}
+            for channel, requested in self.requested.items()
+        }
+        return {'channels': channels, 'sends_saved': sum(c['saved'] for c in channels.values())}
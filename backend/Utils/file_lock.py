@@ -0,0 +1,108 @@
+# file_lock.py - Cross-process locks and one-time claims shared by the gunicorn workers
+import os
+import time
+import logging
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows build (app.spec): locks only cover the current process
+    fcntl = None
+
+FILE_LOCK_DIR = os.getenv(
+    'FILE_LOCK_DIR',
+    os.path.join(os.getenv('OUTPUT_DIR', os.path.join(os.path.expanduser('~'), 'Salary_Slips')), 'locks')
+)
+
+_local_locks = {}
+_local_locks_guard = threading.Lock()
+
+
+def _lock_name(name):
+    return ''.join(c if c.isalnum() or c in '._-' else '_' for c in name)
+
+
+class FileLock:
+    """
+    Exclusive lock on <lock_dir>/<name>.lock, held with flock so it excludes other worker
+    processes as well as other threads. The lock is released when the holder closes the file
+    or dies, so a crashed worker never leaves it stuck.
+    """
+
+    def __init__(self, name, lock_dir=FILE_LOCK_DIR):
+        self.path = os.path.join(lock_dir, f"{_lock_name(name)}.lock")
+        self._fd = None
+        self._local = None
+
+    def acquire(self, blocking=True):
+        """Take the lock; with blocking=False returns False instead of waiting"""
+        if fcntl is None:
+            with _local_locks_guard:
+                self._local = _local_locks.setdefault(self.path, threading.Lock())
+            return self._local.acquire(blocking)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        except Exception:
+            os.close(fd)
+            raise
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._local is not None:
+            self._local.release()
+            self._local = None
+        if self._fd is not None:
+            fd, self._fd = self._fd, None
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def claim(name, lock_dir=FILE_LOCK_DIR):
+    """
+    Claim a one-time event (e.g. one scheduled run) for this process. Exactly one caller
+    across all workers gets True; the claim stays until purge_claims removes it.
+    """
+    claims_dir = os.path.join(lock_dir, 'claims')
+    os.makedirs(claims_dir, exist_ok=True)
+    try:
+        fd = os.open(os.path.join(claims_dir, _lock_name(name)), os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, 'w') as f:
+        f.write(str(os.getpid()))
+    return True
+
+
+def purge_claims(max_age_seconds, lock_dir=FILE_LOCK_DIR):
+    """Delete claims older than max_age_seconds; returns how many were removed"""
+    claims_dir = os.path.join(lock_dir, 'claims')
+    cutoff = time.time() - max_age_seconds
+    removed = 0
+    try:
+        names = os.listdir(claims_dir)
+    except FileNotFoundError:
+        return 0
+    for name in names:
+        path = os.path.join(claims_dir, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+        except Exception as e:
+            logging.warning(f"Could not remove stale claim {path}: {e}")
+    return removed
@@ -2,8 +2,13 @@ import firebase_admin
 from firebase_admin import credentials, firestore
 from google.cloud.firestore_v1.base_query import FieldFilter
 import os
+import json
+import base64
 from Utils.config import get_resource_path
+from Utils.cache_utils import TTLCache
+import copy
 import logging
+import threading
 from datetime import datetime
 
 # Initialize Firebase Admin SDK
@@ -33,46 +38,92 @@ def add_user(username, email, role, password_hash, client_id=None, client_secret
     user_ref.set(user_data)
     return user_ref.id
 
+# Short-lived user profile cache so login, OAuth checks and every send_email_gmail_api
+# call do not each run a USERS query. Entries are invalidated by the update functions below.
+USER_CACHE_TTL_SECONDS = int(os.getenv('USER_CACHE_TTL_SECONDS', '30'))
+_user_cache = TTLCache(ttl_seconds=USER_CACHE_TTL_SECONDS, max_entries=512)
+
+
+def _cache_user(user_id, user_data):
+    """
+    Store a user document under both its id and its email
+    The email key is case-sensitive like the Firestore 'email ==' lookup, so a cache hit never
+    returns a user that the query itself would not find.
+    """
+    entry = dict(user_data)
+    entry['id'] = user_id
+    _user_cache.set(('id', user_id), entry)
+    if entry.get('email'):
+        _user_cache.set(('email', entry['email']), entry)
+
+
+def _get_cached_user(key):
+    entry = _user_cache.get(key)
+    # Callers mutate the returned dict, so never hand out the cached object itself
+    return copy.deepcopy(entry) if entry is not None else None
+
+
+def invalidate_user_cache(user_id=None, email=None):
+    """Drop cached profile entries for a user (by id, email or both)"""
+    if user_id:
+        entry = _user_cache.pop(('id', user_id))
+        if entry and entry.get('email'):
+            _user_cache.pop(('email', entry['email']))
+    if email:
+        entry = _user_cache.pop(('email', email))
+        if entry and entry.get('id'):
+            _user_cache.pop(('id', entry['id']))
+
+
 def get_user_by_id(user_id):
     """Get a user by their ID"""
+    cached = _get_cached_user(('id', user_id))
+    if cached is not None:
+        cached.pop('id', None)
+        return cached
     user_ref = db.collection('USERS').document(user_id)
     user = user_ref.get()
     if user.exists:
-        return user.to_dict()
+        user_data = user.to_dict()
+        _cache_user(user_id, user_data)
+        return user_data
     return None
 
-def get_user_by_email(email):
-    """Get a user by their email"""
+def _fetch_user_by_email(email):
+    """Get a user document (with 'id') by email, from the cache when possible"""
+    if not email:
+        return None
+    cached = _get_cached_user(('email', email))
+    if cached is not None:
+        return cached
     users_ref = db.collection('USERS')
     query = users_ref.where(filter=FieldFilter('email', '==', email)).limit(1)
     results = query.get()
-    logging.info(f"Result {results}")
+    logging.debug(f"Result {results}")
     if results:
         user_doc = results[0]
         user_data = user_doc.to_dict()
+        _cache_user(user_doc.id, user_data)
         user_data['id'] = user_doc.id
         return user_data
     return None
 
+def get_user_by_email(email):
+    """Get a user by their email"""
+    return _fetch_user_by_email(email)
+
 def get_user_by_email_with_metadata(email):
     """Get a user by their email with complete permission metadata for RBAC"""
-    users_ref = db.collection('USERS')
-    query = users_ref.where(filter=FieldFilter('email', '==', email)).limit(1)
-    results = query.get()
-    logging.info(f"Result {results}")
-    if results:
-        user_doc = results[0]
-        user_data = user_doc.to_dict()
-        user_data['id'] = user_doc.id
-        
+    user_data = _fetch_user_by_email(email)
+    if user_data:
         # Ensure we have the complete RBAC structure
         if 'permission_metadata' not in user_data:
             user_data['permission_metadata'] = {}
         
         # Log the complete permission structure for debugging
-        logging.info(f"User {email} permission_metadata: {user_data.get('permission_metadata')}")
-        logging.info(f"User {email} tree_permissions: {user_data.get('tree_permissions')}")
-        logging.info(f"User {email} basic permissions: {user_data.get('permissions')}")
+        logging.debug(f"User {email} permission_metadata: {user_data.get('permission_metadata')}")
+        logging.debug(f"User {email} tree_permissions: {user_data.get('tree_permissions')}")
+        logging.debug(f"User {email} basic permissions: {user_data.get('permissions')}")
         
         return user_data
     return None
@@ -87,10 +138,12 @@ def update_user_role(user_id, new_role):
     """Update a user's role"""
     user_ref = db.collection('USERS').document(user_id)
     user_ref.update({'role': new_role})
+    invalidate_user_cache(user_id=user_id)
 
 def delete_user(user_id):
     """Delete a user"""
     db.collection('USERS').document(user_id).delete()
+    invalidate_user_cache(user_id=user_id)
 
 def add_salary_slip(slip_data):
     """Add a salary slip to Firestore"""
@@ -109,16 +162,19 @@ def update_user_permission_metadata(user_id, permission_metadata):
     """Update a user's permission metadata"""
     user_ref = db.collection('USERS').document(user_id)
     user_ref.update({'permission_metadata': permission_metadata})
+    invalidate_user_cache(user_id=user_id)
 
 def update_user_comprehensive_permissions(user_id, permission_metadata):
     """Update user permission metadata only"""
     user_ref = db.collection('USERS').document(user_id)
     user_ref.update({'permission_metadata': permission_metadata})
+    invalidate_user_cache(user_id=user_id)
 
 def clean_user_permission_metadata(user_id):
     """Clean a users permisssion befor saving new"""
     user_ref = db.collection('USERS').document(user_id)
     user_ref.update({'permission_metadata':{}})
+    invalidate_user_cache(user_id=user_id)
 
 def update_user_permission_metadata(user_id, permission_metadata):
     """Update a user's permission metadata for RBAC"""
@@ -129,6 +185,7 @@ def update_user_permission_metadata(user_id, permission_metadata):
     
     # This will completely overwrite existing permission_metadata
     user_ref.update({'permission_metadata': permission_metadata})
+    invalidate_user_cache(user_id=user_id)
     logging.info(f"Successfully updated permission metadata for user {user_id}")
 
 def update_user_complete_rbac(user_id, permission_metadata):
@@ -141,6 +198,7 @@ def update_user_complete_rbac(user_id, permission_metadata):
     
     # Single atomic update that completely overwrites existing permission_metadata
     user_ref.update({'permission_metadata': permission_metadata})
+    invalidate_user_cache(user_id=user_id)
     logging.info(f"Successfully updated RBAC for user {user_id}")
 
 def update_user_password(user_id, password_hash, encrypted_password=None):
@@ -161,6 +219,7 @@ def update_user_password(user_id, password_hash, encrypted_password=None):
             logging.warning(f"[update_user_password] No encrypted_password provided - only password_hash will be updated")
         
         user_ref.update(update_data)
+        invalidate_user_cache(user_id=user_id)
         logging.info(f"[update_user_password] Successfully updated password for user_id: {user_id}")
         logging.info(f"[update_user_password] Updated fields: {list(update_data.keys())}")
     except Exception as e:
@@ -210,6 +269,7 @@ def update_user(user_id, **kwargs):
     update_data = {k: v for k, v in kwargs.items() if v is not None}
     if update_data:
         user_ref.update(update_data)
+        invalidate_user_cache(user_id=user_id)
 
 def get_material_data():
     """Get all material data from MATERIAL collection"""
@@ -420,62 +480,116 @@ def get_factory_initials(factory_name):
     return factory_mapping.get(factory_name, factory_name[:2].upper())
 
 
-def get_next_order_id(factory):
+# Number of order IDs reserved from ORDER_COUNTERS per transaction
+ORDER_ID_BLOCK_SIZE = int(os.getenv('ORDER_ID_BLOCK_SIZE', '50'))
+# How long a worker trusts its last read of a counter's reset epoch
+ORDER_ID_EPOCH_TTL_SECONDS = float(os.getenv('ORDER_ID_EPOCH_TTL_SECONDS', '10'))
+
+
+class OrderIdAllocator:
     """
-    Get the next order ID for a factory using atomic counter
-    Returns the next available order ID in format: KR_MMYY-nnnn
+    Hands out order IDs from blocks reserved on the ORDER_COUNTERS/<initials> document.
+
+    Each worker process reserves ORDER_ID_BLOCK_SIZE numbers in a single transaction and
+    then allocates locally, so blocks held by different workers never overlap. The
+    counter itself keeps growing across months; a block reserved in one month is
+    dropped once the month changes so that numbers within a month stay ordered.
+
+    reset_order_counter bumps the counter's 'epoch'. Every block remembers the epoch it was
+    reserved in; the current epoch is re-read at most every ORDER_ID_EPOCH_TTL_SECONDS (a
+    plain read outside the lock), so every worker drops blocks reserved before a reset
+    within that interval, not just the one that handled the reset.
     """
-    try:
-        factory_initials = get_factory_initials(factory)
+
+    def __init__(self, block_size=ORDER_ID_BLOCK_SIZE):
+        self.block_size = max(1, int(block_size))
+        self._blocks = {}  # factory_initials -> {'next': int, 'high': int, 'period': 'MMYY', 'epoch': int}
+        self._epochs = TTLCache(ttl_seconds=ORDER_ID_EPOCH_TTL_SECONDS, max_entries=64)
+        self._lock = threading.Lock()
+
+    def _reserve_block(self, factory, factory_initials):
+        """Reserve the next block of counter values in one Firestore transaction"""
         counter_ref = db.collection('ORDER_COUNTERS').document(factory_initials)
-        
-        # Use transaction to ensure atomic increment
+        block_size = self.block_size
+
         @firestore.transactional
-        def update_counter(transaction):
+        def reserve(transaction):
             counter_doc = counter_ref.get(transaction=transaction)
-            
-            if counter_doc.exists:
-                current_data = counter_doc.to_dict()
-                current_count = current_data.get('count', 0)
-                new_count = current_count + 1
-                logging.info(f"Counter exists for {factory}: current={current_count}, new={new_count}")
-            else:
-                new_count = 1
-                logging.info(f"Counter does not exist for {factory}, starting with count=1")
-            
-            # Update the counter
+            counter = counter_doc.to_dict() if counter_doc.exists else {}
+            current_count = counter.get('count', 0)
+            new_high = current_count + block_size
             transaction.set(counter_ref, {
-                'count': new_count,
+                'count': new_high,
                 'factory': factory,
                 'lastUpdated': firestore.SERVER_TIMESTAMP
             }, merge=True)
-            
-            return new_count
-        
-        # Execute the transaction
-        transaction = db.transaction()
-        new_count = update_counter(transaction)
-        
-        # Generate order ID with the new count
-        from datetime import datetime
-        now = datetime.utcnow()
-        month = now.month
-        year = now.year % 100  # Last 2 digits of year
-        
-        order_id = f"{factory_initials}_{month:02d}{year:02d}-{new_count:04d}"
-        
-        logging.info(f"Generated new order ID for {factory}: {order_id} (count: {new_count}, month: {month:02d}, year: {year:02d})")
+            return current_count + 1, new_high, counter.get('epoch', 0)
+
+        first, high, epoch = reserve(db.transaction())
+        logging.info(f"Reserved order ID block {first}-{high} (epoch {epoch}) for {factory}")
+        return first, high, epoch
+
+    def _current_epoch(self, factory_initials):
+        """The counter's reset epoch, read from Firestore when the cached value has expired"""
+        epoch = self._epochs.get(factory_initials)
+        if epoch is None:
+            counter_doc = db.collection('ORDER_COUNTERS').document(factory_initials).get()
+            epoch = counter_doc.to_dict().get('epoch', 0) if counter_doc.exists else 0
+            self._epochs.set(factory_initials, epoch)
+        return epoch
+
+    def next_id(self, factory, now=None):
+        """Allocate the next order ID in format: KR_MMYY-nnnn"""
+        factory_initials = get_factory_initials(factory)
+        now = now or datetime.utcnow()
+        period = f"{now.month:02d}{now.year % 100:02d}"
+
+        # Only a worker already holding a block needs the epoch; it is cached, so most
+        # allocations stay a local increment
+        epoch = self._current_epoch(factory_initials) if factory_initials in self._blocks else None
+
+        with self._lock:
+            block = self._blocks.get(factory_initials)
+            if block and epoch is not None and block['epoch'] < epoch:
+                logging.info(f"Dropping order ID block of {factory} reserved before a counter reset")
+                block = None
+            if not block or block['period'] != period or block['next'] > block['high']:
+                first, high, epoch = self._reserve_block(factory, factory_initials)
+                block = {'next': first, 'high': high, 'period': period, 'epoch': epoch}
+                self._blocks[factory_initials] = block
+                self._epochs.set(factory_initials, epoch)
+            count = block['next']
+            block['next'] += 1
+
+        return f"{factory_initials}_{period}-{count:04d}"
+
+    def discard(self, factory=None):
+        """Drop locally held blocks (all factories when factory is None)"""
+        with self._lock:
+            if factory is None:
+                self._blocks.clear()
+                self._epochs.clear()
+            else:
+                self._blocks.pop(get_factory_initials(factory), None)
+                self._epochs.pop(get_factory_initials(factory))
+
+
+order_id_allocator = OrderIdAllocator()
+
+
+def get_next_order_id(factory):
+    """
+    Get the next order ID for a factory from the block allocator
+    Returns the next available order ID in format: KR_MMYY-nnnn
+    Raises if a block cannot be reserved; there is no timestamp fallback because it can collide.
+    """
+    try:
+        order_id = order_id_allocator.next_id(factory)
+        logging.info(f"Generated new order ID for {factory}: {order_id}")
         return order_id
-        
     except Exception as e:
         logging.error(f"Error generating order ID for {factory}: {str(e)}", exc_info=True)
-        # Fallback to timestamp-based ID if counter fails
-        from datetime import datetime
-        now = datetime.utcnow()
-        timestamp = int(now.timestamp() * 1000)  # milliseconds
-        fallback_id = f"{factory_initials}_{now.month:02d}{now.year % 100:02d}-{timestamp % 10000:04d}"
-        logging.warning(f"Using fallback order ID: {fallback_id}")
-        return fallback_id
+        raise
 
 
 def reset_order_counter(factory):
@@ -487,11 +601,14 @@ def reset_order_counter(factory):
         factory_initials = get_factory_initials(factory)
         counter_ref = db.collection('ORDER_COUNTERS').document(factory_initials)
         
+        # The new epoch makes every worker drop blocks reserved before the reset
         counter_ref.set({
             'count': 0,
+            'epoch': firestore.Increment(1),
             'factory': factory,
             'lastUpdated': firestore.SERVER_TIMESTAMP
-        })
+        }, merge=True)
+        order_id_allocator.discard(factory)
         
         logging.info(f"Reset order counter for {factory} to 0")
         return True
@@ -545,6 +662,7 @@ def add_order(factory, order_data):
             'createdBy': order_data.get('createdBy'),
             'status': order_data.get('status'),
             'createdAt': current_time,  # Use regular datetime
+            'updatedAt': current_time,  # Sorting by updatedAt skips documents without it
             'submittedAt': current_time  # Use regular datetime
         }
         
@@ -560,6 +678,9 @@ def add_order(factory, order_data):
             'lastUpdated': firestore.SERVER_TIMESTAMP
         }, merge=True)
         
+        # Mirror the order into the queryable order_items subcollection
+        _write_order_item(orders_ref, factory_initials, clean_order_data)
+        
         logging.info(f"Successfully added order {clean_order_data['orderId']} to factory {factory}")
         return True
     except Exception as e:
@@ -623,6 +744,7 @@ def update_order_status(factory, order_id, new_status, updated_by=None):
                 orders[i]['updatedAt'] = current_time  # Use regular datetime
                 if updated_by:
                     orders[i]['updatedBy'] = updated_by
+                updated_order = orders[i]
                 break
         else:
             return False
@@ -632,6 +754,7 @@ def update_order_status(factory, order_id, new_status, updated_by=None):
             'orders': orders,
             'lastUpdated': firestore.SERVER_TIMESTAMP
         }, merge=True)
+        _write_order_item(orders_ref, factory_initials, updated_order)
         
         return True
     except Exception as e:
@@ -663,6 +786,10 @@ def delete_order(factory, order_id):
             'orders': orders,
             'lastUpdated': firestore.SERVER_TIMESTAMP
         }, merge=True)
+        try:
+            orders_ref.collection(ORDER_ITEMS_COLLECTION).document(_order_item_id(order_id)).delete()
+        except Exception as e:
+            logging.warning(f"Could not delete order item {order_id}: {str(e)}")
         
         return True
     except Exception as e:
@@ -691,6 +818,184 @@ def get_all_orders():
         logging.error(f"Error fetching all orders: {str(e)}")
         return []
 
+# Paginated order queries
+# Every order is mirrored into ORDERS/<initials>/order_items/<orderId> so that listings can be
+# filtered, sorted and paginated server-side (see firestore.indexes.json for the composite indexes).
+ORDER_ITEMS_COLLECTION = 'order_items'
+ORDER_SORT_FIELDS = ('createdAt', 'updatedAt', 'orderId', 'status', 'importance')
+# Filter combinations that have composite indexes for every sort field in firestore.indexes.json
+ORDER_FILTER_COMBINATIONS = (
+    (),
+    ('status',),
+    ('importance',),
+    ('givenBy',),
+    ('materialNames',),
+    ('importance', 'status'),
+    ('givenBy', 'status'),
+    ('materialNames', 'status'),
+)
+ORDER_PAGE_MAX_LIMIT = 200
+
+
+def _order_item_id(order_id):
+    """Firestore document IDs cannot contain '/'"""
+    return str(order_id).replace('/', '_')
+
+
+def _order_item_data(factory_initials, order):
+    """Build the denormalized order_items document for an order"""
+    item = dict(order)
+    item.pop('orderIndex', None)
+    item['factoryDocument'] = factory_initials
+    # Orders created before updatedAt was set on creation would be missing from updatedAt sorts
+    if not item.get('updatedAt'):
+        item['updatedAt'] = order.get('createdAt')
+    item['materialNames'] = sorted({
+        order_item.get('materialName') for order_item in order.get('orderItems', []) or []
+        if order_item.get('materialName')
+    })
+    return item
+
+
+def _write_order_item(orders_ref, factory_initials, order):
+    """Write an order into the order_items subcollection; the orders array stays the source of truth"""
+    try:
+        if not order.get('orderId'):
+            return
+        item_ref = orders_ref.collection(ORDER_ITEMS_COLLECTION).document(_order_item_id(order['orderId']))
+        item_ref.set(_order_item_data(factory_initials, order))
+    except Exception as e:
+        logging.warning(f"Could not mirror order {order.get('orderId')} to {ORDER_ITEMS_COLLECTION}: {str(e)}")
+
+
+def backfill_order_items(factory=None):
+    """Copy orders stored in the ORDERS arrays into the order_items subcollections"""
+    try:
+        if factory:
+            docs = [db.collection('ORDERS').document(get_factory_initials(factory)).get()]
+        else:
+            docs = db.collection('ORDERS').get()
+        
+        copied = 0
+        for doc in docs:
+            if not doc.exists:
+                continue
+            batch = db.batch()
+            pending = 0
+            for order in doc.to_dict().get('orders', []):
+                if not order.get('orderId'):
+                    continue
+                item_ref = doc.reference.collection(ORDER_ITEMS_COLLECTION).document(_order_item_id(order['orderId']))
+                batch.set(item_ref, _order_item_data(doc.id, order))
+                pending += 1
+                copied += 1
+                if pending == 450:  # Firestore batches are limited to 500 writes
+                    batch.commit()
+                    batch = db.batch()
+                    pending = 0
+            if pending:
+                batch.commit()
+        
+        logging.info(f"Backfilled {copied} orders into {ORDER_ITEMS_COLLECTION}")
+        return {'success': True, 'message': f'Backfilled {copied} orders', 'copied': copied}
+    except Exception as e:
+        logging.error(f"Error backfilling order items: {str(e)}", exc_info=True)
+        return {'success': False, 'message': f'Error backfilling order items: {str(e)}', 'copied': 0}
+
+
+def _encode_order_cursor(snapshot, sort_by):
+    """Encode the last document of a page as an opaque cursor token"""
+    value = snapshot.get(sort_by)
+    if isinstance(value, datetime):
+        encoded_value = {'t': 'dt', 'v': value.isoformat()}
+    else:
+        encoded_value = {'t': 'raw', 'v': value}
+    payload = json.dumps({'s': sort_by, 'v': encoded_value, 'p': snapshot.reference.path})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def _decode_order_cursor(cursor, sort_by):
+    """Decode a cursor token into start_after() values"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+    except Exception:
+        raise ValueError('Invalid cursor')
+    if payload.get('s') != sort_by:
+        raise ValueError('Cursor does not match the requested sort order')
+    encoded_value = payload.get('v', {})
+    value = encoded_value.get('v')
+    if encoded_value.get('t') == 'dt' and value:
+        value = datetime.fromisoformat(value)
+    return {sort_by: value, '__name__': db.document(payload['p'])}
+
+
+def query_orders(factory=None, status=None, importance=None, given_by=None, material=None,
+                 date_from=None, date_to=None, sort_by='createdAt', sort_dir='desc',
+                 limit=50, cursor=None, fields=None):
+    """
+    Get one page of orders from the order_items subcollections
+    Searches a single factory when factory is given, otherwise every factory (collection group).
+    Returns {'orders': [...], 'next_cursor': str or None}; raises ValueError for invalid arguments.
+    """
+    if sort_by not in ORDER_SORT_FIELDS:
+        raise ValueError(f"Invalid sort field. Must be one of: {', '.join(ORDER_SORT_FIELDS)}")
+    if (date_from or date_to) and sort_by != 'createdAt':
+        raise ValueError('Date range filters require sorting by createdAt')
+
+    filters = [
+        ('status', '==', status),
+        ('importance', '==', importance),
+        ('givenBy', '==', given_by),
+        ('materialNames', 'array_contains', material),
+    ]
+    filters = [(field, op, value) for field, op, value in filters if value]
+    filtered_fields = tuple(sorted(field for field, _, _ in filters))
+    if filtered_fields not in ORDER_FILTER_COMBINATIONS:
+        raise ValueError(
+            f"Unsupported filter combination: {', '.join(filtered_fields)}. "
+            "Combine status with one of importance, givenBy or material, or use a single filter"
+        )
+    if sort_by in filtered_fields:
+        raise ValueError(f"Cannot sort by {sort_by} while filtering on it")
+
+    direction = firestore.Query.ASCENDING if sort_dir == 'asc' else firestore.Query.DESCENDING
+    limit = max(1, min(int(limit or 50), ORDER_PAGE_MAX_LIMIT))
+
+    if factory:
+        query = db.collection('ORDERS').document(get_factory_initials(factory)).collection(ORDER_ITEMS_COLLECTION)
+    else:
+        query = db.collection_group(ORDER_ITEMS_COLLECTION)
+
+    for field, op, value in filters:
+        query = query.where(filter=FieldFilter(field, op, value))
+    if date_from:
+        query = query.where(filter=FieldFilter('createdAt', '>=', date_from))
+    if date_to:
+        query = query.where(filter=FieldFilter('createdAt', '<', date_to))
+
+    query = query.order_by(sort_by, direction=direction).order_by('__name__', direction=direction)
+
+    if fields:
+        # The sort field is always needed to build the next cursor
+        query = query.select(sorted(set(fields) | {sort_by, 'orderId'}))
+    if cursor:
+        query = query.start_after(_decode_order_cursor(cursor, sort_by))
+
+    snapshots = list(query.limit(limit + 1).stream())
+    has_more = len(snapshots) > limit
+    snapshots = snapshots[:limit]
+
+    orders = []
+    for snapshot in snapshots:
+        order = snapshot.to_dict()
+        order['factoryDocument'] = snapshot.reference.parent.parent.id
+        orders.append(order)
+
+    return {
+        'orders': orders,
+        'next_cursor': _encode_order_cursor(snapshots[-1], sort_by) if has_more and snapshots else None
+    }
+
 # OAuth token management functions
 def get_user_oauth_tokens(user_id):
     """Get user's OAuth tokens for Google services"""
@@ -725,6 +1030,7 @@ def update_user_oauth_tokens(user_id, access_token, refresh_token, granted_scope
         }
         
         user_ref.update({'oauth_tokens': oauth_tokens})
+        invalidate_user_cache(user_id=user_id)
         logging.info(f"Updated OAuth tokens for user {user_id}")
         return True
     except Exception as e:
@@ -0,0 +1,346 @@
+# firestore_bulk.py - Bulk export/import of Firestore collections as gzipped NDJSON
+#
+# Export:  python -m Utils.firestore_bulk export --out ./snapshot ORDERS MATERIAL TRANSACTIONS
+# Import:  python -m Utils.firestore_bulk import --in ./snapshot --migration orders-to-subcollection
+# Orders:  python -m Utils.firestore_bulk backfill-orders [--factory KR]
+# Add --emulator localhost:8080 to any command to run against the Firestore emulator.
+import os
+import sys
+import gzip
+import json
+import base64
+import logging
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+DEFAULT_COLLECTIONS = ('ORDERS', 'MATERIAL', 'TRANSACTIONS')
+DEFAULT_PARTITIONS = int(os.getenv('FIRESTORE_EXPORT_PARTITIONS', '8'))
+DEFAULT_MAX_OPS_PER_SECOND = int(os.getenv('FIRESTORE_IMPORT_MAX_OPS', '500'))
+MANIFEST_FILE = 'manifest.json'
+
+
+def _get_db():
+    # Imported lazily so the CLI can point FIRESTORE_EMULATOR_HOST at the emulator
+    # before the Firebase app and client are created
+    from Utils.firebase_utils import db
+    return db
+
+
+def _encode_value(value):
+    """Convert a Firestore value to a JSON-safe structure"""
+    from google.cloud.firestore_v1 import GeoPoint
+    from google.cloud.firestore_v1.document import DocumentReference
+
+    if isinstance(value, dict):
+        return {k: _encode_value(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_encode_value(v) for v in value]
+    if isinstance(value, datetime):
+        return {'__type__': 'timestamp', 'value': value.isoformat()}
+    if isinstance(value, DocumentReference):
+        return {'__type__': 'ref', 'path': value.path}
+    if isinstance(value, GeoPoint):
+        return {'__type__': 'geopoint', 'latitude': value.latitude, 'longitude': value.longitude}
+    if isinstance(value, bytes):
+        return {'__type__': 'bytes', 'value': base64.b64encode(value).decode('ascii')}
+    return value
+
+
+def _decode_value(value, db):
+    """Inverse of _encode_value"""
+    from google.cloud.firestore_v1 import GeoPoint
+
+    if isinstance(value, list):
+        return [_decode_value(v, db) for v in value]
+    if not isinstance(value, dict):
+        return value
+    value_type = value.get('__type__')
+    if value_type == 'timestamp':
+        return datetime.fromisoformat(value['value'])
+    if value_type == 'ref':
+        return db.document(value['path'])
+    if value_type == 'geopoint':
+        return GeoPoint(value['latitude'], value['longitude'])
+    if value_type == 'bytes':
+        return base64.b64decode(value['value'])
+    return {k: _decode_value(v, db) for k, v in value.items()}
+
+
+def _write_document_tree(snapshot, out, include_subcollections):
+    """Write a document and (optionally) everything below it; returns the number of documents written"""
+    out.write(json.dumps({'path': snapshot.reference.path, 'data': _encode_value(snapshot.to_dict() or {})}))
+    out.write('\n')
+    written = 1
+    if include_subcollections:
+        for subcollection in snapshot.reference.collections():
+            for child in subcollection.stream():
+                written += _write_document_tree(child, out, include_subcollections)
+    return written
+
+
+def _partition_queries(db, collection, partitions):
+    """
+    Split a top-level collection into independent queries.
+
+    Partitioning uses a collection-group query, so documents from nested collections
+    with the same name are filtered out by the caller. Falls back to a single query
+    when partitioning is unavailable (e.g. older emulators).
+    """
+    if partitions > 1:
+        try:
+            return [p.query() for p in db.collection_group(collection).get_partitions(partitions)], True
+        except Exception as e:
+            logging.warning(f"Partitioned query unavailable for {collection}, exporting sequentially: {e}")
+    return [db.collection(collection)], False
+
+
+def _export_partition(query, collection, part_path, is_group, include_subcollections):
+    count = 0
+    with gzip.open(part_path, 'wt', encoding='utf-8') as out:
+        for snapshot in query.stream():
+            if is_group and snapshot.reference.parent.path != collection:
+                continue
+            count += _write_document_tree(snapshot, out, include_subcollections)
+    return count
+
+
+def export_collections(output_dir, collections=DEFAULT_COLLECTIONS, partitions=DEFAULT_PARTITIONS,
+                       workers=8, include_subcollections=True):
+    """
+    Stream collections (and their subcollections) to gzipped NDJSON files.
+
+    Each partition is written to its own ``<collection>-part-NNNN.ndjson.gz`` file so
+    workers never share a file handle. A manifest records the files and document counts.
+
+    Returns:
+        dict: {'success': bool, 'message': str, 'counts': {collection: documents}, 'output_dir': str}
+    """
+    try:
+        db = _get_db()
+        os.makedirs(output_dir, exist_ok=True)
+        started = datetime.now()
+        manifest = {'exported_at': started.isoformat(), 'collections': {}}
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {}
+            for collection in collections:
+                queries, is_group = _partition_queries(db, collection, partitions)
+                manifest['collections'][collection] = {'files': [], 'documents': 0}
+                for index, query in enumerate(queries):
+                    file_name = f"{collection}-part-{index:04d}.ndjson.gz"
+                    manifest['collections'][collection]['files'].append(file_name)
+                    future = executor.submit(_export_partition, query, collection,
+                                             os.path.join(output_dir, file_name), is_group, include_subcollections)
+                    futures[future] = collection
+
+            for future in as_completed(futures):
+                manifest['collections'][futures[future]]['documents'] += future.result()
+
+        with open(os.path.join(output_dir, MANIFEST_FILE), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        counts = {name: info['documents'] for name, info in manifest['collections'].items()}
+        elapsed = (datetime.now() - started).total_seconds()
+        logging.info(f"Exported {sum(counts.values())} documents from {len(counts)} collections in {elapsed:.1f}s")
+        return {'success': True, 'message': f'Exported {sum(counts.values())} documents',
+                'counts': counts, 'output_dir': output_dir}
+    except Exception as e:
+        logging.error(f"Error exporting collections: {str(e)}", exc_info=True)
+        return {'success': False, 'message': f'Error exporting collections: {str(e)}', 'counts': {}, 'output_dir': output_dir}
+
+
+def read_export(input_dir, collections=None):
+    """Yield {'path', 'data'} records from an export directory"""
+    with open(os.path.join(input_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+    for collection, info in manifest['collections'].items():
+        if collections and collection not in collections:
+            continue
+        for file_name in info['files']:
+            with gzip.open(os.path.join(input_dir, file_name), 'rt', encoding='utf-8') as records:
+                for line in records:
+                    if line.strip():
+                        yield json.loads(line)
+
+
+def explode_array_field(collection, field, subcollection, id_field, item_builder=None):
+    """
+    Build a migration that moves an array field of top-level documents into a subcollection.
+
+    The parent document keeps every other field; each array element becomes
+    ``<parent path>/<subcollection>/<id>`` where the id is ``element[id_field]`` or, when
+    id_field is callable, ``id_field(element, index)``. Elements without an id stay in the array.
+    """
+    def migrate(record):
+        path_parts = record['path'].split('/')
+        items = record['data'].get(field)
+        if len(path_parts) != 2 or path_parts[0] != collection or not isinstance(items, list):
+            yield record
+            return
+        parent_id = path_parts[1]
+        kept = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict):
+                item_id = None
+            elif callable(id_field):
+                item_id = id_field(item, index)
+            else:
+                item_id = item.get(id_field)
+            if not item_id:
+                kept.append(item)
+                continue
+            data = item_builder(parent_id, item) if item_builder else item
+            doc_id = str(item_id).replace('/', '_')
+            yield {'path': f"{record['path']}/{subcollection}/{doc_id}", 'data': data}
+        parent = dict(record['data'])
+        parent[field] = kept
+        yield {'path': record['path'], 'data': parent}
+    return migrate
+
+
+def _order_item_builder(factory_initials, order):
+    from Utils.firebase_utils import _order_item_data
+    return _encode_value(_order_item_data(factory_initials, order))
+
+
+# Built-in migrations selectable from the CLI. The order migration keeps the orders
+# array in place because the app still reads it; only the subcollection copy is added.
+MIGRATIONS = {
+    'orders-to-subcollection': lambda: _keep_array(
+        explode_array_field('ORDERS', 'orders', 'order_items', 'orderId', _order_item_builder), 'orders'),
+    'transactions-to-subcollection': lambda: explode_array_field(
+        'TRANSACTIONS', 'transactions', 'items',
+        # Transactions carry no id; the array position keeps re-imports idempotent
+        lambda item, index: f"{index:06d}_{item.get('type', 'transaction')}"),
+}
+
+
+def _keep_array(migration, field):
+    """Wrap a migration so the parent document keeps its original array"""
+    def migrate(record):
+        original = record['data'].get(field)
+        for out in migration(record):
+            if out['path'] == record['path']:
+                out = {'path': out['path'], 'data': {**out['data'], field: original}}
+            yield out
+    return migrate
+
+
+def import_records(records, max_ops_per_second=DEFAULT_MAX_OPS_PER_SECOND, migration=None, dry_run=False):
+    """
+    Write records with a throttled BulkWriter.
+
+    Args:
+        records: Iterable of {'path': 'COLLECTION/doc[/sub/doc...]', 'data': encoded dict}
+        max_ops_per_second: Upper bound for the BulkWriter ramp-up
+        migration: Optional callable mapping one record to an iterable of records
+        dry_run: Count the writes without sending them
+
+    Returns:
+        dict: {'success': bool, 'message': str, 'written': int, 'failed': int, 'errors': list}
+    """
+    from google.cloud.firestore_v1.bulk_writer import BulkWriterOptions, SendMode
+
+    written = 0
+    failures = []
+    lock = threading.Lock()
+    try:
+        db = _get_db()
+        writer = None
+        if not dry_run:
+            writer = db.bulk_writer(options=BulkWriterOptions(
+                initial_ops_per_second=min(500, max_ops_per_second),
+                max_ops_per_second=max_ops_per_second,
+                mode=SendMode.parallel
+            ))
+
+            def on_error(error, _writer):
+                # Retry transient failures a few times, then record the document as failed
+                if error.attempts < 5:
+                    return True
+                with lock:
+                    failures.append({'path': error.operation.reference.path, 'reason': str(error.message)})
+                return False
+
+            writer.on_write_error(on_error)
+
+        for record in records:
+            for out in (migration(record) if migration else (record,)):
+                if not dry_run:
+                    writer.set(db.document(out['path']), _decode_value(out['data'], db))
+                written += 1
+                if written % 10000 == 0:
+                    logging.info(f"Queued {written} writes")
+
+        if writer is not None:
+            writer.close()
+
+        written -= len(failures)
+        message = f"{'Would write' if dry_run else 'Wrote'} {written} documents"
+        if failures:
+            message += f", {len(failures)} failed"
+        logging.info(message)
+        return {'success': not failures, 'message': message, 'written': written,
+                'failed': len(failures), 'errors': failures[:100]}
+    except Exception as e:
+        logging.error(f"Error importing documents: {str(e)}", exc_info=True)
+        return {'success': False, 'message': f'Error importing documents: {str(e)}', 'written': written,
+                'failed': len(failures), 'errors': failures[:100]}
+
+
+def import_collections(input_dir, collections=None, max_ops_per_second=DEFAULT_MAX_OPS_PER_SECOND,
+                       migration=None, dry_run=False):
+    """Import an export directory (see export_collections), optionally applying a named migration"""
+    if isinstance(migration, str):
+        if migration not in MIGRATIONS:
+            raise ValueError(f"Unknown migration '{migration}'. Available: {', '.join(MIGRATIONS)}")
+        migration = MIGRATIONS[migration]()
+    return import_records(read_export(input_dir, collections), max_ops_per_second, migration, dry_run)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Bulk export/import Firestore collections as gzipped NDJSON')
+    parser.add_argument('--emulator', help='Firestore emulator host:port (sets FIRESTORE_EMULATOR_HOST)')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    export_parser = subparsers.add_parser('export', help='Export collections to a directory')
+    export_parser.add_argument('collections', nargs='*', default=list(DEFAULT_COLLECTIONS))
+    export_parser.add_argument('--out', required=True, help='Output directory')
+    export_parser.add_argument('--partitions', type=int, default=DEFAULT_PARTITIONS)
+    export_parser.add_argument('--workers', type=int, default=8)
+    export_parser.add_argument('--no-subcollections', action='store_true')
+
+    import_parser = subparsers.add_parser('import', help='Import an export directory')
+    import_parser.add_argument('collections', nargs='*', help='Limit the import to these collections')
+    import_parser.add_argument('--in', dest='input_dir', required=True, help='Export directory')
+    import_parser.add_argument('--max-ops', type=int, default=DEFAULT_MAX_OPS_PER_SECOND)
+    import_parser.add_argument('--migration', choices=sorted(MIGRATIONS))
+    import_parser.add_argument('--dry-run', action='store_true')
+
+    backfill_parser = subparsers.add_parser(
+        'backfill-orders', help='Copy the ORDERS arrays into the order_items subcollections (run once per deploy)')
+    backfill_parser.add_argument('--factory', help='Only backfill this factory')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.emulator:
+        os.environ['FIRESTORE_EMULATOR_HOST'] = args.emulator
+
+    if args.command == 'export':
+        result = export_collections(args.out, args.collections, args.partitions, args.workers,
+                                    include_subcollections=not args.no_subcollections)
+    elif args.command == 'import':
+        result = import_collections(args.input_dir, args.collections or None, args.max_ops,
+                                    args.migration, args.dry_run)
+    else:
+        from Utils.firebase_utils import backfill_order_items
+        result = backfill_order_items(args.factory)
+
+    print(json.dumps(result, indent=2, default=str))
+    return 0 if result['success'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
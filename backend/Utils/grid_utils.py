@@ -0,0 +1,145 @@
+# grid_utils.py - Helpers for working with sheet grids already downloaded via get_all_values()
+import re
+from itertools import islice
+
+_A1_CELL_RE = re.compile(r'^\$?([A-Za-z]*)\$?(\d*)$')
+
+
+def column_letter_to_index(letters):
+    """Convert a column reference such as 'A' or 'AB' to a 0-based index"""
+    index = 0
+    for char in letters.upper():
+        index = index * 26 + (ord(char) - ord('A') + 1)
+    return index - 1
+
+
+def parse_a1_cell(ref):
+    """
+    Parse an A1 cell reference into 0-based (row, col).
+
+    Either part may be missing ('B' -> (None, 1), '5' -> (4, None)) to express
+    open-ended ranges such as 'A:C' or '2:10'.
+    """
+    match = _A1_CELL_RE.match(ref.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        raise ValueError(f"Invalid A1 reference: {ref}")
+    letters, digits = match.groups()
+    row = int(digits) - 1 if digits else None
+    col = column_letter_to_index(letters) if letters else None
+    return row, col
+
+
+def _trim_trailing(cells):
+    end = len(cells)
+    while end and cells[end - 1] == '':
+        end -= 1
+    return cells[:end] if end != len(cells) else cells
+
+
+class GridView:
+    """
+    Rectangular window over a grid's rows. Holds only bounds; rows are read from the
+    underlying list on demand, so overlapping views cost no extra memory.
+    """
+
+    def __init__(self, rows, first_row, last_row, first_col, last_col):
+        self._rows = rows
+        self.first_row = first_row
+        self.last_row = min(last_row, len(rows) - 1)
+        self.first_col = first_col
+        self.last_col = last_col  # None means open-ended
+
+    def __len__(self):
+        return max(0, self.last_row - self.first_row + 1)
+
+    def __iter__(self):
+        """Yield the cells of each row in the view (one row slice at a time)"""
+        stop = None if self.last_col is None else self.last_col + 1
+        for row in islice(self._rows, self.first_row, self.last_row + 1):
+            yield row[self.first_col:stop]
+
+    def values(self):
+        """
+        Materialize the view the way worksheet.get('A1:B9') returns it from the Sheets API:
+        trailing empty cells of each row and trailing empty rows are dropped.
+        """
+        values = [_trim_trailing(cells) for cells in self]
+        while values and not values[-1]:
+            values.pop()
+        return values
+
+
+class SheetGrid:
+    """
+    Read-only access to rows downloaded with get_all_values().
+
+    Args:
+        rows: List of rows (list of strings); never copied
+        header_row: 0-based index of the header row used by column lookups (None for no header)
+    """
+
+    def __init__(self, rows, header_row=None):
+        self._rows = rows or []
+        self.header_row = header_row
+        self._header_map = None
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __getitem__(self, index):
+        return self._rows[index]
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    @property
+    def rows(self):
+        return self._rows
+
+    @property
+    def headers(self):
+        if self.header_row is None or self.header_row >= len(self._rows):
+            return []
+        return [h.strip() for h in self._rows[self.header_row]]
+
+    def cell(self, row, col, default=''):
+        if row < len(self._rows) and col < len(self._rows[row]):
+            return self._rows[row][col]
+        return default
+
+    def iter_rows(self, start=0, stop=None):
+        """Iterate over rows[start:stop] without building a sliced copy of the grid"""
+        return islice(self._rows, start, stop)
+
+    def view(self, start, end=None):
+        """GridView for an A1 range, e.g. view('A1', 'B9'), view('A1:B9') or view('A:C')"""
+        if end is None:
+            start, _, end = start.partition(':')
+            end = end or start
+        start_row, start_col = parse_a1_cell(start)
+        end_row, end_col = parse_a1_cell(end)
+        return GridView(
+            self._rows,
+            start_row or 0,
+            end_row if end_row is not None else len(self._rows) - 1,
+            start_col or 0,
+            end_col
+        )
+
+    def column_index(self, name, contains=False):
+        """
+        Index of a header column (case-insensitive, whitespace-trimmed), or None.
+
+        With contains=True the first header that contains ``name`` matches.
+        """
+        wanted = name.strip().lower()
+        if not contains:
+            if self._header_map is None:
+                self._header_map = {}
+                for i, header in enumerate(self.headers):
+                    self._header_map.setdefault(header.lower(), i)
+            return self._header_map.get(wanted)
+        for i, header in enumerate(self.headers):
+            if wanted in header.lower():
+                return i
+        return None
@@ -0,0 +1,150 @@
+# health_utils.py - Cached dependency probes for the /livez and /readyz endpoints
+import os
+import time
+import shutil
+import logging
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from datetime import datetime
+from Utils.cache_utils import TTLCache
+
+# Readiness results are reused for this many seconds so frequent orchestrator probes
+# do not translate into a Firestore read and three network calls each
+READINESS_CACHE_TTL_SECONDS = float(os.getenv('READINESS_CACHE_TTL_SECONDS', '10'))
+
+# Collection/document read by the Firestore probe (a single document get, whether or not it exists)
+HEALTH_PROBE_COLLECTION = '_HEALTH'
+HEALTH_PROBE_DOCUMENT = 'probe'
+
+_readiness_cache = TTLCache(ttl_seconds=READINESS_CACHE_TTL_SECONDS, max_entries=1)
+_readiness_lock = threading.Lock()
+_probe_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='readiness-probe')
+# name -> (future, started) of the last submitted run of each probe. A probe that timed out keeps
+# its pool thread, so it is not started again until that run has finished; at most one thread per
+# probe is ever busy, however often readiness is checked.
+_inflight_probes = {}
+
+
+def probe_firestore():
+    """Read a single document to confirm Firestore is reachable"""
+    from Utils.firebase_utils import db
+    snapshot = db.collection(HEALTH_PROBE_COLLECTION).document(HEALTH_PROBE_DOCUMENT).get()
+    return {'document_exists': snapshot.exists}
+
+
+def probe_sheets_credentials():
+    """Confirm the service account credentials are loaded and can mint a token"""
+    from Utils.config import creds, sheets_service
+    if creds is None or sheets_service is None:
+        raise RuntimeError('Service account credentials are not loaded')
+    if not creds.valid:
+        from google.auth.transport.requests import Request
+        creds.refresh(Request())
+    return {'service_account': getattr(creds, 'service_account_email', None)}
+
+
+def probe_converter():
+    """Confirm the LibreOffice binary used for DOCX to PDF conversion is installed"""
+    binary = shutil.which('libreoffice') or shutil.which('soffice')
+    if not binary:
+        raise RuntimeError('LibreOffice is not installed')
+    return {'binary': binary}
+
+
+def probe_whatsapp_service(timeout):
+    """Confirm the Node.js WhatsApp service answers its health endpoint"""
+    from Utils.whatsapp_utils import WHATSAPP_NODE_SERVICE_URL
+    response = requests.get(f"{WHATSAPP_NODE_SERVICE_URL.rstrip('/')}/health", timeout=timeout)
+    if response.status_code != 200:
+        raise RuntimeError(f'Health endpoint returned {response.status_code}')
+    data = response.json()
+    return {
+        'whatsapp_ready': data.get('whatsappReady', False),
+        'whatsapp_initialized': data.get('whatsappInitialized', False)
+    }
+
+
+# name -> (probe function, timeout in seconds, critical for readiness)
+READINESS_PROBES = {
+    'firestore': (probe_firestore, 3.0, True),
+    'sheets_credentials': (probe_sheets_credentials, 5.0, True),
+    'converter': (probe_converter, 1.0, False),
+    'whatsapp_service': (lambda: probe_whatsapp_service(timeout=2.0), 3.0, False),
+}
+
+
+def _timed(probe):
+    started = time.monotonic()
+    detail = probe()
+    return detail, round((time.monotonic() - started) * 1000, 1)
+
+
+def _submit_probe(name, probe):
+    """Start a probe unless its previous run is still going; returns (future, started)"""
+    previous = _inflight_probes.get(name)
+    if previous is not None and not previous[0].done():
+        return previous
+    submitted = (_probe_executor.submit(_timed, probe), time.monotonic())
+    _inflight_probes[name] = submitted
+    return submitted
+
+
+def _collect_probe(name, future, started, timeout):
+    """Wait for a submitted probe until its own deadline and describe the outcome"""
+    remaining = max(0.0, started + timeout - time.monotonic())
+    try:
+        detail, latency_ms = future.result(timeout=remaining)
+        status = {'status': 'ok', 'detail': detail, 'latency_ms': latency_ms}
+    except FutureTimeoutError:
+        # The probe keeps running in the pool; its result is simply ignored
+        status = {'status': 'timeout', 'error': f'No response within {timeout}s',
+                  'latency_ms': round(timeout * 1000, 1)}
+    except Exception as e:
+        status = {'status': 'error', 'error': str(e),
+                  'latency_ms': round((time.monotonic() - started) * 1000, 1)}
+    if status['status'] != 'ok':
+        logging.warning(f"Readiness probe '{name}' failed: {status.get('error')}")
+    return status
+
+
+def check_readiness(force=False):
+    """
+    Run (or reuse cached) dependency probes.
+
+    Returns:
+        dict: {'status': 'ready' | 'degraded' | 'not_ready', 'checks': {...}, 'checked_at': iso, 'cached': bool}
+        'degraded' means only non-critical dependencies (converter, WhatsApp) are failing.
+    """
+    if not force:
+        cached = _readiness_cache.get('readiness')
+        if cached is not None:
+            return {**cached, 'cached': True}
+
+    # Only one request thread runs the probes; the others wait for its result
+    with _readiness_lock:
+        if not force:
+            cached = _readiness_cache.get('readiness')
+            if cached is not None:
+                return {**cached, 'cached': True}
+
+        futures = {
+            name: _submit_probe(name, probe)
+            for name, (probe, _timeout, _critical) in READINESS_PROBES.items()
+        }
+        checks = {}
+        for name, (future, started) in futures.items():
+            _probe, timeout, critical = READINESS_PROBES[name]
+            # A probe still running from an earlier check is measured from when it started
+            checks[name] = _collect_probe(name, future, started, timeout)
+            checks[name]['critical'] = critical
+
+        critical_ok = all(c['status'] == 'ok' for c in checks.values() if c['critical'])
+        all_ok = all(c['status'] == 'ok' for c in checks.values())
+        result = {
+            'status': 'ready' if all_ok else ('degraded' if critical_ok else 'not_ready'),
+            'checks': checks,
+            'checked_at': datetime.utcnow().isoformat() + 'Z'
+        }
+        _readiness_cache.set('readiness', result)
+        return {**result, 'cached': False}
@@ -0,0 +1,314 @@
+# job_store.py - Tracks background report jobs (status, progress, results) for polling endpoints
+import os
+import re
+import json
+import time
+import uuid
+import logging
+import threading
+from datetime import datetime
+
+JOB_STORE_DIR = os.getenv(
+    'JOB_STORE_DIR',
+    os.path.join(os.getenv('OUTPUT_DIR', os.path.join(os.path.expanduser('~'), 'Salary_Slips')), 'jobs')
+)
+# Finished jobs kept in memory; older ones are still readable from disk
+JOB_STORE_MAX_IN_MEMORY = int(os.getenv('JOB_STORE_MAX_IN_MEMORY', '500'))
+# Job and event files of finished jobs are deleted after this many days (checked at most hourly)
+JOB_STORE_MAX_AGE_DAYS = float(os.getenv('JOB_STORE_MAX_AGE_DAYS', '7'))
+JOB_STORE_PURGE_INTERVAL_SECONDS = 3600
+# An event stream response is closed after this long; EventSource reconnects with Last-Event-ID.
+# A stream occupies a request thread for its whole duration, so the app runs on threaded
+# gunicorn workers (-k gthread, see the Dockerfile); the cap keeps streams short on sync workers too.
+PROGRESS_STREAM_MAX_SECONDS = int(os.getenv('PROGRESS_STREAM_MAX_SECONDS', '25'))
+PROGRESS_STREAM_POLL_SECONDS = float(os.getenv('PROGRESS_STREAM_POLL_SECONDS', '0.5'))
+
+# Client supplied job ids are used in file names
+_JOB_ID_RE = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED)
+
+
+def _now():
+    return datetime.now().isoformat()
+
+
+def valid_job_id(job_id):
+    return bool(job_id and _JOB_ID_RE.match(job_id))
+
+
+def _noop_progress(event, **data):
+    pass
+
+
+class JobStore:
+    """
+    Thread-safe registry of jobs.
+
+    Every job is a plain dict: {'id', 'kind', 'status', 'owner', 'params', 'progress',
+    'result', 'error', 'created_at', 'updated_at', 'finished_at'}. State transitions are
+    written to ``<JOB_STORE_DIR>/<id>.json`` so results survive a restart.
+
+    Progress events are appended to ``<JOB_STORE_DIR>/<id>.events.ndjson`` so any worker
+    process can stream them (see stream_events); the stream ends with an 'end' event when
+    the job completes or fails.
+    """
+
+    def __init__(self, store_dir=JOB_STORE_DIR, max_in_memory=JOB_STORE_MAX_IN_MEMORY):
+        self.store_dir = store_dir
+        self.max_in_memory = max_in_memory
+        self._jobs = {}
+        self._lock = threading.RLock()
+        self._event_lock = threading.Lock()
+        self._event_seq = {}
+        self._last_purge = 0.0
+
+    def _path(self, job_id):
+        return os.path.join(self.store_dir, f"{job_id}.json")
+
+    def _persist(self, job):
+        try:
+            os.makedirs(self.store_dir, exist_ok=True)
+            tmp_path = f"{self._path(job['id'])}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(job, f, default=str)
+            os.replace(tmp_path, self._path(job['id']))
+        except Exception as e:
+            logging.warning(f"Could not persist job {job['id']}: {e}")
+
+    def _evict(self):
+        if len(self._jobs) <= self.max_in_memory:
+            return
+        finished = sorted((j for j in self._jobs.values() if j['status'] in FINISHED_STATES),
+                          key=lambda j: j['updated_at'])
+        for job in finished[:len(self._jobs) - self.max_in_memory]:
+            del self._jobs[job['id']]
+
+    def _events_path(self, job_id):
+        return os.path.join(self.store_dir, f"{job_id}.events.ndjson")
+
+    def _count_events(self, job_id):
+        path = self._events_path(job_id)
+        if not os.path.exists(path):
+            return 0
+        with open(path) as f:
+            return sum(1 for _ in f)
+
+    def publish(self, job_id, event, **data):
+        """Append a progress event (e.g. 'rendered', 'uploaded', 'sent', 'failed') to the job's stream"""
+        with self._event_lock:
+            if job_id not in self._event_seq:
+                self._event_seq[job_id] = self._count_events(job_id)
+            seq = self._event_seq[job_id] + 1
+            self._event_seq[job_id] = seq
+            line = json.dumps({'id': seq, 'event': event, 'data': data, 'ts': _now()}, default=str)
+            try:
+                os.makedirs(self.store_dir, exist_ok=True)
+                with open(self._events_path(job_id), 'a') as f:
+                    f.write(line + '\n')
+            except Exception as e:
+                logging.warning(f"Could not write progress event for job {job_id}: {e}")
+        if event == 'end':
+            self._event_seq.pop(job_id, None)
+
+    def emitter(self, job_id):
+        """Callable progress(event, **data) bound to a job; a no-op when job_id is None"""
+        if not job_id:
+            return _noop_progress
+        return lambda event, **data: self.publish(job_id, event, **data)
+
+    def read_events(self, job_id, after_id=0, offset=0):
+        """
+        Events with id > after_id starting at byte offset ``offset`` of the event file.
+
+        Returns:
+            tuple: (list of event dicts, new byte offset)
+        """
+        path = self._events_path(job_id)
+        if not os.path.exists(path):
+            return [], offset
+        events = []
+        with open(path) as f:
+            f.seek(offset)
+            while True:
+                line = f.readline()
+                if not line.endswith('\n'):
+                    break  # Partial line still being written
+                offset = f.tell()
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if event['id'] > after_id:
+                    events.append(event)
+        return events, offset
+
+    def stream_events(self, job_id, last_event_id=0, can_read=None, max_seconds=PROGRESS_STREAM_MAX_SECONDS,
+                      poll_seconds=PROGRESS_STREAM_POLL_SECONDS):
+        """
+        Generator of Server-Sent Events text for a job's progress, ending at the 'end' event.
+
+        ``can_read(job)`` is checked on every poll: nothing is sent until the job exists (a
+        stream may be opened with a client supplied id before the job is created) and the
+        stream ends as 'not_found' once the job turns out to belong to someone else.
+        """
+        yield "retry: 2000\n\n"
+        offset = 0
+        deadline = time.monotonic() + max_seconds
+        last_sent = time.monotonic()
+        while True:
+            job = self.get(job_id)
+            if job and can_read and not can_read(job):
+                yield f"event: end\ndata: {json.dumps({'event': 'end', 'data': {'status': 'not_found'}})}\n\n"
+                return
+            events = []
+            if job:
+                events, offset = self.read_events(job_id, last_event_id, offset)
+            if events:
+                last_sent = time.monotonic()
+            for event in events:
+                last_event_id = event['id']
+                yield f"id: {event['id']}\nevent: {event['event']}\ndata: {json.dumps(event)}\n\n"
+                if event['event'] == 'end':
+                    return
+            if not events and job and job['status'] in FINISHED_STATES and not os.path.exists(self._events_path(job_id)):
+                # Finished before any event was written (or the events were cleaned up)
+                yield f"event: end\ndata: {json.dumps({'event': 'end', 'data': {'status': job['status']}})}\n\n"
+                return
+            if time.monotonic() >= deadline:
+                return
+            if time.monotonic() - last_sent >= 10:
+                last_sent = time.monotonic()
+                yield ": keep-alive\n\n"
+            time.sleep(poll_seconds)
+
+    def purge(self, max_age_seconds=JOB_STORE_MAX_AGE_DAYS * 86400):
+        """
+        Delete job and event files not modified for max_age_seconds, except those of jobs
+        still queued or running in this process. Returns the number of jobs removed.
+        """
+        cutoff = time.time() - max_age_seconds
+        try:
+            names = os.listdir(self.store_dir)
+        except FileNotFoundError:
+            return 0
+        removed = set()
+        for name in names:
+            if name.endswith('.events.ndjson'):
+                job_id = name[:-len('.events.ndjson')]
+            elif name.endswith('.json'):
+                job_id = name[:-len('.json')]
+            else:
+                continue
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job and job['status'] not in FINISHED_STATES:
+                    continue
+            path = os.path.join(self.store_dir, name)
+            try:
+                if os.path.getmtime(path) >= cutoff:
+                    continue
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logging.warning(f"Could not remove old job file {path}: {e}")
+                continue
+            removed.add(job_id)
+        with self._lock:
+            for job_id in removed:
+                self._jobs.pop(job_id, None)
+        if removed:
+            logging.info(f"Purged {len(removed)} job(s) older than {max_age_seconds / 86400:g} days")
+        return len(removed)
+
+    def create(self, kind, params=None, owner=None, job_id=None):
+        job = {
+            'id': job_id or uuid.uuid4().hex,
+            'kind': kind,
+            'status': JOB_QUEUED,
+            'owner': owner,
+            'params': params or {},
+            'progress': {'stage': JOB_QUEUED, 'message': None, 'percent': 0},
+            'result': None,
+            'error': None,
+            'created_at': _now(),
+            'updated_at': _now(),
+            'finished_at': None
+        }
+        with self._lock:
+            self._jobs[job['id']] = job
+            self._evict()
+            self._persist(job)
+        if time.monotonic() - self._last_purge >= JOB_STORE_PURGE_INTERVAL_SECONDS:
+            self._last_purge = time.monotonic()
+            self.purge()
+        return dict(job)
+
+    def _update(self, job_id, persist=False, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id) or self._load(job_id)
+            if job is None:
+                raise KeyError(f"Unknown job {job_id}")
+            job.update(fields)
+            job['updated_at'] = _now()
+            self._jobs[job_id] = job
+            if persist:
+                self._persist(job)
+            return dict(job)
+
+    def start(self, job_id):
+        job = self._update(job_id, persist=True, status=JOB_RUNNING,
+                           progress={'stage': JOB_RUNNING, 'message': None, 'percent': 0})
+        self.publish(job_id, 'status', status=JOB_RUNNING)
+        return job
+
+    def set_progress(self, job_id, stage, message=None, percent=None):
+        job = self._update(job_id, progress={'stage': stage, 'message': message, 'percent': percent})
+        self.publish(job_id, 'progress', stage=stage, message=message, percent=percent)
+        return job
+
+    def complete(self, job_id, result):
+        job = self._update(job_id, persist=True, status=JOB_COMPLETED, result=result, finished_at=_now(),
+                           progress={'stage': JOB_COMPLETED, 'message': None, 'percent': 100})
+        self.publish(job_id, 'end', status=JOB_COMPLETED, message=(result or {}).get('message') if isinstance(result, dict) else None)
+        return job
+
+    def fail(self, job_id, error, result=None):
+        job = self._update(job_id, persist=True, status=JOB_FAILED, error=str(error), result=result,
+                           finished_at=_now(), progress={'stage': JOB_FAILED, 'message': str(error), 'percent': None})
+        self.publish(job_id, 'end', status=JOB_FAILED, error=str(error))
+        return job
+
+    def _load(self, job_id):
+        path = self._path(job_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning(f"Could not read job {job_id}: {e}")
+            return None
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                job = self._load(job_id)
+            return dict(job) if job else None
+
+    def list(self, kind=None, owner=None, limit=50):
+        """Most recent in-memory jobs first, optionally filtered by kind/owner"""
+        with self._lock:
+            jobs = [dict(j) for j in self._jobs.values()
+                    if (kind is None or j['kind'] == kind) and (owner is None or j['owner'] == owner)]
+        jobs.sort(key=lambda j: j['created_at'], reverse=True)
+        return jobs[:limit]
+
+
+job_store = JobStore()
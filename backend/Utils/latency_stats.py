@@ -0,0 +1,159 @@
+# latency_stats.py - Recorded per-call latencies and sizes, used to estimate dry-run execution plans
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+from Utils.file_lock import FileLock
+
+LATENCY_STATS_PATH = os.getenv(
+    'LATENCY_STATS_PATH',
+    os.path.join(os.getenv('OUTPUT_DIR', os.path.join(os.path.expanduser('~'), 'Salary_Slips')), 'metrics', 'latency_stats.json')
+)
+# Recorded samples are written to disk at most this often (seconds)
+LATENCY_STATS_FLUSH_SECONDS = float(os.getenv('LATENCY_STATS_FLUSH_SECONDS', '30'))
+# Weight of the newest sample in the moving average
+LATENCY_STATS_ALPHA = 0.2
+
+# Used until an operation has been recorded at least once
+DEFAULT_LATENCIES = {
+    'email_send': 1.5,
+    'whatsapp_send': 4.0,
+    'salary_slip': 6.0,
+    'reactor_fetch': 4.0,
+    'reactor_render': 5.0,
+    'reactor_convert': 8.0,
+    'drive_upload': 2.5
+}
+DEFAULT_BYTES = {
+    'salary_slip': 60 * 1024,
+    'reactor_convert': 400 * 1024
+}
+
+
+class LatencyStats:
+    """
+    Exponentially weighted averages of seconds (and optionally bytes) per operation.
+
+    Samples are cheap to record from any thread; they are merged into LATENCY_STATS_PATH at
+    most every LATENCY_STATS_FLUSH_SECONDS so the estimates are shared by all workers and
+    survive restarts.
+    """
+
+    def __init__(self, path=LATENCY_STATS_PATH, flush_seconds=LATENCY_STATS_FLUSH_SECONDS):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self._stats = None
+        self._pending = {}  # op -> [(seconds, bytes), ...] not yet written
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _read_file(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable latency stats {self.path}: {e}")
+            return {}
+
+    def _ensure_loaded(self):
+        if self._stats is None:
+            self._stats = self._read_file()
+
+    @staticmethod
+    def _fold(entry, seconds, nbytes):
+        if entry.get('samples'):
+            entry['seconds'] = round(entry['seconds'] + LATENCY_STATS_ALPHA * (seconds - entry['seconds']), 4)
+        else:
+            entry['seconds'] = round(seconds, 4)
+        if nbytes is not None:
+            previous = entry.get('bytes')
+            entry['bytes'] = int(nbytes if previous is None else previous + LATENCY_STATS_ALPHA * (nbytes - previous))
+        entry['samples'] = entry.get('samples', 0) + 1
+
+    def record(self, op, seconds, nbytes=None):
+        """Record one call of an operation"""
+        with self._lock:
+            self._ensure_loaded()
+            self._fold(self._stats.setdefault(op, {}), seconds, nbytes)
+            self._pending.setdefault(op, []).append((seconds, nbytes))
+            due = time.monotonic() - self._last_flush >= self.flush_seconds
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Merge pending samples into the shared file (re-read first so other workers' samples are kept)"""
+        with self._lock:
+            if not self._pending:
+                return
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            try:
+                # Held across read, merge and write so concurrent flushes of other workers are not lost
+                with FileLock(os.path.basename(self.path), os.path.dirname(self.path)):
+                    stats = self._read_file()
+                    for op, samples in pending.items():
+                        for seconds, nbytes in samples:
+                            self._fold(stats.setdefault(op, {}), seconds, nbytes)
+                    self._stats = stats
+                    tmp_path = f"{self.path}.{os.getpid()}.tmp"
+                    with open(tmp_path, 'w') as f:
+                        json.dump(stats, f)
+                    os.replace(tmp_path, self.path)
+            except Exception as e:
+                logging.warning(f"Could not persist latency stats: {e}")
+
+    def estimate(self, op):
+        """{'seconds', 'bytes', 'samples', 'source'} for one call of an operation"""
+        with self._lock:
+            self._ensure_loaded()
+            entry = dict(self._stats.get(op, {}))
+        if entry.get('samples'):
+            return {'seconds': entry['seconds'], 'bytes': entry.get('bytes', DEFAULT_BYTES.get(op, 0)),
+                    'samples': entry['samples'], 'source': 'recorded'}
+        return {'seconds': DEFAULT_LATENCIES.get(op, 1.0), 'bytes': DEFAULT_BYTES.get(op, 0),
+                'samples': 0, 'source': 'default'}
+
+    def plan_step(self, op, count, workers=1, rate_per_second=None):
+        """
+        Estimated cost of running an operation `count` times on `workers` parallel workers,
+        limited to `rate_per_second` calls when given.
+        """
+        estimate = self.estimate(op)
+        seconds = count * estimate['seconds'] / max(1, workers)
+        if rate_per_second:
+            seconds = max(seconds, count / rate_per_second)
+        return {
+            'count': count,
+            'seconds_each': estimate['seconds'],
+            'estimated_seconds': round(seconds, 1),
+            'source': estimate['source']
+        }
+
+
+def summarize_plan(steps, parallel_groups=(), estimated_bytes=0, **details):
+    """
+    Build a plan dict from named steps.
+
+    Steps run one after another, except the steps named in each of `parallel_groups`, which
+    overlap (the group costs as much as its slowest step).
+    """
+    grouped = {name for group in parallel_groups for name in group}
+    seconds = sum(step['estimated_seconds'] for name, step in steps.items() if name not in grouped)
+    for group in parallel_groups:
+        seconds += max((steps[name]['estimated_seconds'] for name in group if name in steps), default=0)
+    return {
+        'dry_run': True,
+        'steps': steps,
+        'api_calls': sum(step['count'] for step in steps.values()),
+        'estimated_bytes': int(estimated_bytes),
+        'estimated_seconds': round(seconds, 1),
+        **details
+    }
+
+
+latency_stats = LatencyStats()
+atexit.register(latency_stats.flush)
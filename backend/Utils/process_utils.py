@@ -10,6 +10,20 @@ from Utils.whatsapp_utils import (
     send_whatsapp_message,
 )
 from Utils.drive_utils import upload_to_google_drive, upload_reactor_report_to_drive
+from Utils.grid_utils import SheetGrid
+from Utils.reactor_sheet_cache import reactor_sheet_cache, reactor_fragment_cache
+from Utils.reactor_date_index import reactor_date_index
+from Utils.template_engine import compile_template, render_template, describe_unknown_placeholders
+from Utils.template_store import template_store
+from Utils.upload_buffers import UploadBuffer, attachment_name, prepare_file_paths
+from Utils.contact_validation import validate_recipients, recipient_contacts
+from Utils.dispatch_utils import ChannelDispatcher, merge_retry_stats, DISPATCH_CHANNELS
+from Utils.delivery_log import DeliveryLog, email_failure_reason, as_delivery_stats
+from Utils.latency_stats import latency_stats, summarize_plan
+from Utils.fanout import split_addresses, merge_addresses, chunk_addresses
+from Utils.report_runs import report_run_store
+from Utils.docx_table_builder import add_table_from_rows
+from Utils.reactor_matchers import DRAIN_VALVE_MATCHER, REQUIRED_COLUMNS, HeaderIndex, DateParser
 import shutil
 import subprocess
 import platform
@@ -31,7 +45,10 @@ from Utils.config import creds
 from Utils.firebase_utils import db
 from datetime import datetime, timedelta
 from Utils.whatsapp_utils import handle_reactor_report_notification, handle_reactor_report_notification_with_stats
+import time
 import traceback
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -363,74 +380,6 @@ def should_start_table_on_new_page(doc, table_rows, table_name_length=0, logger=
             logging.warning(f"Error estimating table space: {e}")
         return False  # Default to current page if estimation fails
 
-def prepare_file_paths(file_paths, user_email=None, base_output_dir=None, is_upload=False):
-    try:
-        # Import temp_manager here to avoid circular imports
-        from .temp_manager import get_user_temp_dir
-        
-        # Initialize empty list if no file paths provided
-        if not file_paths:
-            return []
-            
-        # Convert single path to list if it's not already
-        if not isinstance(file_paths, list):
-            file_paths = [file_paths]
-        
-        # Get user-specific temp directory
-        temp_dir = None
-        if is_upload and user_email and base_output_dir:
-            temp_dir = get_user_temp_dir(user_email, base_output_dir)
-        elif is_upload and not user_email:
-            # Fallback to base temp directory if no user email provided
-            temp_dir = os.path.join(base_output_dir, "temp") if base_output_dir else None
-            if temp_dir:
-                os.makedirs(temp_dir, exist_ok=True)
-            
-        # Validate each path and collect valid ones
-        valid_paths = []
-        seen_filenames = set()  # Keep track of filenames we've already processed
-        errors = []
-        
-        for path in file_paths:
-            try:
-                if is_upload:
-                    # Handle uploaded file
-                    if hasattr(path, 'filename') and path.filename:
-                        if temp_dir:
-                            temp_path = os.path.join(temp_dir, path.filename)
-                            path.save(temp_path)
-                            valid_paths.append(temp_path)
-                            seen_filenames.add(path.filename)
-                            logging.info(f"Saved attachment file to user temp dir: {temp_path}")
-                        else:
-                            errors.append("No temp directory available for uploaded file")
-                            logging.error("No temp directory available for uploaded file")
-                else:
-                    # Handle existing file path
-                    if os.path.exists(path) and os.path.isfile(path):
-                        filename = os.path.basename(path)
-                        if filename not in seen_filenames:
-                            valid_paths.append(path)
-                            seen_filenames.add(filename)
-                            logging.info(f"Added file: {path}")
-                        else:
-                            logging.warning(f"Duplicate file found: {path}. Skipping.")
-                    else:
-                        errors.append(f"Invalid or non-existent file path: {path}")
-                        logging.warning(f"Invalid or non-existent file path: {path}")
-            except Exception as e:
-                errors.append(f"Error processing file {path}: {str(e)}")
-                logging.error(f"Error processing file {path}: {str(e)}")
-                
-        logging.info(f"Prepared {len(valid_paths)} valid file paths for user: {user_email}")
-        if errors:
-            logging.warning(f"File preparation completed with {len(errors)} errors")
-        
-        return valid_paths
-    except Exception as e:
-        logging.error(f"Error preparing file paths: {str(e)}")
-        return []
-
 # Load message templates
 def load_message_templates():
     try:
@@ -444,7 +393,13 @@ def load_message_templates():
 def preprocess_headers(headers):
     return [header.replace("\n", " ").strip().strip('"') for header in headers]
 
+# LibreOffice cannot run two headless conversions against the same user profile, so all
+# report flows (including concurrent reactor runs) share one converter through this lock
+_conversion_lock = threading.Lock()
+_libreoffice_available = None
+
 def convert_docx_to_pdf(input_path, output_path):
+    global _libreoffice_available
     try:
         # Check if input file exists
         if not os.path.exists(input_path):
@@ -453,22 +408,25 @@ def convert_docx_to_pdf(input_path, output_path):
             
         logging.info(f"Converting DOCX to PDF: {input_path} -> {output_path}")
         
-        # Check if LibreOffice is available
-        try:
-            subprocess.run(['libreoffice', '--version'], check=True, capture_output=True)
-            logging.info("LibreOffice is available")
-        except (subprocess.CalledProcessError, FileNotFoundError) as e:
-            logging.error(f"LibreOffice is not available: {e}")
-            return False
-        
-        process = subprocess.Popen([
-            'libreoffice', '--headless', '--convert-to', 'pdf',
-            '--outdir', os.path.dirname(output_path),
-            input_path
-        ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        
-        stdout, stderr = process.communicate()
-        return_code = process.returncode
+        with _conversion_lock:
+            # Check once per process whether LibreOffice is available
+            if _libreoffice_available is None:
+                try:
+                    subprocess.run(['libreoffice', '--version'], check=True, capture_output=True)
+                    logging.info("LibreOffice is available")
+                    _libreoffice_available = True
+                except (subprocess.CalledProcessError, FileNotFoundError) as e:
+                    logging.error(f"LibreOffice is not available: {e}")
+                    return False
+            
+            process = subprocess.Popen([
+                'libreoffice', '--headless', '--convert-to', 'pdf',
+                '--outdir', os.path.dirname(output_path),
+                input_path
+            ], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            
+            stdout, stderr = process.communicate()
+            return_code = process.returncode
         
         logging.info(f"LibreOffice conversion return code: {return_code}")
         if stdout:
@@ -968,62 +926,156 @@ def process_salary_slips(template_path, output_dir, employees_data, headers, dri
     logging.info(f"Finished batch processing: {batch_results['successful']}/{batch_results['total_processed']} successful")
     return batch_results
 
-def process_reports(file_path_template):
-    
+def preview_file_content(file_name, data):
+    """Preview text for an uploaded file given its name and content (bytes or a memoryview, not copied)"""
     try:
-        file_extension = os.path.splitext(file_path_template)[1].lower()
-        file_name = os.path.basename(file_path_template)
+        file_extension = os.path.splitext(file_name)[1].lower()
         
         # For attachments, just return the filename in square brackets
         if file_extension in ['.pdf', '.png', '.jpg', '.jpeg']:
             return f"[{file_name}]"
             
         if file_extension == '.docx':
-            # Read DOCX file
-            doc = Document(file_path_template)
-            content = []
-            
-            # Read paragraphs with proper spacing
-            for para in doc.paragraphs:
-                if para.text.strip():  # Only add non-empty paragraphs
-                    # Add extra newline for paragraphs with specific formatting
-                    if para.style.name.startswith('Heading') or para.style.name == 'Title':
-                        content.append('\n' + para.text.strip() + '\n')
-                    else:
-                        content.append(para.text.strip())
-            
-            # Read tables with proper formatting
-            for table in doc.tables:
-                content.append('\n')  # Add spacing before table
-                for row in table.rows:
-                    row_content = []
-                    for cell in row.cells:
-                        if cell.text.strip():  # Only add non-empty cells
-                            row_content.append(cell.text.strip())
-                    if row_content:  # Only add non-empty rows
-                        content.append(' | '.join(row_content))
-                content.append('\n')  # Add spacing after table
-            
-            # Join content with proper line breaks
-            return '\n'.join(content)
+            return template_store.get(data, file_name).preview
             
         elif file_extension in ['.txt', '.csv']:
             # Read text files with proper line breaks
-            with open(file_path_template, 'r', encoding='utf-8') as f:
-                content = f.read()
-                # Ensure proper line breaks and remove extra spaces
-                return '\n'.join(line.strip() for line in content.splitlines() if line.strip())
+            content = str(data, 'utf-8')
+            # Ensure proper line breaks and remove extra spaces
+            return '\n'.join(line.strip() for line in content.splitlines() if line.strip())
                 
         else:
             return f"Unsupported file type: {file_extension}"
             
+    except Exception as e:
+        logging.error(f"Error reading file {file_name}: {e}")
+        return f"Error reading file: {str(e)}"
+
+def process_reports(file_path_template):
+    
+    try:
+        file_name = os.path.basename(file_path_template)
+        if os.path.splitext(file_name)[1].lower() in ['.pdf', '.png', '.jpg', '.jpeg']:
+            return f"[{file_name}]"
+        with open(file_path_template, 'rb') as f:
+            return preview_file_content(file_name, f.read())
+            
     except Exception as e:
         logging.error(f"Error reading file {file_path_template}: {e}")
         return f"Error reading file: {str(e)}"
 
-def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_range_data, input_date, user_id, send_email, send_whatsapp, template_path, output_dir, gspread_client, logger, process_name='reactor-report', google_access_token=None, google_refresh_token=None):
+REACTOR_FETCH_MAX_WORKERS = int(os.getenv('REACTOR_FETCH_MAX_WORKERS', '6'))
+
+
+def fetch_reactor_sheets(gspread_client, sheet_ids, logger, max_workers=REACTOR_FETCH_MAX_WORKERS):
+    """
+    Download the first worksheet of several spreadsheets concurrently.
+    Unchanged and closed sheets are served from the on-disk reactor sheet cache.
+
+    Returns:
+        dict: sheet_id -> (worksheet, grid), or the Exception raised while fetching that sheet
+    """
+    unique_ids = list(dict.fromkeys(sheet_ids))
+    if not unique_ids:
+        return {}
+    fetched = {}
+    started = datetime.now()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_ids)))) as executor:
+        futures = {executor.submit(reactor_sheet_cache.fetch, gspread_client, sheet_id, logger): sheet_id for sheet_id in unique_ids}
+        for future in as_completed(futures):
+            sheet_id = futures[future]
+            try:
+                fetched[sheet_id] = future.result()
+            except Exception as e:
+                logger.error(f"Error fetching sheet {sheet_id}: {e}")
+                fetched[sheet_id] = e
+    logger.info(f"Fetched {len(unique_ids)} reactor sheets in {(datetime.now() - started).total_seconds():.2f}s")
+    return fetched
+
+
+def reactor_email_recipients(sheet_recipients_data, warnings=None):
+    """
+    Valid To, CC and BCC addresses from the reactor Recipients tab.
+
+    Returns:
+        tuple: (recipients_to, recipients_cc, recipients_bcc)
+    """
+    headers = [h.strip() for h in sheet_recipients_data[0]]
+    to_idx = headers.index('Email ID - To') if 'Email ID - To' in headers else None
+    cc_idx = headers.index('Email ID - CC') if 'Email ID - CC' in headers else None
+    bcc_idx = headers.index('Email ID - BCC') if 'Email ID - BCC' in headers else None
     
+    recipients_to = []
+    recipients_cc = []
+    recipients_bcc = []
     
+    for row in sheet_recipients_data[1:]:
+        try:
+            if to_idx is not None and len(row) > to_idx and row[to_idx].strip():
+                email = row[to_idx].strip()
+                if is_valid_email(email):
+                    recipients_to.append(email)
+            if cc_idx is not None and len(row) > cc_idx and row[cc_idx].strip():
+                email = row[cc_idx].strip()
+                if is_valid_email(email):
+                    recipients_cc.append(email)
+            if bcc_idx is not None and len(row) > bcc_idx and row[bcc_idx].strip():
+                email = row[bcc_idx].strip()
+                if is_valid_email(email):
+                    recipients_bcc.append(email)
+        except Exception as e:
+            if warnings is not None:
+                warnings.append(f"Error processing recipient row: {e}")
+            continue
+    return recipients_to, recipients_cc, recipients_bcc
+
+
+def reactor_email_chunks(recipients_to):
+    """Distinct To addresses of a reactor report, grouped into the messages that carry them"""
+    return chunk_addresses(split_addresses(merge_addresses([recipients_to])))
+
+
+def plan_reactor_report(sheets_to_process, sheet_recipients_data, table_range_data, send_email, send_whatsapp):
+    """Dry-run plan for a reactor report whose sheets have already been fetched and filtered"""
+    recipients_to, recipients_cc, recipients_bcc = reactor_email_recipients(sheet_recipients_data) if send_email else ([], [], [])
+    # Same as the send path: one email per chunk of To addresses
+    email_messages = len(reactor_email_chunks(recipients_to))
+    whatsapp_recipients = 0
+    if send_whatsapp and sheet_recipients_data:
+        # Same column detection as handle_reactor_report_notification_with_stats
+        phone_columns = [i for i, h in enumerate(sheet_recipients_data[0])
+                         if any(k in h.strip().lower() for k in ('phone', 'contact', 'mobile', 'whatsapp'))]
+        whatsapp_recipients = sum(1 for row in sheet_recipients_data[1:]
+                                  if any(i < len(row) and row[i].strip() for i in phone_columns))
+    table_count = sum(1 for row in table_range_data[2:] if any(cell.strip() for cell in row))
+    notify = send_email or send_whatsapp
+
+    steps = {
+        'render': latency_stats.plan_step('reactor_render', 1),
+        'convert': latency_stats.plan_step('reactor_convert', 1),
+        'email': latency_stats.plan_step('email_send', email_messages),
+        'whatsapp': latency_stats.plan_step('whatsapp_send', whatsapp_recipients),
+        'drive_upload': latency_stats.plan_step('drive_upload', 1 if notify else 0)
+    }
+    report_bytes = latency_stats.estimate('reactor_convert')['bytes']
+    # Email attachments are base64 encoded (4/3) and sent once per message
+    estimated_bytes = report_bytes * (email_messages * 4 / 3 + whatsapp_recipients + (1 if notify else 0))
+    return summarize_plan(
+        steps,
+        estimated_bytes=estimated_bytes,
+        sheets=[{'date': str(d), 'sheet_id': sheet_id} for d, sheet_id, _, _ in sheets_to_process],
+        tables_per_sheet=table_count,
+        messages={'email': email_messages, 'whatsapp': whatsapp_recipients},
+        email_copies={'to': len(recipients_to), 'cc': len(recipients_cc), 'bcc': len(recipients_bcc)},
+        attachments=email_messages + whatsapp_recipients,
+        drive_uploads=steps['drive_upload']['count']
+    )
+
+
+def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_range_data, input_date, user_id, send_email, send_whatsapp, template_path, output_dir, gspread_client, logger, process_name='reactor-report', google_access_token=None, google_refresh_token=None, progress=None, dry_run=False, plant=None):
+    
+    # dry_run: read and filter the sheets, then return result["plan"] instead of rendering or sending
+    # plant: included in the output filenames so runs of several plants never share a file
     
     # Initialize result tracking
     result = {
@@ -1051,139 +1103,35 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
             }
         },
         "output_file": None,
+        "fanout": {"channels": {}, "sends_saved": 0},
         "errors": [],
-        "warnings": []
+        "warnings": [],
+        # Seconds spent per stage; read by Utils.reactor_benchmark and useful in job results
+        "timings": {"fetch": 0.0, "filter": 0.0, "render": 0.0, "convert": 0.0, "notify": 0.0}
     }
+    # Every email/WhatsApp attempt of the run; serialized into result["delivery_stats"] at the end
+    delivery_log = DeliveryLog()
+    stage_started = [time.perf_counter()]
+    progress = progress or (lambda event, **data: None)
+
+    def end_stage(stage, nbytes=None):
+        now = time.perf_counter()
+        result["timings"][stage] = round(result["timings"][stage] + now - stage_started[0], 4)
+        progress('stage', stage=stage, seconds=round(now - stage_started[0], 4))
+        if stage in ('fetch', 'render', 'convert'):
+            latency_stats.record(f"reactor_{stage}", now - stage_started[0], nbytes)
+        stage_started[0] = now
     
     try:
-        REACTOR_CONFIG = {
-            'charging_operations': {
-                'patterns': [
-                    'charging',
-                    'charge',
-                    'charging (with circulation)',
-                    'charging with circulation',
-                    'charging operation',
-                    'start charging',
-                    'reactor charging',
-                    'material charging'
-                ],
-                'date_column_keywords': [
-                    'Start Date & Time',
-                    'Start Date',
-                    'Start Time',
-                    'Start Date\n& Time',
-                    'Charging Start Date',
-                    'Operation Start Date',
-                    'Process Start Date',
-                    'Begin Date',
-                    'Initiation Date'
-                ]
-            },
-            'drain_valve_operations': {
-                'patterns': [
-                    'ml & a & b drain valve',
-                    'ml and a and b drain valve',
-                    'drain valve',
-                    'ml drain valve',
-                    'a & b drain valve',
-                    'drain operation',
-                    'valve drain',
-                    'ml drain',
-                    'a b drain',
-                    'drain process'
-                ],
-                'date_column_keywords': [
-                    'End Date & Time',
-                    'End Date',
-                    'End Time',
-                    'End Date\n& Time',
-                    'Drain End Date',
-                    'Operation End Date',
-                    'Process End Date',
-                    'Completion Date',
-                    'Finish Date',
-                    'Termination Date'
-                ]
-            },
-            'required_columns': [
-                'Particulars',
-                'Description',
-                'Operation',
-                'Process Step'
-            ]
-        }
-        
-        # Helper for robust header lookup
-        def find_header(headers, name):
-            for i, h in enumerate(headers):
-                if h.strip().lower() == name.strip().lower():
-                    return i
-            raise ValueError(f"{name} is not in list: {headers}")
-
-        # Helper for flexible row finding with multiple patterns
-        def find_row_by_patterns(data, particulars_idx, patterns, case_sensitive=False):
-            
-            for row in data[2:]:  # Skip Row 1 (non-data) and Row 2 (headers), start from Row 3 (index 2)
-                if len(row) <= particulars_idx:
-                    continue
-                particulars_text = row[particulars_idx].strip()
-                if not case_sensitive:
-                    particulars_text = particulars_text.lower()
-                
-                for pattern in patterns:
-                    if case_sensitive:
-                        if pattern in particulars_text:
-                            return row
-                    else:
-                        if pattern.lower() in particulars_text:
-                            return row
-            return None
-
-        # Helper for flexible date column finding
-        def find_date_column(headers, date_keywords):
-            for keyword in date_keywords:
-                try:
-                    return find_header(headers, keyword)
-                except ValueError:
-                    continue
-            return None
-
-        # Helper for robust date parsing and comparison
-        def normalize_date_for_comparison(date_str, input_date):
-            if not date_str or not input_date:
-                return None, None
-            
-            # Common date separators and formats
-            date_formats = [
-                "%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%Y/%m/%d",
-                "%d/%m/%y", "%m/%d/%y", "%d-%m-%y", "%y-%m-%d"
-            ]
-            
-            # Clean the date string (remove time part if present)
-            date_part = date_str.split()[0] if ' ' in date_str else date_str
-            
-            # Try to parse the date
-            for fmt in date_formats:
-                try:
-                    parsed_date = datetime.strptime(date_part, fmt)
-                    # Normalize to YYYY-MM-DD format
-                    normalized_date = parsed_date.strftime("%Y-%m-%d")
-                    return normalized_date, parsed_date
-                except ValueError:
-                    continue
-            
-            return None, None
-
         # Helper for debugging sheet structure
-        def log_sheet_structure(headers, data, sheet_name, logger):
+        def log_sheet_structure(grid, sheet_name, logger):
             
             logger.info(f"Sheet '{sheet_name}' structure:")
-            logger.info(f"Headers (Row 2): {headers}")
-            logger.info(f"Total data rows: {len(data) - 1}")  # Subtract 1 for headers
-            if len(data) > 1:
+            logger.info(f"Headers (Row 2): {grid.headers}")
+            logger.info(f"Total data rows: {len(grid) - 2}")  # Excludes Row 1 (non-data) and Row 2 (headers)
+            if len(grid) > 2:
                 logger.info(f"Sample data rows (starting from Row 3):")
-                for i, row in enumerate(data[1:4]):  # Show first 3 data rows (Row 3, 4, 5)
+                for i, row in enumerate(grid.iter_rows(2, 5)):  # Show first 3 data rows (Row 3, 4, 5)
                     logger.info(f"  Row {i+3}: {row[:5]}...")  # Show first 5 columns, adjust row number
 
 
@@ -1204,61 +1152,55 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
             result["warnings"].append("Using current date as fallback")
             dt_input = datetime.now()
         
-        # Build date->sheet_id mapping
-        date_sheet_map = {}
-        for row in sheet_id_mapping_data[1:]:
-            try:
-                date_str = row[0].strip()
-                sheet_id = row[1].strip() if len(row) > 1 else None
-                if not date_str or not sheet_id:
-                    continue
-                for fmt in date_formats:
-                    try:
-                        dt = datetime.strptime(date_str, fmt)
-                        date_sheet_map[dt.date()] = sheet_id
-                        break
-                    except Exception:
-                        continue
-            except Exception as e:
-                result["warnings"].append(f"Error processing sheet mapping row: {e}")
-                continue
+        # Date->sheet_id lookups; only mapping rows appended since the last run are parsed
+        date_sheet_map = reactor_date_index.sync(sheet_id_mapping_data, result["warnings"])
         
         # Get list of dates: input date and 5 previous dates
         dates_to_check = [dt_input.date() - timedelta(days=i) for i in range(0, 6)]
         sheets_to_process = []
         
+        window_sheets = dict(date_sheet_map.window(dates_to_check[-1], dates_to_check[0]))
+        candidates = []
         for idx, d in enumerate(dates_to_check):
-            sheet_id = date_sheet_map.get(d)
+            sheet_id = window_sheets.get(d)
             if not sheet_id:
                 if idx == 0:  # Only warn for input date
                     result["warnings"].append(f"No sheet found for input date {d}")
                 continue
-                
+            candidates.append((idx, d, sheet_id))
+        
+        # Download all candidate sheets concurrently; filtering below runs in date order
+        end_stage("filter")
+        fetched_sheets = fetch_reactor_sheets(gspread_client, [sheet_id for _, _, sheet_id in candidates], logger)
+        end_stage("fetch")
+        
+        input_date_norm, _ = DateParser().parse(input_date)
+        
+        for idx, d, sheet_id in candidates:
             try:
-                spreadsheet = gspread_client.open_by_key(sheet_id)
-                worksheet = spreadsheet.sheet1  # Assume first worksheet
-                data = worksheet.get_all_values()
+                fetched = fetched_sheets[sheet_id]
+                if isinstance(fetched, Exception):
+                    raise fetched
+                worksheet, data = fetched
                 if not data or len(data) < 3:  # Need at least 3 rows: Row 1 (non-data) + Row 2 (headers) + Row 3 (data)
                     logger.warning(f"Sheet for date {d} has insufficient data: {len(data) if data else 0} rows (need at least 3)")
                     result["warnings"].append(f"Sheet for date {d} has insufficient data")
                     continue
                 
                 # Headers are in Row 2 (index 1), data starts from Row 3 (index 2)
-                headers = [h.strip() for h in data[1]]  # Row 2 contains headers
+                grid = SheetGrid(data, header_row=1)
+                headers = grid.headers
                 
                 # Log sheet structure for debugging (only for first few sheets to avoid spam)
                 if idx < 2:
-                    log_sheet_structure(headers, data[1:], f"Date {d}", logger)  # Pass data starting from Row 2
+                    log_sheet_structure(grid, f"Date {d}", logger)
                 
                 # Find operation description column dynamically (try multiple possible names)
-                idx_particulars = None
-                for col_name in REACTOR_CONFIG['required_columns']:
-                    try:
-                        idx_particulars = find_header(headers, col_name)
-                        logger.info(f"Found operation column: '{col_name}' at index {idx_particulars}")
-                        break
-                    except ValueError:
-                        continue
+                header_index = HeaderIndex(headers)
+                sheet_date_parser = DateParser()
+                idx_particulars = header_index.find_any(REQUIRED_COLUMNS)
+                if idx_particulars is not None:
+                    logger.info(f"Found operation column: '{headers[idx_particulars]}' at index {idx_particulars}")
                 
                 if idx_particulars is None:
                     logger.warning(f"No operation description column found in sheet for date {d}. Available columns: {headers}")
@@ -1267,31 +1209,32 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
                 
                 if idx == 0:
                     # For input date sheet: Always include, no conditions
-                    sheets_to_process.append((d, sheet_id, worksheet))
+                    sheets_to_process.append((d, sheet_id, worksheet, grid))
                     logger.info(f"Input date sheet {d} added (no conditions applied)")
                 else:
                     # For previous 5 sheets: Only include if drain valve row's end date is blank or matches input_date
-                    drain_config = REACTOR_CONFIG['drain_valve_operations']
-                    
-                    idx_end_date = find_date_column(headers, drain_config['date_column_keywords'])
+                    idx_end_date = header_index.find_any(DRAIN_VALVE_MATCHER.date_column_keywords)
                     if idx_end_date is None:
                         logger.warning(f"End date column not found in sheet for date {d}. Available columns: {headers}")
                         result["warnings"].append(f"End date column not found in sheet for date {d}")
                         continue
                     
-                    drain_valve_row = find_row_by_patterns(data, idx_particulars, drain_config['patterns'])
+                    drain_valve_row = DRAIN_VALVE_MATCHER.find_row(grid, idx_particulars)
                     if drain_valve_row:
                         end_date_val = drain_valve_row[idx_end_date].strip()
                         if not end_date_val:
-                            sheets_to_process.append((d, sheet_id, worksheet))
+                            sheets_to_process.append((d, sheet_id, worksheet, grid))
                             logger.info(f"Previous date sheet {d} added - drain valve end date is blank")
                         else:
                             # Use robust date comparison
-                            end_date_norm, _ = normalize_date_for_comparison(end_date_val, input_date)
-                            input_date_norm, _ = normalize_date_for_comparison(input_date, input_date)
+                            end_date_norm, _ = sheet_date_parser.parse(end_date_val)
+                            
+                            # A drain valve end date in the past means the sheet will not change again
+                            if end_date_norm and end_date_norm < datetime.now().strftime("%Y-%m-%d"):
+                                reactor_sheet_cache.mark_closed(sheet_id)
                             
                             if end_date_norm and input_date_norm and end_date_norm == input_date_norm:
-                                sheets_to_process.append((d, sheet_id, worksheet))
+                                sheets_to_process.append((d, sheet_id, worksheet, grid))
                                 logger.info(f"Previous date sheet {d} added - drain valve end date matches: {end_date_norm}")
                             else:
                                 logger.info(f"Previous date sheet {d} skipped - drain valve end date '{end_date_val}' doesn't match input date '{input_date}'")
@@ -1305,13 +1248,20 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
         
         # Log summary of sheets found
         logger.info(f"Processing summary: Found {len(sheets_to_process)} sheets to process out of {len(dates_to_check)} dates checked")
-        for d, sheet_id, worksheet in sheets_to_process:
+        for d, sheet_id, worksheet, _grid in sheets_to_process:
             logger.info(f"  - Date {d}: Sheet ID {sheet_id}")
         
+        end_stage("filter")
         if not sheets_to_process:
             result["errors"].append("No sheets found to process")
             return result
 
+        if dry_run:
+            result["plan"] = plan_reactor_report(sheets_to_process, sheet_recipients_data, table_range_data, send_email, send_whatsapp)
+            result["success"] = True
+            result["message"] = "Dry run: nothing was generated or sent"
+            return result
+
         # Parse table_range_data header indices robustly (excluding Sheet Name)
         try:
             tr_headers = [h.strip() for h in table_range_data[1]]
@@ -1335,7 +1285,7 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
             content_added = False
             first_sheet = True
 
-            for d, sheet_id, worksheet in sheets_to_process:
+            for d, sheet_id, worksheet, grid in sheets_to_process:
                 try:
                     sheet_name = worksheet.title if hasattr(worksheet, 'title') else str(d)
                     
@@ -1370,10 +1320,28 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
                         result["warnings"].append(f"Error parsing table definitions: {e}")
                         continue
 
+                    # Previous days' sheets usually render exactly as yesterday: stitch in the cached
+                    # fragment when the sheet contents and table definitions are unchanged
+                    fragment_key = reactor_fragment_cache.make_key(sheet_id, grid.rows, table_defs)
+                    cached_fragment = reactor_fragment_cache.load(sheet_id, fragment_key)
+                    if cached_fragment:
+                        reactor_fragment_cache.insert(doc, cached_fragment)
+                        result["warnings"].extend(cached_fragment['warnings'])
+                        content_added = content_added or cached_fragment['content_added']
+                        result["sheets_processed"] += 1
+                        logger.info(f"Reused rendered tables for sheet {sheet_name} from fragment cache")
+                        progress('rendered', sheet=sheet_name, date=str(d), cached=True)
+                        continue
+
+                    fragment_start = reactor_fragment_cache.body_position(doc)
+                    warnings_start = len(result["warnings"])
+                    errors_start = len(result["errors"])
+                    sheet_content_added = False
+
                     for i, table_def in enumerate(table_defs):
                         try:
-                            # Get data from the specified range
-                            data = worksheet.get(f"{table_def['start']}:{table_def['end']}")
+                            # Slice the range from the grid already downloaded for this sheet
+                            data = grid.view(table_def['start'], table_def['end']).values()
                             if not data or len(data) < 2:  # Need at least header + 1 data row
                                 logger.warning(f"Table {table_def['name']} has insufficient data: {len(data) if data else 0} rows")
                                 result["warnings"].append(f"Table {table_def['name']} has insufficient data")
@@ -1392,33 +1360,29 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
                                 run.bold = True
                                 run.font.size = Pt(11)
                             
-                            # Create table with proper formatting
-                            max_cols = max(len(row) for row in data)
-                            table = doc.add_table(rows=len(data), cols=max_cols)
-                            
-                            # Fill table data with proper formatting
-                            for row_idx, row in enumerate(data):
-                                for col_idx, cell_value in enumerate(row):
-                                    if col_idx < max_cols:
-                                        cell = table.cell(row_idx, col_idx)
-                                        cell.text = str(cell_value)
-                            
-                            # Apply professional formatting to the table (includes page break prevention)
-                            format_table_professional(table, is_header=True, logger=logger)
+                            # Build the formatted table (professional style, rows kept on one page) in one pass
+                            add_table_from_rows(doc, data, preset='professional')
                             
                             # Add 2 lines gap between tables (but not after the last table)
                             if i < len(table_defs) - 1:
                                 doc.add_paragraph()
                                 
-                            content_added = True
+                            sheet_content_added = True
                             
                         except Exception as e:
                             logger.error(f"Error extracting table {table_def['name']} from {sheet_name}: {e}")
                             result["errors"].append(f"Error extracting table {table_def['name']} from {sheet_name}: {e}")
                             # Continue with next table instead of failing completely
                             continue
+                    
+                    content_added = content_added or sheet_content_added
+                    # Only cache sections that rendered cleanly
+                    if len(result["errors"]) == errors_start:
+                        reactor_fragment_cache.store(sheet_id, fragment_key, doc, fragment_start,
+                                                     result["warnings"][warnings_start:], sheet_content_added)
                             
                     result["sheets_processed"] += 1
+                    progress('rendered', sheet=sheet_name, date=str(d), cached=False, tables=len(table_defs))
                     
                 except Exception as e:
                     logger.error(f"Error processing sheet {sheet_id}: {e}")
@@ -1445,17 +1409,20 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
             remove_completely_blank_pages(doc)
             
             # Save the document
-            output_filename = f"reactor_report_{input_date.replace('/', '_')}.docx"
+            report_basename = f"reactor_report_{plant}_{input_date.replace('/', '_')}" if plant else f"reactor_report_{input_date.replace('/', '_')}"
+            output_filename = f"{report_basename}.docx"
             output_path = os.path.join(output_dir, output_filename)
             doc.save(output_path)
             
             # Convert to PDF
-            pdf_filename = f"reactor_report_{input_date.replace('/', '_')}.pdf"
+            pdf_filename = f"{report_basename}.pdf"
             pdf_path = os.path.join(output_dir, pdf_filename)
             logger.info(f"Generated PDF filename: {pdf_filename}")
             logger.info(f"Generated PDF path: {pdf_path}")
             logger.info(f"PDF file exists: {os.path.exists(pdf_path)}")
+            end_stage("render")
             pdf_conversion_success = convert_docx_to_pdf(output_path, pdf_path)
+            end_stage("convert", os.path.getsize(pdf_path) if pdf_conversion_success and os.path.exists(pdf_path) else None)
             if pdf_conversion_success:
                 logger.info("Successfully converted DOCX to PDF")
                 logger.info(f"PDF file exists after conversion: {os.path.exists(pdf_path)}")
@@ -1473,6 +1440,7 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
             result["date_range"] = input_date
 
         except Exception as e:
+            end_stage("render")
             logger.error(f"Error creating document: {e}")
             result["errors"].append(f"Error creating document: {e}")
             return result
@@ -1481,32 +1449,7 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
         if send_email and result["output_file"]:
             try:
                 # Parse recipients from sheet_recipients_data
-                headers = [h.strip() for h in sheet_recipients_data[0]]
-                to_idx = headers.index('Email ID - To') if 'Email ID - To' in headers else None
-                cc_idx = headers.index('Email ID - CC') if 'Email ID - CC' in headers else None
-                bcc_idx = headers.index('Email ID - BCC') if 'Email ID - BCC' in headers else None
-                
-                recipients_to = []
-                recipients_cc = []
-                recipients_bcc = []
-                
-                for row in sheet_recipients_data[1:]:
-                    try:
-                        if to_idx is not None and len(row) > to_idx and row[to_idx].strip():
-                            email = row[to_idx].strip()
-                            if is_valid_email(email):
-                                recipients_to.append(email)
-                        if cc_idx is not None and len(row) > cc_idx and row[cc_idx].strip():
-                            email = row[cc_idx].strip()
-                            if is_valid_email(email):
-                                recipients_cc.append(email)
-                        if bcc_idx is not None and len(row) > bcc_idx and row[bcc_idx].strip():
-                            email = row[bcc_idx].strip()
-                            if is_valid_email(email):
-                                recipients_bcc.append(email)
-                    except Exception as e:
-                        result["warnings"].append(f"Error processing recipient row: {e}")
-                        continue
+                recipients_to, recipients_cc, recipients_bcc = reactor_email_recipients(sheet_recipients_data, result["warnings"])
                 
                 if not recipients_to:
                     result["warnings"].append("No valid recipient emails found in Recipients sheet")
@@ -1523,14 +1466,18 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
                         </body>
                         </html>
                         """
-                    # Send email to each recipient individually to avoid syntax errors
+                    # The report is the same for everyone, so all To addresses share one message
+                    # (split at FANOUT_EMAIL_MAX_RECIPIENTS); CC and BCC ride on the first one only
+                    requested_sends = len(recipients_to)
+                    to_chunks = reactor_email_chunks(recipients_to)
                     success_count = 0
-                    total_email_recipients = len(recipients_to)
-                    
-                    # Update delivery stats for email recipients
-                    result["delivery_stats"]["total_recipients"] += total_email_recipients
+                    report_bytes = os.path.getsize(result["output_file"]) if os.path.exists(result["output_file"]) else 0
                     
-                    for recipient in recipients_to:
+                    for chunk_index, chunk in enumerate(to_chunks):
+                        recipient = merge_addresses([chunk])
+                        cc = ','.join(recipients_cc) if recipients_cc and chunk_index == 0 else None
+                        bcc = ','.join(recipients_bcc) if recipients_bcc and chunk_index == 0 else None
+                        send_started = time.perf_counter()
                         try:
                             if process_name == "kr_reactor-report":
                                 
@@ -1545,8 +1492,8 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
                                     subject=email_subject,
                                     body=email_body,
                                     attachment_paths=[result["output_file"]],
-                                    cc=','.join(recipients_cc) if recipients_cc else None,
-                                    bcc=','.join(recipients_bcc) if recipients_bcc else None,
+                                    cc=cc,
+                                    bcc=bcc,
                                     access_token=google_access_token,
                                     refresh_token=google_refresh_token
                                 )
@@ -1557,68 +1504,32 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
                                     subject=email_subject,
                                     body=email_body,
                                     attachment_paths=[result["output_file"]],
-                                    cc=','.join(recipients_cc) if recipients_cc else None,
-                                    bcc=','.join(recipients_bcc) if recipients_bcc else None
+                                    cc=cc,
+                                    bcc=bcc
                                 )
-                            
-                            # Track email delivery results
-                            if success is True:
-                                success_count += 1
-                                result["delivery_stats"]["successful_deliveries"] += 1
-                                logger.info(f"Email sent successfully to {recipient}")
-                            else:
-                                result["delivery_stats"]["failed_deliveries"] += 1
-                                failure_reason = "Unknown error"
-                                
-                                if success == "USER_NOT_LOGGED_IN":
-                                    failure_reason = "User session expired"
-                                    result["errors"].append(f"User session expired for {recipient}. Please log in again.")
-                                    logger.error(f"User session expired for {recipient}")
-                                elif success == "NO_GMAIL_ACCESS":
-                                    failure_reason = "Gmail access not configured"
-                                    result["errors"].append(f"Gmail access not configured for {recipient}. Please configure Google OAuth.")
-                                    logger.error(f"Gmail access not configured for {recipient}")
-                                elif success == "INVALID_RECIPIENT":
-                                    failure_reason = "Invalid recipient email address"
-                                    result["errors"].append(f"Invalid recipient email address: {recipient}")
-                                    logger.error(f"Invalid recipient email address: {recipient}")
-                                elif success == "GMAIL_AUTH_FAILED":
-                                    failure_reason = "Gmail authentication failed"
-                                    result["errors"].append(f"Gmail authentication failed for {recipient}. Please check your credentials.")
-                                    logger.error(f"Gmail authentication failed for {recipient}")
-                                elif success == "GMAIL_PERMISSION_DENIED":
-                                    failure_reason = "Gmail permission denied"
-                                    result["errors"].append(f"Gmail permission denied for {recipient}. Please authorize the application.")
-                                    logger.error(f"Gmail permission denied for {recipient}")
-                                elif success == "GMAIL_API_ERROR":
-                                    failure_reason = "Gmail API error"
-                                    result["errors"].append(f"Gmail API error for {recipient}. Please try again later.")
-                                    logger.error(f"Gmail API error for {recipient}")
-                                elif success == "GMAIL_SEND_ERROR":
-                                    failure_reason = "Email send error"
-                                    result["errors"].append(f"Failed to send email to {recipient}")
-                                    logger.error(f"Failed to send email to {recipient}")
-                                else:
-                                    failure_reason = f"Unknown error: {success}"
-                                    result["errors"].append(f"Failed to send email to {recipient}")
-                                    logger.error(f"Failed to send email to {recipient}")
-                                
-                                # Add to failed contacts list
-                                result["delivery_stats"]["failed_contacts"].append({
-                                    "name": recipient,
-                                    "contact": recipient,
-                                    "reason": failure_reason
-                                })
-                                
+                            failure_reason = None if success is True else email_failure_reason(success)
                         except Exception as e:
-                            result["delivery_stats"]["failed_deliveries"] += 1
-                            result["delivery_stats"]["failed_contacts"].append({
-                                "name": recipient,
-                                "contact": recipient,
-                                "reason": f"Exception: {str(e)}"
-                            })
-                            result["errors"].append(f"Error sending email to {recipient}: {e}")
-                            logger.error(f"Error sending email to {recipient}: {e}")
+                            failure_reason = f"Exception: {str(e)}"
+                        send_seconds = time.perf_counter() - send_started
+                        
+                        for n, address in enumerate(chunk):
+                            # Attachment bytes are base64 encoded (4/3), counted once per message
+                            delivery_log.record(address, 'email', 'failed' if failure_reason else 'success', failure_reason,
+                                                send_seconds, report_bytes * 4 // 3 if n == 0 else 0, contact=address)
+                            progress('failed' if failure_reason else 'sent', name=address, channel='email', reason=failure_reason)
+                        if failure_reason:
+                            result["errors"].append(f"Failed to send email to {recipient}: {failure_reason}")
+                            logger.error(f"Failed to send email to {recipient}: {failure_reason}")
+                        else:
+                            success_count += len(chunk)
+                            latency_stats.record('email_send', send_seconds)
+                            logger.info(f"Email sent successfully to {recipient}")
+                    
+                    result["fanout"]["channels"]["email"] = {
+                        "requested": requested_sends,
+                        "sent": len(to_chunks),
+                        "saved": requested_sends - len(to_chunks)
+                    }
                     
                     if success_count > 0:
                         result["notifications_sent"]["email"] = True
@@ -1643,11 +1554,19 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
                 )
                 
                 if isinstance(whatsapp_result, dict) and "delivery_stats" in whatsapp_result:
-                    # Update delivery stats from WhatsApp notifications
-                    result["delivery_stats"]["total_recipients"] += whatsapp_result["delivery_stats"]["total_recipients"]
-                    result["delivery_stats"]["successful_deliveries"] += whatsapp_result["delivery_stats"]["successful_deliveries"]
-                    result["delivery_stats"]["failed_deliveries"] += whatsapp_result["delivery_stats"]["failed_deliveries"]
-                    result["delivery_stats"]["failed_contacts"].extend(whatsapp_result["delivery_stats"]["failed_contacts"])
+                    sends_saved = whatsapp_result.get("sends_saved", 0)
+                    whatsapp_attempts = whatsapp_result["delivery_stats"]["successful_deliveries"] + whatsapp_result["delivery_stats"]["failed_deliveries"]
+                    result["fanout"]["channels"]["whatsapp"] = {
+                        "requested": whatsapp_attempts,
+                        "sent": whatsapp_attempts - sends_saved,
+                        "saved": sends_saved
+                    }
+                    # WhatsApp records join the email ones in this run's log
+                    if "delivery_log" in whatsapp_result:
+                        delivery_log.merge(whatsapp_result["delivery_log"])
+                    progress('sent', channel='whatsapp', count=whatsapp_result["delivery_stats"]["successful_deliveries"])
+                    for failed_contact in whatsapp_result["delivery_stats"]["failed_contacts"]:
+                        progress('failed', name=failed_contact.get('name'), channel='whatsapp', reason=failed_contact.get('reason'))
                     
                     if whatsapp_result["delivery_stats"]["successful_deliveries"] > 0:
                         result["notifications_sent"]["whatsapp"] = True
@@ -1686,6 +1605,10 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
                 logger.error(f"Error processing WhatsApp notifications: {e}")
                 result["errors"].append(f"Error processing WhatsApp notifications: {e}")
 
+        result["fanout"]["sends_saved"] = sum(c["saved"] for c in result["fanout"]["channels"].values())
+        result["delivery_stats"] = delivery_log.to_delivery_stats()
+        result["delivery_metrics"] = delivery_log.metrics()
+
         # Set final success status
         if result["generated_files"] > 0:
             result["success"] = True
@@ -1713,12 +1636,15 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
                 base_folder_id = "1cuL5gdl5GncegK2-FItKux7pg-D2sT--"
                 
                 logger.info(f"Uploading reactor report PDF to Google Drive (base folder: {base_folder_id})")
+                upload_started = time.perf_counter()
                 upload_success, file_id, folder_id, upload_error = upload_reactor_report_to_drive(
                     pdf_path=result["pdf_path"],
                     base_folder_id=base_folder_id,
                     input_date=input_date,
                     logger=logger
                 )
+                if upload_success:
+                    latency_stats.record('drive_upload', time.perf_counter() - upload_started)
                 
                 if upload_success:
                     logger.info(f"Successfully uploaded reactor report to Google Drive. File ID: {file_id}, Month Folder ID: {folder_id}")
@@ -1771,6 +1697,8 @@ def process_reactor_reports(sheet_id_mapping_data, sheet_recipients_data, table_
             except Exception as e:
                 logger.error(f"Error during document cleanup: {e}")
                 result["warnings"].append(f"Error during document cleanup: {e}")
+        
+        end_stage("notify")
             
     except Exception as e:
         logger.error(f"Critical error in process_reactor_reports: {e}")
@@ -1878,20 +1806,20 @@ def get_plant_material_data_from_sheets(plant_id, plant_data):
             return {}
         
         # Headers are on row 2 (index 1), data starts from row 3 (index 2)
-        headers = [header.strip() for header in all_data[1]]  # Row 2 contains headers
+        grid = SheetGrid(all_data, header_row=1)
+        headers = grid.headers
         logging.info(f"Found headers: {headers}")
         
         # Expected headers: Category, Sub Category, Specifications, Material Name, UOM, Initial\nQuantity
         expected_headers = ['Category', 'Sub Category', 'Specifications', 'Material Name', 'UOM', 'Initial\nQuantity']
         
-        # Find column indices for expected headers
+        # Find column indices for expected headers (first header containing the expected name)
         header_indices = {}
         for expected_header in expected_headers:
-            for i, header in enumerate(headers):
-                if expected_header.lower() in header.lower():
-                    header_indices[expected_header] = i
-                    logging.info(f"Found header '{expected_header}' at index {i} (actual: '{header}')")
-                    break
+            i = grid.column_index(expected_header, contains=True)
+            if i is not None:
+                header_indices[expected_header] = i
+                logging.info(f"Found header '{expected_header}' at index {i} (actual: '{headers[i]}')")
         
         logging.info(f"Header indices found: {header_indices}")
         logging.info(f"Looking for 'Initial\\nQuantity' header: {'Initial\\nQuantity' in header_indices}")
@@ -1912,7 +1840,7 @@ def get_plant_material_data_from_sheets(plant_id, plant_data):
         skipped_reasons = {}
         total_processed = 0
         
-        for row_index, row in enumerate(all_data[2:], start=3):  # Start from row 3 (index 2), but row_index starts from 3
+        for row_index, row in enumerate(grid.iter_rows(2), start=3):  # Start from row 3 (index 2), but row_index starts from 3
             total_processed += 1
             
             if len(row) < max(header_indices.values()) + 1:
@@ -2404,10 +2332,170 @@ def sync_plant_material_to_firebase(plant_id, plant_name, plant_data, sync_descr
             'message': f'Error syncing material data: {str(e)}'
         }
 
-def process_general_reports(template_files, attachment_files, file_sequence, sheet_id, sheet_name, send_whatsapp, send_email, mail_subject, use_template_as_caption, user_id, output_dir, logger, send_email_func, send_whatsapp_message, validate_sheet_id_func, prepare_file_paths_func, fetch_google_sheet_data_func, process_template_func, send_log_report_to_user_func):
+def build_report_sequences(file_sequence, use_template_as_caption, logger):
+    """
+    Build the WhatsApp send sequence and the email message items for a general report.
+    Neither depends on the recipient, so they are built once per run.
+
+    Returns:
+        tuple: (whatsapp_file_sequence, message_items)
+    """
+    if use_template_as_caption:
+        # Caption mode: Remove message items (first template will be used as caption)
+        whatsapp_file_sequence = [
+            item for item in file_sequence 
+            if item.get('file_type') == 'file'
+        ] if file_sequence else []
+        logger.info(f"Caption mode: Using template as caption, {len(whatsapp_file_sequence)} files in sequence")
+    else:
+        # Normal mode: Keep ALL message items and file items
+        # Each template will be sent as a SEPARATE message in sequence
+        whatsapp_file_sequence = file_sequence if file_sequence else []
+        logger.info(f"Normal mode: {len(whatsapp_file_sequence)} items in sequence")
+    
+    # Re-number the sequence to be continuous
+    for idx, item in enumerate(whatsapp_file_sequence, start=1):
+        item['sequence_no'] = idx
+    
+    # Find all message-type items in file_sequence (sorted by sequence_no) for the email body
+    message_items = sorted(
+        [item for item in file_sequence if item.get('file_type') == 'message'],
+        key=lambda x: x.get('sequence_no', 0)
+    ) if file_sequence else []
+    return whatsapp_file_sequence, message_items
+
+
+def render_report_payload(data_dict, templates, compiled_subject, message_items, channels, use_template_as_caption, logger, contacts=None):
+    """
+    Render one recipient's general report payload for ChannelDispatcher.
+
+    Args:
+        data_dict: The recipient's sheet row keyed by header
+        templates: List of dicts with 'filename' and 'compiled' (CompiledTemplate)
+        compiled_subject: CompiledTemplate for the mail subject
+        message_items: Message items of the file sequence, in order (see build_report_sequences)
+        channels: Channel names to send on
+        contacts: Normalized contact fields from contact_validation (derived from data_dict if omitted)
+    """
+    recipient_name = data_dict.get('Name', 'unknown')
+    
+    # Process each template for this recipient
+    recipient_template_contents = {}  # Map filename -> processed content
+    for template_info in templates:
+        try:
+            # Fill placeholders for this recipient in one pass
+            recipient_template_contents[template_info['filename']] = template_info['compiled'].render(data_dict)
+        except Exception as e:
+            logger.error(f"Error processing template {template_info['filename']} for {recipient_name}: {e}")
+            continue
+    
+    # For WhatsApp: Templates will be sent separately in sequence
+    # For Email: Combine all templates into one email body
+    if message_items:
+        combined_messages = []
+        for message_item in message_items:
+            message_filename = message_item.get('file_name')
+            if message_filename in recipient_template_contents:
+                combined_messages.append(recipient_template_contents[message_filename])
+            else:
+                logger.warning(f"Template '{message_filename}' not found for {recipient_name}")
+        # Join all templates with double newline separator for email
+        email_content = "\n\n".join(combined_messages) if combined_messages else ""
+    else:
+        # No message items in sequence, use first template
+        email_content = list(recipient_template_contents.values())[0] if recipient_template_contents else ""
+    
+    # Contact details normalized by the validation pre-pass
+    if contacts is None:
+        contacts = recipient_contacts(list(data_dict.keys()), list(data_dict.values()))
+    
+    return {
+        'name': recipient_name,
+        'contact': contacts['recipient_phone'] or contacts['phone_no'] or contacts['country_code'] or contacts['email_to'] or '',
+        'channels': list(channels),
+        **contacts,
+        'subject': compiled_subject.render(data_dict),
+        'email_content': email_content,
+        'template_contents': recipient_template_contents,
+        # Caption mode uses the first template as caption message
+        'caption_message': (list(recipient_template_contents.values())[0] if recipient_template_contents else "") if use_template_as_caption else ""
+    }
+
+
+def build_report_senders(attachment_paths, whatsapp_file_sequence, use_template_as_caption, user_id, send_email_func, send_whatsapp_message, logger):
+    """Channel senders for general report payloads (see ChannelDispatcher.dispatch)"""
+    return {
+        'whatsapp': lambda p: handle_whatsapp_validation_and_sending_v2(
+            p['name'], p['country_code'], p['phone_no'], p['recipient_phone'],
+            p['template_contents'], attachment_paths, whatsapp_file_sequence,
+            use_template_as_caption, p['caption_message'], send_whatsapp_message, logger
+        ),
+        # Merged fan-out messages (see fanout.FanoutPlan) go to the sender with the rows' addresses in BCC
+        'email': lambda p: handle_email_sending(
+            p['name'], user_id if p.get('email_undisclosed') else p['email_to'], p['email_cc'], p['email_bcc'],
+            p['subject'], p['email_content'], attachment_paths,
+            user_id, send_email_func, logger
+        )
+    }
+
+
+def report_attachment_sizes(attachment_paths, whatsapp_file_sequence):
+    """
+    Sizes of a general report's attachments.
+
+    Returns:
+        tuple: ({attachment name: bytes}, bytes attached to each email, bytes of the files in each WhatsApp sequence)
+    """
+    attachment_sizes = {
+        attachment_name(a): (a.size if isinstance(a, UploadBuffer) else os.path.getsize(a))
+        for a in attachment_paths
+    }
+    # WhatsApp sends each item of the file sequence as its own message
+    sequence_files = [item.get('file_name') for item in whatsapp_file_sequence if item.get('file_type') == 'file']
+    return attachment_sizes, sum(attachment_sizes.values()), sum(attachment_sizes.get(name, 0) for name in sequence_files)
+
+
+def plan_general_report(recipient_table, template_data, attachment_paths, whatsapp_file_sequence):
+    """Dry-run plan for a general report after its sheet has been read and validated"""
+    email_count = sum(1 for r in recipient_table.recipients if 'email' in r['channels'])
+    whatsapp_count = sum(1 for r in recipient_table.recipients if 'whatsapp' in r['channels'])
+    attachment_sizes, attachment_bytes, whatsapp_file_bytes = report_attachment_sizes(attachment_paths, whatsapp_file_sequence)
+    body_bytes = sum(len(t['raw_content'].encode('utf-8')) for t in template_data)
+
+    email_config = DISPATCH_CHANNELS.get('email', {})
+    whatsapp_config = DISPATCH_CHANNELS.get('whatsapp', {})
+    steps = {
+        'email': latency_stats.plan_step('email_send', email_count,
+                                         email_config.get('workers', 1), email_config.get('rate_per_second')),
+        'whatsapp': latency_stats.plan_step('whatsapp_send', whatsapp_count,
+                                            whatsapp_config.get('workers', 1), whatsapp_config.get('rate_per_second'))
+    }
+    return summarize_plan(
+        steps,
+        # Email and WhatsApp are dispatched by separate worker pools at the same time
+        parallel_groups=[('email', 'whatsapp')],
+        # Email attachments are base64 encoded (4/3)
+        estimated_bytes=email_count * (attachment_bytes * 4 / 3 + body_bytes) + whatsapp_count * (whatsapp_file_bytes + body_bytes),
+        recipients=len(recipient_table.recipients),
+        rejected_rows=len(recipient_table.rejected),
+        messages={
+            'email': email_count,
+            'whatsapp': whatsapp_count * max(1, len(whatsapp_file_sequence))
+        },
+        attachments=len(attachment_sizes),
+        attachment_bytes=attachment_bytes,
+        drive_uploads=0
+    )
+
+
+def process_general_reports(template_files, attachment_files, file_sequence, sheet_id, sheet_name, send_whatsapp, send_email, mail_subject, use_template_as_caption, user_id, output_dir, logger, send_email_func, send_whatsapp_message, validate_sheet_id_func, prepare_file_paths_func, fetch_google_sheet_data_func, process_template_func, send_log_report_to_user_func, progress=None, run_id=None, dry_run=False):
     """
     Process general reports using reactor report template logic with table and column processing
     This function moves the heavy functionality from app.py to process_utils.py
+
+    progress: Optional callable(event, **data) receiving per-recipient 'rendered', 'sent' and 'failed' events
+    run_id: When given and some recipients fail, the run is stored under this id for retry_general_report_run
+    dry_run: Stop after the sheet read and validation and return result["plan"] instead of sending
     """
     try:
         # Initialize result tracking
@@ -2454,12 +2542,8 @@ def process_general_reports(template_files, attachment_files, file_sequence, she
             result["errors"].append("Invalid Google Sheet ID format")
             return result
 
-        # Get user-specific temporary directory for attachments
-        from .temp_manager import get_user_temp_dir
-        temp_dir = get_user_temp_dir(user_id, output_dir)
-        
-        # Save attachment files temporarily and store their paths
-        attachment_paths = prepare_file_paths_func(attachment_files, user_email=user_id, base_output_dir=output_dir, is_upload=True)
+        # Hold attachments in memory (large ones are spooled to the user temp dir); senders take paths or buffers
+        attachment_paths = prepare_file_paths_func(attachment_files, user_email=user_id, base_output_dir=output_dir, is_upload=True, in_memory=True)
 
         try:
             # Fetch data from Google Sheet
@@ -2475,25 +2559,11 @@ def process_general_reports(template_files, attachment_files, file_sequence, she
         # Process headers and data
         headers = sheet_data[0]
         data_rows = sheet_data[1:]
-
-        # Create output directory if it doesn't exist
-        reports_output_dir = os.path.join(output_dir, "reports")
-        os.makedirs(reports_output_dir, exist_ok=True)
-
-        # Initialize delivery statistics tracking
-        delivery_stats = {
-            "total_recipients": len(data_rows),
-            "successful_deliveries": 0,
-            "failed_deliveries": 0,
-            "failed_contacts": [],
-            "channel_logs": {
-                "email": [],
-                "whatsapp": []
-            }
-        }
+        progress = progress or (lambda event, **data: None)
+        progress('stage', stage='fetched', recipients=len(data_rows))
 
         # STEP 1: Pre-process all template files and extract their content
-        template_data = []  # List to store template info: {filename, temp_path, content}
+        template_data = []  # List to store template info: {filename, raw_content, compiled}
         
         for template_file in template_files:
             if not template_file.filename.endswith('.docx'):
@@ -2501,19 +2571,18 @@ def process_general_reports(template_files, attachment_files, file_sequence, she
                 continue
 
             try:
-                # Save template temporarily
-                temp_template_path = os.path.join(reports_output_dir, "temp_{}".format(template_file.filename))
-                template_file.save(temp_template_path)
-
-                # Read template content for messages
-                from docx import Document
-                doc = Document(temp_template_path)
-                template_content = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+                # Parsed once per distinct upload; the same bytes sent again are a cache hit
+                template_entry = template_store.get_upload(template_file)
+                compiled_template = template_entry.compiled
+                unknown_warning = describe_unknown_placeholders(f"Template {template_file.filename}", compiled_template, headers)
+                if unknown_warning:
+                    logger.warning(unknown_warning)
+                    result["warnings"].append(unknown_warning)
                 
                 template_data.append({
                     'filename': template_file.filename,
-                    'temp_path': temp_template_path,
-                    'raw_content': template_content
+                    'raw_content': template_entry.text,
+                    'compiled': compiled_template
                 })
                 
                 logger.info(f"Pre-processed template: {template_file.filename}")
@@ -2529,169 +2598,111 @@ def process_general_reports(template_files, attachment_files, file_sequence, she
         
         logger.info(f"Pre-processed {len(template_data)} template files")
         
-        # STEP 2: Process each recipient with ALL templates in file_sequence order
+        compiled_subject = compile_template(mail_subject or '')
+        unknown_warning = describe_unknown_placeholders("Mail subject", compiled_subject, headers)
+        if unknown_warning:
+            logger.warning(unknown_warning)
+            result["warnings"].append(unknown_warning)
+        
+        # STEP 2: Render every recipient's payload up front (templates in file_sequence order)
         generated_files = []
+        whatsapp_file_sequence, message_items = build_report_sequences(file_sequence, use_template_as_caption, logger)
         
-        for row in data_rows:
+        channels = []
+        if send_whatsapp:
+            channels.append('whatsapp')
+        if send_email:
+            channels.append('email')
+        
+        # Validate every contact column up front; rows with no usable channel are never rendered
+        recipient_table = validate_recipients(headers, data_rows, channels)
+        result["validation"] = recipient_table.report()
+        for rejected in recipient_table.rejected:
+            logger.warning(f"Row {rejected['row_number']} ({rejected['name']}) rejected: {'; '.join(rejected['reasons'])}")
+        
+        if dry_run:
+            result["plan"] = plan_general_report(recipient_table, template_data, attachment_paths, whatsapp_file_sequence)
+            for attachment in attachment_paths:
+                if isinstance(attachment, UploadBuffer):
+                    attachment.discard()
+            result["success"] = True
+            result["message"] = "Dry run: nothing was sent"
+            return result
+        
+        payloads = []
+        precheck_statuses = []
+        for recipient in recipient_table.recipients:
             try:
-                # Create data dictionary from headers and row
-                data_dict = dict(zip(headers, row))
-                recipient_name = data_dict.get('Name', 'unknown')
-                
-                logger.info(f"Processing recipient: {recipient_name}")
-                
-                # STEP 2a: Process each template for this recipient
-                recipient_template_contents = {}  # Map filename -> processed content
-                
-                for template_info in template_data:
-                    try:
-                        # Replace placeholders in template content for this recipient
-                        processed_content = template_info['raw_content']
-                        
-                        for key, value in data_dict.items():
-                            placeholder = "{{{}}}".format(key)
-                            processed_content = processed_content.replace(placeholder, str(value))
-                        
-                        recipient_template_contents[template_info['filename']] = processed_content
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing template {template_info['filename']} for {recipient_name}: {e}")
-                        continue
-                
-                # STEP 2b: Prepare message content for Email (combine all templates)
-                # For WhatsApp: Templates will be sent separately in sequence
-                # For Email: Combine all templates into one email body
-                email_content = ""
-                
-                if file_sequence and len(file_sequence) > 0:
-                    # Find all message-type items in file_sequence (sorted by sequence_no)
-                    message_items = sorted(
-                        [item for item in file_sequence if item.get('file_type') == 'message'],
-                        key=lambda x: x.get('sequence_no', 0)
-                    )
-                    
-                    if message_items:
-                        # Combine all templates in sequence order for EMAIL
-                        combined_messages = []
-                        
-                        for message_item in message_items:
-                            message_filename = message_item.get('file_name')
-                            
-                            if message_filename in recipient_template_contents:
-                                combined_messages.append(recipient_template_contents[message_filename])
-                                logger.info(f"Added template '{message_filename}' for {recipient_name}")
-                            else:
-                                logger.warning(f"Template '{message_filename}' not found for {recipient_name}")
-                        
-                        # Join all templates with double newline separator for email
-                        email_content = "\n\n".join(combined_messages) if combined_messages else ""
-                        
-                        logger.info(f"Prepared {len(combined_messages)} template(s) for {recipient_name}")
-                    else:
-                        # No message items in sequence, use first template
-                        email_content = list(recipient_template_contents.values())[0] if recipient_template_contents else ""
-                else:
-                    # No file_sequence provided, use first template
-                    email_content = list(recipient_template_contents.values())[0] if recipient_template_contents else ""
-                
-                # Replace placeholders in mail subject
-                processed_mail_subject = mail_subject
-                for key, value in data_dict.items():
-                    placeholder = "{{{}}}".format(key)
-                    processed_mail_subject = processed_mail_subject.replace(placeholder, str(value))
-
-                # STEP 2c: Get contact details from Google Sheet data
-                recipient_email = data_dict.get('Email ID - To')
-                cc_email = data_dict.get('Email ID - CC', '')
-                bcc_email = data_dict.get('Email ID - BCC', '')
-                
-                # Helper to split emails by comma or newline and join as comma-separated string
-                def clean_emails(email_str):
-                    if not email_str:
-                        return None
-                    import re
-                    emails = [e.strip() for e in re.split(r'[\n,]+', email_str) if e.strip()]
-                    return ','.join(emails) if emails else None
-                
-                recipient_email = clean_emails(recipient_email)
-                cc_email = clean_emails(cc_email)
-                bcc_email = clean_emails(bcc_email)
+                render_started = datetime.now()
+                payload = render_report_payload(
+                    recipient['data'], template_data, compiled_subject, message_items,
+                    recipient['channels'], use_template_as_caption, logger, contacts=recipient['contacts']
+                )
+                payload['row_index'] = recipient['row_index']
+                payloads.append(payload)
+                precheck_statuses.append(recipient['channel_errors'])
+                progress('rendered', name=payload['name'], seconds=round((datetime.now() - render_started).total_seconds(), 3))
                 
-                country_code = data_dict.get('Country Code', '').strip()
-                phone_no = data_dict.get('Contact No.', '').strip()
-                # Format phone number properly: remove spaces and combine country code + number
-                recipient_phone = f"{country_code}{phone_no}".replace(' ', '')
-
-                # STEP 2d: Handle WhatsApp notifications with validation and file sequencing
-                if send_whatsapp:
-                    # For WhatsApp: Handle file_sequence based on caption mode
-                    whatsapp_file_sequence = []
-                    
-                    if use_template_as_caption:
-                        # Caption mode: Remove message items (first template will be used as caption)
-                        whatsapp_file_sequence = [
-                            item for item in file_sequence 
-                            if item.get('file_type') == 'file'
-                        ] if file_sequence else []
-                        
-                        # Use first template as caption message
-                        caption_message = list(recipient_template_contents.values())[0] if recipient_template_contents else ""
-                        
-                        logger.info(f"Caption mode: Using template as caption, {len(whatsapp_file_sequence)} files in sequence")
-                    else:
-                        # Normal mode: Keep ALL message items and file items
-                        # Each template will be sent as a SEPARATE message in sequence
-                        whatsapp_file_sequence = file_sequence if file_sequence else []
-                        caption_message = ""  # Not used in normal mode
-                        
-                        logger.info(f"Normal mode: {len(whatsapp_file_sequence)} items in sequence")
-                    
-                    # Re-number the sequence to be continuous
-                    for idx, item in enumerate(whatsapp_file_sequence, start=1):
-                        item['sequence_no'] = idx
-                    
-                    logger.info(f"WhatsApp file sequence for {recipient_name}: {whatsapp_file_sequence}")
-                    
-                    # Pass recipient_template_contents so each message item can get its content
-                    success, failure_reason = handle_whatsapp_validation_and_sending_v2(
-                        recipient_name, country_code, phone_no, recipient_phone,
-                        recipient_template_contents, attachment_paths, whatsapp_file_sequence,
-                        use_template_as_caption, caption_message, send_whatsapp_message, logger
-                    )
-                    
-                    if not success:
-                        delivery_stats["failed_deliveries"] += 1
-                        delivery_stats["failed_contacts"].append({
-                            "name": recipient_name,
-                            "contact": recipient_phone if recipient_phone else (phone_no if phone_no else country_code),
-                            "reason": failure_reason
-                        })
-                    else:
-                        delivery_stats["successful_deliveries"] += 1
-
-                # STEP 2e: Handle email notifications with all attachments
-                if send_email:
-                    success, failure_reason = handle_email_sending(
-                        recipient_name, recipient_email, cc_email, bcc_email,
-                        processed_mail_subject, email_content, attachment_paths,
-                        user_id, send_email_func, logger
-                    )
-                    
-                    if not success:
-                        logger.warning(f"Email sending failed for {recipient_name}: {failure_reason}")
-
             except Exception as e:
-                logger.error("Error processing row for recipient {}: {}".format(recipient_name if 'recipient_name' in locals() else 'unknown', e))
+                logger.error("Error processing row {} for recipient: {}".format(recipient['row_index'] + 2, e))
                 continue
         
-        # STEP 3: Clean up temporary template files
-        for template_info in template_data:
-            try:
-                os.remove(template_info['temp_path'])
-                logger.info(f"Cleaned up temporary template: {template_info['filename']}")
-            except Exception as e:
-                logger.error("Error removing temporary template {}: {}".format(template_info['filename'], e))
-
+        # Rejected rows are reported as failed deliveries without being rendered or sent
+        for rejected in recipient_table.rejected:
+            if rejected['reasons'] == ["Empty row"]:
+                continue
+            payloads.append({'name': rejected['name'], 'contact': '', 'channels': [], 'row_index': rejected['row_index']})
+            precheck_statuses.append(dict(zip(channels, rejected['reasons'])))
+        
+        logger.info(f"Rendered payloads for {len(recipient_table.recipients)} of {len(data_rows)} rows, {len(recipient_table.rejected)} rejected by validation")
+        
+        # STEP 2d: Send through the per-channel worker pools (WhatsApp keeps each recipient's
+        # file sequence in order inside one task)
+        senders = build_report_senders(
+            attachment_paths, whatsapp_file_sequence, use_template_as_caption,
+            user_id, send_email_func, send_whatsapp_message, logger
+        )
+        def on_result(payload, channel, success, reason, seconds):
+            progress('sent' if success else 'failed', name=payload['name'], channel=channel, reason=reason, seconds=seconds)
+        
+        # Validation failures go into the log first, as 'invalid' records that retries skip
+        delivery_log = DeliveryLog()
+        for payload, channel_errors in zip(payloads, precheck_statuses):
+            recipient_id = delivery_log.recipient_id(payload['name'], payload.get('contact', ''), payload['row_index'])
+            for channel, reason in channel_errors.items():
+                delivery_log.append(recipient_id, channel, 'invalid', reason)
+        _, email_attachment_bytes, whatsapp_file_bytes = report_attachment_sizes(attachment_paths, whatsapp_file_sequence)
+        
+        progress('stage', stage='sending', recipients=len(payloads))
+        # Rows with the same rendered email share one message; repeated WhatsApp sends go out once
+        _, result["fanout"] = ChannelDispatcher(logger=logger).dispatch_deduplicated(
+            payloads, senders, on_result=on_result, log=delivery_log,
+            # Email attachments are base64 encoded (4/3)
+            sizes={'email': email_attachment_bytes * 4 // 3, 'whatsapp': whatsapp_file_bytes}
+        )
+        empty_rows = sum(1 for rejected in recipient_table.rejected if rejected['reasons'] == ["Empty row"])
+        delivery_stats = delivery_log.to_delivery_stats(total_recipients=len(data_rows) - empty_rows)
+        result["delivery_metrics"] = delivery_log.metrics()
+        
+        # Keep what a retry needs (failed rows, parsed templates, attachments) before the temp dir goes away
+        if run_id and delivery_stats["failed_contacts"]:
+            failed_rows = {str(c['row_index']): data_rows[c['row_index']] for c in delivery_stats["failed_contacts"]}
+            if report_run_store.save(run_id, user_id, {
+                'sheet_id': sheet_id,
+                'sheet_name': sheet_name,
+                'headers': headers,
+                'rows': failed_rows,
+                'templates': [{'filename': t['filename'], 'content': t['raw_content']} for t in template_data],
+                'mail_subject': mail_subject or '',
+                'whatsapp_file_sequence': whatsapp_file_sequence,
+                'message_items': message_items,
+                'use_template_as_caption': use_template_as_caption,
+                'send_email': send_email,
+                'send_whatsapp': send_whatsapp,
+                'delivery_stats': delivery_stats
+            }, attachment_paths):
+                result["run_id"] = run_id
+        
         # Clean up user-specific temporary directory
         from .temp_manager import cleanup_user_temp_dir
         cleanup_user_temp_dir(user_id, output_dir)
@@ -2720,6 +2731,105 @@ def process_general_reports(template_files, attachment_files, file_sequence, she
             "errors": [str(e)]
         }
 
+def retry_general_report_run(run, user_id, logger, send_email_func, send_whatsapp_message, send_log_report_to_user_func=None, progress=None):
+    """
+    Re-send a stored general report run to its failed recipients only.
+
+    Each failed contact is re-rendered from the stored sheet row and templates (no sheet fetch or
+    template parsing) and re-sent on the channels that failed for it. The results are merged into
+    the run's delivery_stats, which is saved back so the run can be retried again.
+
+    Args:
+        run: Record from report_run_store.load()
+    """
+    try:
+        result = {
+            "success": False,
+            "message": "",
+            "retried_recipients": 0,
+            "delivery_stats": run.get('delivery_stats', {}),
+            "errors": [],
+            "warnings": []
+        }
+        progress = progress or (lambda event, **data: None)
+        delivery_stats = run.get('delivery_stats', {})
+        rows = run.get('rows', {})
+        headers = run.get('headers', [])
+
+        retry_contacts = []
+        for contact in delivery_stats.get('failed_contacts', []):
+            if str(contact.get('row_index')) not in rows:
+                result["warnings"].append(f"No stored row for {contact.get('name', 'unknown')}; skipped")
+                continue
+            # Failures found by contact validation would fail again; the sheet has to be fixed first
+            failed_channels = [channel for channel, status in (contact.get('channel_status') or {}).items()
+                               if status.get('status') == 'failed' and not status.get('invalid')]
+            if failed_channels:
+                retry_contacts.append((contact, failed_channels))
+
+        if not retry_contacts:
+            result["success"] = True
+            result["message"] = "No failed recipients to retry"
+            return result
+
+        templates = [{'filename': t['filename'], 'compiled': compile_template(t['content'])} for t in run.get('templates', [])]
+        compiled_subject = compile_template(run.get('mail_subject', ''))
+        use_template_as_caption = run.get('use_template_as_caption', False)
+
+        payloads = []
+        retried = []
+        for contact, failed_channels in retry_contacts:
+            try:
+                row = rows[str(contact['row_index'])]
+                payload = render_report_payload(
+                    dict(zip(headers, row)), templates, compiled_subject, run.get('message_items', []),
+                    failed_channels, use_template_as_caption, logger
+                )
+                payload['row_index'] = contact['row_index']
+                payloads.append(payload)
+                retried.append(contact)
+                progress('rendered', name=payload['name'])
+            except Exception as e:
+                logger.error(f"Error re-rendering report for {contact.get('name', 'unknown')}: {e}")
+                result["warnings"].append(f"Could not re-render report for {contact.get('name', 'unknown')}")
+
+        senders = build_report_senders(
+            run.get('attachment_paths', []), run.get('whatsapp_file_sequence', []), use_template_as_caption,
+            user_id, send_email_func, send_whatsapp_message, logger
+        )
+        def on_result(payload, channel, success, reason, seconds):
+            progress('sent' if success else 'failed', name=payload['name'], channel=channel, reason=reason, seconds=seconds)
+
+        progress('stage', stage='sending', recipients=len(payloads))
+        logger.info(f"Retrying report run {run['id']} for {len(payloads)} failed recipient(s)")
+        delivery_log = DeliveryLog()
+        statuses, result["fanout"] = ChannelDispatcher(logger=logger).dispatch_deduplicated(payloads, senders, on_result=on_result, log=delivery_log)
+        result["delivery_metrics"] = delivery_log.metrics()
+        merged_stats = merge_retry_stats(delivery_stats, retried, payloads, statuses)
+
+        report_run_store.update(run['id'], delivery_stats=merged_stats, attempts=run.get('attempts', 1) + 1)
+
+        result["delivery_stats"] = merged_stats
+        result["retried_recipients"] = len(payloads)
+        result["success"] = True
+        result["message"] = f"Retried {len(payloads)} failed recipient(s), {len(merged_stats['failed_contacts'])} still failing"
+
+        if send_log_report_to_user_func:
+            try:
+                send_log_report_to_user_func(user_id, merged_stats, run.get('send_email', False), run.get('send_whatsapp', False), logger)
+            except Exception as e:
+                logger.error("Error sending log report to user: {}".format(e))
+
+        return result
+
+    except Exception as e:
+        logger.error("Error in retry_general_report_run: {}".format(e))
+        return {
+            "success": False,
+            "message": str(e),
+            "errors": [str(e)]
+        }
+
 def process_template_with_reactor_logic(template_path, output_path, data_dict, logger):
     """
     Process template using reactor report table and column logic
@@ -2746,10 +2856,10 @@ def process_template_with_reactor_logic(template_path, output_path, data_dict, l
         
         # Replace placeholders in the document using reactor report logic
         for paragraph in doc.paragraphs:
-            for key, value in data_dict.items():
-                placeholder = "{{{}}}".format(key)
-                if placeholder in paragraph.text:
-                    paragraph.text = paragraph.text.replace(placeholder, str(value))
+            if '{' in paragraph.text:
+                rendered = render_template(paragraph.text, data_dict)
+                if rendered != paragraph.text:
+                    paragraph.text = rendered
         
         # Process tables with reactor report formatting logic
         for table in doc.tables:
@@ -2759,10 +2869,10 @@ def process_template_with_reactor_logic(template_path, output_path, data_dict, l
             # Replace placeholders in table cells
             for row in table.rows:
                 for cell in row.cells:
-                    for key, value in data_dict.items():
-                        placeholder = "{{{}}}".format(key)
-                        if placeholder in cell.text:
-                            cell.text = cell.text.replace(placeholder, str(value))
+                    if '{' in cell.text:
+                        rendered = render_template(cell.text, data_dict)
+                        if rendered != cell.text:
+                            cell.text = rendered
         
         # Add data as tables using reactor report logic
         add_data_as_reactor_tables(doc, data_dict, logger)
@@ -2800,46 +2910,9 @@ def add_data_as_reactor_tables(doc, data_dict, logger):
         data_items = [(key, value) for key, value in data_dict.items() if value]
         
         if data_items:
-            # Create table with headers
-            table = doc.add_table(rows=len(data_items) + 1, cols=2)
-            table.alignment = WD_TABLE_ALIGNMENT.CENTER
-            
-            # Set table width
-            table.allow_autofit = False
-            table.autofit = False
-            
-            # Add header row
-            header_row = table.rows[0]
-            header_cells = header_row.cells
-            header_cells[0].text = "Field"
-            header_cells[1].text = "Value"
-            
-            # Format header cells
-            for cell in header_cells:
-                cell.vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-                for paragraph in cell.paragraphs:
-                    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    for run in paragraph.runs:
-                        run.bold = True
-                        run.font.size = Pt(10)
-            
-            # Add data rows
-            for i, (key, value) in enumerate(data_items, 1):
-                row = table.rows[i]
-                cells = row.cells
-                cells[0].text = str(key)
-                cells[1].text = str(value)
-                
-                # Format data cells
-                for cell in cells:
-                    cell.vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-                    for paragraph in cell.paragraphs:
-                        paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        for run in paragraph.runs:
-                            run.font.size = Pt(9)
-            
-            # Apply professional table formatting using shared function
-            format_table_professional(table, is_header=True, logger=logger)
+            # Create the Field/Value table with reactor report (professional) styling
+            rows = [["Field", "Value"]] + [[str(key), str(value)] for key, value in data_items]
+            add_table_from_rows(doc, rows, preset='professional')
             
             logger.info(f"Added data table with {len(data_items)} fields to document")
         
@@ -2976,7 +3049,7 @@ def handle_whatsapp_validation_and_sending_v2(recipient_name, country_code, phon
                     
                     # Find the file path in attachment_paths
                     import os
-                    file_path = next((path for path in attachment_paths if os.path.basename(path) == file_name), None)
+                    file_path = next((path for path in attachment_paths if attachment_name(path) == file_name), None)
                     
                     if not file_path:
                         logger.warning(f"File '{file_name}' not found in attachment_paths for sequence {sequence_no}")
@@ -3049,26 +3122,8 @@ def handle_email_sending(recipient_name, recipient_email, cc_email, bcc_email, m
             bcc=bcc_email
         )
         
-        if success == "TOKEN_EXPIRED":
-            return False, "Email token expired"
-        elif success == "USER_NOT_LOGGED_IN":
-            return False, "User session expired"
-        elif success == "NO_GMAIL_ACCESS":
-            return False, "Gmail access not configured for this user"
-        elif success == "NO_GOOGLE_ACCESS_TOKEN":
-            return False, "No Google access token found"
-        elif success == "INVALID_RECIPIENT":
-            return False, "Invalid recipient email address"
-        elif success == "GMAIL_AUTH_FAILED":
-            return False, "Gmail authentication failed"
-        elif success == "GMAIL_PERMISSION_DENIED":
-            return False, "Gmail permission denied"
-        elif success == "GMAIL_API_ERROR":
-            return False, "Gmail API error"
-        elif success == "GMAIL_SEND_ERROR":
-            return False, "Failed to send email"
-        elif not success:
-            return False, "Failed to send email"
+        if success is not True:
+            return False, email_failure_reason(success)
         else:
             logger.info("Email sent successfully to {}".format(recipient_email))
             return True, None
@@ -3079,9 +3134,10 @@ def handle_email_sending(recipient_name, recipient_email, cc_email, bcc_email, m
 
 def generate_log_report_pdf(delivery_stats, output_dir, logger):
     """
-    Generate a PDF log report from delivery statistics
+    Generate a PDF log report from delivery statistics (a delivery_stats dict or a DeliveryLog)
     """
     try:
+        delivery_stats = as_delivery_stats(delivery_stats)
         from docx import Document
         from docx.shared import Inches, Pt
         from docx.enum.text import WD_ALIGN_PARAGRAPH
@@ -3114,20 +3170,7 @@ def generate_log_report_pdf(delivery_stats, output_dir, logger):
         # Add summary section
         summary_heading = doc.add_heading('📋 Summary', level=1)
         
-        # Create summary table
-        summary_table = doc.add_table(rows=4, cols=2)
-        summary_table.style = 'Table Grid'
-        summary_table.alignment = WD_TABLE_ALIGNMENT.CENTER
-        
-        # Set column widths
-        for row in summary_table.rows:
-            for i, cell in enumerate(row.cells):
-                if i == 0:
-                    cell.width = Inches(3)
-                else:
-                    cell.width = Inches(1.5)
-        
-        # Add summary data
+        # Summary data
         summary_data = [
             ("📋 Total messages to be delivered:", str(total_recipients)),
             ("✅ Messages delivered successfully:", str(successful_deliveries)),
@@ -3135,17 +3178,8 @@ def generate_log_report_pdf(delivery_stats, output_dir, logger):
             ("📊 Success Rate:", f"{(successful_deliveries/total_recipients*100):.1f}%" if total_recipients > 0 else "0%")
         ]
         
-        for i, (label, value) in enumerate(summary_data):
-            row = summary_table.rows[i]
-            row.cells[0].text = label
-            row.cells[1].text = value
-            
-            # Format the cells
-            for cell in row.cells:
-                for paragraph in cell.paragraphs:
-                    paragraph.alignment = WD_ALIGN_PARAGRAPH.LEFT
-                    for run in paragraph.runs:
-                        run.font.size = Pt(11)
+        # Create summary table ('Table Grid' style, left-aligned 11pt text)
+        add_table_from_rows(doc, summary_data, preset='grid', header=False, column_widths=[3, 1.5])
         
         # Add spacing
         doc.add_paragraph()
@@ -3154,36 +3188,12 @@ def generate_log_report_pdf(delivery_stats, output_dir, logger):
         if failed_contacts:
             failed_heading = doc.add_heading('📋 Failed Contacts', level=1)
             
-            # Create failed contacts table
-            failed_table = doc.add_table(rows=1, cols=3)
-            failed_table.style = 'Table Grid'
-            failed_table.alignment = WD_TABLE_ALIGNMENT.CENTER
-            
-            # Set column widths
-            for row in failed_table.rows:
-                for i, cell in enumerate(row.cells):
-                    if i == 0:
-                        cell.width = Inches(2)
-                    elif i == 1:
-                        cell.width = Inches(2)
-                    else:
-                        cell.width = Inches(3)
-            
-            # Add header row
-            header_row = failed_table.rows[0]
-            header_row.cells[0].text = "Name"
-            header_row.cells[1].text = "Contact Number"
-            header_row.cells[2].text = "Reason"
-            
-            # Add data rows
-            for contact in failed_contacts:
-                row = failed_table.add_row()
-                row.cells[0].text = contact.get("name", "Unknown")
-                row.cells[1].text = contact.get("contact", "N/A")
-                row.cells[2].text = contact.get("reason", "Unknown error")
-            
-            # Apply simple table formatting for log report
-            format_table_simple(failed_table, is_header=True, logger=logger)
+            # Create failed contacts table with simple log report formatting
+            failed_rows = [["Name", "Contact Number", "Reason"]] + [
+                [contact.get("name", "Unknown"), contact.get("contact", "N/A"), contact.get("reason", "Unknown error")]
+                for contact in failed_contacts
+            ]
+            add_table_from_rows(doc, failed_rows, preset='simple', column_widths=[2, 2, 3])
         
         # Add footer
         doc.add_paragraph()
@@ -3426,110 +3436,29 @@ def process_order_notification(order_id, order_data, recipients, method, factory
             run.font.size = Pt(12)
         
         if order_items:
-            # Create table with headers
-            items_table = doc.add_table(rows=1, cols=9)
-            items_table.alignment = WD_TABLE_ALIGNMENT.CENTER
-            items_table.autofit = True
-            items_table.allow_autofit = True
-            
-            # Add header row
-            header_cells = items_table.rows[0].cells
+            # Build the items table in one pass: professional styling, SN/Quantity/UOM and
+            # '-' placeholders centered, other columns left-aligned, wider Particulars column
             headers = ['SN', 'Category', 'Sub Category', 'Material Name', 'Particulars', 'Quantity', 'UOM', 'Preferred Vendor', 'Place']
-            # Headers: always centered
-            center_aligned_cols = [0, 5, 6]  # SN, Quantity, UOM (used later for data rows)
-            for i, header_text in enumerate(headers):
-                header_cells[i].text = header_text
-                header_cells[i].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-                for paragraph in header_cells[i].paragraphs:
-                    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    paragraph.paragraph_format.keep_together = True
-                    for run in paragraph.runs:
-                        run.bold = True
-                        run.font.size = Pt(8.5)
-            
-            # Add data rows
-            # Column indices: SN=0, Quantity=5, UOM=6 should be center-aligned, rest left-aligned
-            center_aligned_cols = [0, 5, 6]  # SN, Quantity, UOM
+            item_rows = [headers]
             for idx, item in enumerate(order_items, 1):
-                row = items_table.add_row()
-                cells = row.cells
-                
-                # Helper function to set cell text with proper alignment
-                def set_cell_text_with_alignment(cell, text, is_center):
-                    # Clear existing content
-                    cell.text = ''
-                    # Get or create first paragraph
-                    para = cell.paragraphs[0] if cell.paragraphs else cell.add_paragraph()
-                    para.clear()
-                    # Normalize text and decide alignment
-                    text_str = '' if text is None else str(text)
-                    is_dash = text_str.strip() == '-'
-                    align_center = is_center or is_dash
-                    para.alignment = WD_ALIGN_PARAGRAPH.CENTER if align_center else WD_ALIGN_PARAGRAPH.LEFT
-                    # Add text
-                    run = para.add_run(text_str)
-                    run.font.size = Pt(9)
-                
-                # Set cell values with proper alignment
-                set_cell_text_with_alignment(cells[0], idx, True)  # SN - center
-                set_cell_text_with_alignment(cells[1], item.get('category', ''), False)  # Category - left
-                set_cell_text_with_alignment(cells[2], item.get('subCategory') or '-', False)  # Sub Category - left
-                set_cell_text_with_alignment(cells[3], item.get('materialName', ''), False)  # Material Name - left
-                set_cell_text_with_alignment(cells[4], item.get('specifications') or '-', False)  # Particulars - left
-                set_cell_text_with_alignment(cells[5], item.get('quantity', ''), True)  # Quantity - center
-                set_cell_text_with_alignment(cells[6], item.get('uom', ''), True)  # UOM - center
-                set_cell_text_with_alignment(cells[7], item.get('partyName') or '-', False)  # Preferred Vendor - left
-                set_cell_text_with_alignment(cells[8], item.get('place') or '-', False)  # Place - left
-                
-                # Set vertical alignment for all cells
-                for cell in cells:
-                    cell.vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-
-            # Ensure all cells (including headers) are vertically centered
-            for row in items_table.rows:
-                for cell in row.cells:
-                    cell.vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-
-            # Set a comfortable width for the "Particulars" column to avoid header/value wrapping
-            try:
-                desired_width = Inches(1.6)
-                particulars_col = items_table.columns[4]
-                for cell in particulars_col.cells:
-                    cell.width = desired_width
-                    for paragraph in cell.paragraphs:
-                        paragraph.paragraph_format.keep_together = True
-                particulars_col.width = desired_width
-            except Exception as e:
-                logger.warning(f"Could not set width for Particulars column: {e}")
-            
-            # Apply professional formatting
-            try:
-                format_table_professional(items_table, is_header=True, logger=logger)
-            except Exception as e:
-                logger.warning(f"Could not apply professional formatting to items table: {e}")
-                # Continue without formatting
-            
-            # Re-apply alignment preferences (format_table_professional centers most columns)
-            try:
-                for row_idx, row in enumerate(items_table.rows):
-                    for col_idx, cell in enumerate(row.cells):
-                        for paragraph in cell.paragraphs:
-                            para_text = ''.join(run.text for run in paragraph.runs).strip()
-                            is_dash_only = para_text == '-'
-                            if row_idx == 0:
-                                # Headers stay centered
-                                paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                            else:
-                                if is_dash_only:
-                                    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                                elif col_idx in center_aligned_cols:
-                                    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                                else:
-                                    paragraph.alignment = WD_ALIGN_PARAGRAPH.LEFT
-                        # Ensure vertical alignment stays centered after formatting tweaks
-                        cell.vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-            except Exception as e:
-                logger.warning(f"Could not re-apply alignment preferences: {e}")
+                item_rows.append([
+                    idx,
+                    item.get('category', ''),
+                    item.get('subCategory') or '-',
+                    item.get('materialName', ''),
+                    item.get('specifications') or '-',
+                    item.get('quantity', ''),
+                    item.get('uom', ''),
+                    item.get('partyName') or '-',
+                    item.get('place') or '-'
+                ])
+            add_table_from_rows(
+                doc, item_rows, preset='professional',
+                column_widths=[None, None, None, None, 1.6],
+                column_alignments=['center', 'left', 'left', 'left', 'left', 'center', 'center', 'left', 'left'],
+                center_dashes=True,
+                keep_together_cols=(4,)
+            )
         
         # Generate filename in format: {FACTORY}_INDT_{Order_ID}_{Day}_{HHMM} {AM/PM}
         # Parse dateTime to extract day, time, and AM/PM
@@ -3689,7 +3618,11 @@ Please find the detailed order document attached."""
         # Track bulk email result and recipient email status
         bulk_email_success = None  # None = not attempted, True = success, False = failed
         bulk_email_failure_reason = None
+        bulk_email_seconds = 0.0
+        email_addresses = 0  # To + CC + BCC addresses the bulk email reached
         recipients_with_email = set()  # Track which recipients have email addresses
+        delivery_log = DeliveryLog()
+        notification_bytes = os.path.getsize(notification_file) if os.path.exists(notification_file) else 0
         
         if send_email:
             logger.info("=" * 60)
@@ -3875,6 +3808,7 @@ Please find the detailed order document attached."""
                 logger.info(f"  All BCC recipients ({len(all_bcc_emails_list)}): {bcc_emails_str if bcc_emails_str else '(none)'}")
                 logger.info("=" * 60)
                 
+                send_started = time.perf_counter()
                 try:
                     # Send single email with all recipients
                     # Gmail API accepts comma-separated strings for To, CC, and BCC
@@ -3888,11 +3822,11 @@ Please find the detailed order document attached."""
                         bcc=bcc_emails_str  # Pass all BCC emails as comma-separated string
                     )
                     
+                    bulk_email_seconds = time.perf_counter() - send_started
                     if success is True:
                         # Count all recipients for stats
                         total_email_recipients = len(final_to_emails) + len(all_cc_emails_list) + len(all_bcc_emails_list)
-                        result["delivery_stats"]["email_successful"] = total_email_recipients
-                        result["delivery_stats"]["successful_deliveries"] += total_email_recipients
+                        email_addresses = total_email_recipients
                         bulk_email_success = True
                         
                         logger.info("=" * 60)
@@ -3907,7 +3841,6 @@ Please find the detailed order document attached."""
                         bulk_email_success = False
                         bulk_email_failure_reason = failure_reason
                         total_email_recipients = len(final_to_emails) + len(all_cc_emails_list) + len(all_bcc_emails_list)
-                        result["delivery_stats"]["failed_deliveries"] += total_email_recipients
                         
                         logger.error("=" * 60)
                         logger.error(f"✗ Failed to send single email: {success}")
@@ -3921,8 +3854,8 @@ Please find the detailed order document attached."""
                     exception_reason = f"Email exception: {str(e)}"
                     bulk_email_success = False
                     bulk_email_failure_reason = exception_reason
+                    bulk_email_seconds = time.perf_counter() - send_started
                     total_email_recipients = len(final_to_emails) + len(all_cc_emails_list) + len(all_bcc_emails_list)
-                    result["delivery_stats"]["failed_deliveries"] += total_email_recipients
                     
                     logger.error("=" * 60)
                     logger.error(f"✗ Error sending single email: {e}")
@@ -3938,7 +3871,9 @@ Please find the detailed order document attached."""
         # ============================================
         # WHATSAPP: Send individual messages (unchanged)
         # ============================================
-        for recipient in recipients:
+        # The bulk email's bytes are counted once, on the first recipient it reached
+        email_bytes = notification_bytes * 4 // 3
+        for recipient_index, recipient in enumerate(recipients):
             recipient_name = recipient.get('Name', 'Unknown')
             recipient_phone_raw = recipient.get('Contact No.', '')
             country_code = recipient.get('Country Code', '91')
@@ -3947,39 +3882,23 @@ Please find the detailed order document attached."""
             recipient_phone = f"{country_code}{recipient_phone_raw}".replace(' ', '') if recipient_phone_raw else ''
             contact_identifiers = [value for value in [recipient_phone] if value]
             contact_display = " | ".join(contact_identifiers) if contact_identifiers else "N/A"
-            recipient_success = False
-            recipient_fail_reasons = []
-            channel_status = {
-                "email": {"status": "not_enabled", "reason": ""},
-                "whatsapp": {"status": "not_enabled", "reason": ""}
-            }
+            recipient_id = delivery_log.recipient_id(recipient_name, contact_display, recipient_index)
             
-            # Set email status based on bulk email result
+            # Set email status based on bulk email result (not attempted -> no record, reported as not_enabled)
             if send_email:
                 if recipient_name in recipients_with_email:
-                    # Recipient has email - set status based on bulk email result
                     if bulk_email_success is True:
-                        channel_status["email"]["status"] = "success"
+                        delivery_log.append(recipient_id, 'email', 'success', seconds=bulk_email_seconds, nbytes=email_bytes)
+                        email_bytes = 0
                     elif bulk_email_success is False:
-                        channel_status["email"]["status"] = "failed"
-                        channel_status["email"]["reason"] = bulk_email_failure_reason or "Email send failed"
-                        recipient_fail_reasons.append(bulk_email_failure_reason or "Email send failed")
-                    else:
-                        # Bulk email not attempted (shouldn't happen, but handle it)
-                        channel_status["email"]["status"] = "not_enabled"
+                        delivery_log.append(recipient_id, 'email', 'failed', bulk_email_failure_reason or "Email send failed", bulk_email_seconds)
                 else:
-                    # Recipient has no email address
-                    no_email_reason = "Email: No recipient address provided (To, CC, or BCC required)"
-                    channel_status["email"]["status"] = "skipped"
-                    channel_status["email"]["reason"] = no_email_reason
-                    recipient_fail_reasons.append(no_email_reason)
-            else:
-                channel_status["email"]["status"] = "not_enabled"
+                    delivery_log.append(recipient_id, 'email', 'skipped', "Email: No recipient address provided (To, CC, or BCC required)")
             
             # Send WhatsApp
             if send_whatsapp:
-                channel_status["whatsapp"]["status"] = "pending"
                 if recipient_phone_raw and country_code:
+                    send_started = time.perf_counter()
                     try:
                         success = send_whatsapp_message(
                             contact_name=recipient_name,
@@ -3990,64 +3909,18 @@ Please find the detailed order document attached."""
                         )
                         
                         if success is True:
-                            recipient_success = True
-                            channel_status["whatsapp"]["status"] = "success"
-                            result["delivery_stats"]["whatsapp_successful"] += 1
+                            delivery_log.append(recipient_id, 'whatsapp', 'success', seconds=time.perf_counter() - send_started, nbytes=notification_bytes)
                             logger.info(f"WhatsApp sent successfully to {recipient_name} ({recipient_phone})")
                         else:
                             failure_reason = f"WhatsApp error: {success}" if isinstance(success, str) else "WhatsApp send failed"
-                            recipient_fail_reasons.append(failure_reason)
-                            channel_status["whatsapp"]["status"] = "failed"
-                            channel_status["whatsapp"]["reason"] = failure_reason
+                            delivery_log.append(recipient_id, 'whatsapp', 'failed', failure_reason, time.perf_counter() - send_started)
                             logger.error(f"Failed to send WhatsApp to {recipient_name}: {success}")
                             
                     except Exception as e:
-                        exception_reason = f"WhatsApp exception: {str(e)}"
-                        recipient_fail_reasons.append(exception_reason)
-                        channel_status["whatsapp"]["status"] = "failed"
-                        channel_status["whatsapp"]["reason"] = exception_reason
+                        delivery_log.append(recipient_id, 'whatsapp', 'failed', f"WhatsApp exception: {str(e)}", time.perf_counter() - send_started)
                         logger.error(f"Error sending WhatsApp to {recipient_name}: {e}")
                 else:
-                    whatsapp_skip_reason = "WhatsApp: Missing phone number or country code"
-                    recipient_fail_reasons.append(whatsapp_skip_reason)
-                    channel_status["whatsapp"]["status"] = "skipped"
-                    channel_status["whatsapp"]["reason"] = whatsapp_skip_reason
-            else:
-                channel_status["whatsapp"]["status"] = "not_enabled"
-            
-            # Count overall success: recipient is successful if at least one enabled channel succeeded
-            enabled_channels = [ch for ch, status in channel_status.items() if status.get("status") != "not_enabled"]
-            has_success = any(
-                channel_status[ch].get("status") == "success" 
-                for ch in enabled_channels
-            )
-            
-            if has_success:
-                result["delivery_stats"]["successful_deliveries"] += 1
-            else:
-                result["delivery_stats"]["failed_deliveries"] += 1
-
-            # Track per-channel successes for frontend display
-            if channel_status.get("email", {}).get("status") == "success":
-                result["delivery_stats"]["channel_logs"]["email"].append(recipient_name)
-            if channel_status.get("whatsapp", {}).get("status") == "success":
-                result["delivery_stats"]["channel_logs"]["whatsapp"].append(recipient_name)
-
-            # Add to failed_contacts if ANY enabled channel failed or was skipped
-            # This allows the frontend to show which specific channel failed for each contact
-            any_channel_failed_or_skipped = any(
-                channel_status[ch].get("status") in ("failed", "skipped")
-                for ch in enabled_channels
-            ) if enabled_channels else False
-
-            if any_channel_failed_or_skipped:
-                reason_text = " | ".join(recipient_fail_reasons) if recipient_fail_reasons else "No delivery methods attempted"
-                result["delivery_stats"]["failed_contacts"].append({
-                    "name": recipient_name,
-                    "contact": contact_display,
-                    "reason": reason_text,
-                    "channel_status": channel_status
-                })
+                    delivery_log.append(recipient_id, 'whatsapp', 'skipped', "WhatsApp: Missing phone number or country code")
         
         # Delete generated documents after notifications are completed
         # Only delete if Drive upload succeeded
@@ -4082,11 +3955,15 @@ Please find the detailed order document attached."""
             except Exception as e:
                 logger.warning(f"Failed to clean up DOCX file: {e}")
         
-        # Expose channel_logs as successful_contacts for frontend compatibility
-        result["delivery_stats"]["successful_contacts"] = result["delivery_stats"].get("channel_logs", {"email": [], "whatsapp": []})
-
-        # Expose channel_logs as successful_contacts for frontend compatibility
-        result["delivery_stats"]["successful_contacts"] = result["delivery_stats"].get("channel_logs", {"email": [], "whatsapp": []})
+        # A recipient counts once, delivered if any enabled channel succeeded; channel_status of
+        # failed contacts lists both channels so the frontend can show which one failed
+        delivery_metrics = delivery_log.metrics()
+        result["delivery_stats"] = {
+            **delivery_log.to_delivery_stats(total_recipients=len(recipients), channels=['email', 'whatsapp'], label_reasons=False),
+            "email_successful": email_addresses,
+            "whatsapp_successful": delivery_metrics.get('whatsapp', {}).get('success', 0)
+        }
+        result["delivery_metrics"] = delivery_metrics
 
         # Set final status
         successful = result["delivery_stats"]["successful_deliveries"]
@@ -4214,32 +4091,9 @@ def process_material_notification(material_data, notification_type, recipients,
                 run.bold = True
                 run.font.size = Pt(12)
             
-            details_table = doc.add_table(rows=len(details_data), cols=2)
-            details_table.alignment = WD_TABLE_ALIGNMENT.CENTER
-            
-            # Add details
-            for i, (label, value) in enumerate(details_data):
-                row = details_table.rows[i]
-                cells = row.cells
-                cells[0].text = label
-                cells[1].text = str(value)
-            
-            # Format cells
-            for i, (label, value) in enumerate(details_data):
-                row = details_table.rows[i]
-                cells = row.cells
-                for cell in cells:
-                    cell.vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-                    for paragraph in cell.paragraphs:
-                        for run in paragraph.runs:
-                            run.bold = True
-                            run.font.size = Pt(10)
-            
-            # Apply professional formatting
-            try:
-                format_table_professional(details_table, is_header=False, logger=logger)
-            except Exception as e:
-                logger.warning(f"Could not apply professional formatting to details table: {e}")
+            # Professional styling with every label/value bold
+            add_table_from_rows(doc, [[label, str(value)] for label, value in details_data],
+                                preset='professional', bold_body=True)
             
         except Exception as e:
             logger.error(f"Error creating details table: {e}")
@@ -4258,54 +4112,14 @@ def process_material_notification(material_data, notification_type, recipients,
         items = material_data.get('inwardItems', []) if is_inward else material_data.get('outwardItems', [])
         
         if items:
-            # Create table with headers
-            items_table = doc.add_table(rows=1, cols=7)
-            items_table.alignment = WD_TABLE_ALIGNMENT.CENTER
-            
-            # Add header row
-            header_cells = items_table.rows[0].cells
+            # Create items table with professional styling
             headers = ['S.No', 'Category', 'Sub Category', 'Material Name', 'Specifications', 'Quantity', 'UOM']
-            for i, header_text in enumerate(headers):
-                header_cells[i].text = header_text
-                header_cells[i].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-                for paragraph in header_cells[i].paragraphs:
-                    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    for run in paragraph.runs:
-                        run.bold = True
-                        run.font.size = Pt(11)
-            
-            # Add data rows
-            for idx, item in enumerate(items, 1):
-                row = items_table.add_row()
-                cells = row.cells
-                
-                cells[0].text = str(idx)
-                cells[1].text = item.get('category', '')
-                cells[2].text = item.get('subCategory') or '-'
-                cells[3].text = item.get('materialName', '')
-                cells[4].text = item.get('specifications') or '-'
-                cells[5].text = str(item.get('quantity', ''))
-                cells[6].text = item.get('uom', '')
-                
-                # Format cells
-                for i, cell in enumerate(cells):
-                    cell.vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-                    for paragraph in cell.paragraphs:
-                        if i == 0:  # S.No
-                            paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        elif i in [5, 6]:  # Quantity and UOM
-                            paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        else:
-                            paragraph.alignment = WD_ALIGN_PARAGRAPH.LEFT
-                        
-                        for run in paragraph.runs:
-                            run.font.size = Pt(10)
-            
-            # Apply professional formatting
-            try:
-                format_table_professional(items_table, is_header=True, logger=logger)
-            except Exception as e:
-                logger.warning(f"Could not apply professional formatting to items table: {e}")
+            item_rows = [headers] + [
+                [idx, item.get('category', ''), item.get('subCategory') or '-', item.get('materialName', ''),
+                 item.get('specifications') or '-', item.get('quantity', ''), item.get('uom', '')]
+                for idx, item in enumerate(items, 1)
+            ]
+            add_table_from_rows(doc, item_rows, preset='professional')
         
         # Add quantity updates if available
         quantity_updates = material_data.get('quantityUpdates', [])
@@ -4317,45 +4131,11 @@ def process_material_notification(material_data, notification_type, recipients,
                 run.bold = True
                 run.font.size = Pt(12)
             
-            qty_table = doc.add_table(rows=1, cols=4)
-            qty_table.alignment = WD_TABLE_ALIGNMENT.CENTER
-            
-            # Add header row
-            qty_header_cells = qty_table.rows[0].cells
-            qty_headers = ['Material', 'Previous', 'New', 'Change']
-            for i, header_text in enumerate(qty_headers):
-                qty_header_cells[i].text = header_text
-                qty_header_cells[i].vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-                for paragraph in qty_header_cells[i].paragraphs:
-                    paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                    for run in paragraph.runs:
-                        run.bold = True
-                        run.font.size = Pt(11)
-            
-            # Add data rows
+            qty_rows = [['Material', 'Previous', 'New', 'Change']]
             for update in quantity_updates:
-                row = qty_table.add_row()
-                cells = row.cells
-                
-                cells[0].text = update.get('material', '')
-                cells[1].text = str(update.get('previous', ''))
-                cells[2].text = str(update.get('new', ''))
                 change_label = f"+{update.get('added', '')}" if is_inward else f"-{update.get('removed', '')}"
-                cells[3].text = change_label
-                
-                # Format cells
-                for i, cell in enumerate(cells):
-                    cell.vertical_alignment = WD_ALIGN_VERTICAL.CENTER
-                    for paragraph in cell.paragraphs:
-                        paragraph.alignment = WD_ALIGN_PARAGRAPH.CENTER
-                        for run in paragraph.runs:
-                            run.font.size = Pt(10)
-            
-            # Apply professional formatting
-            try:
-                format_table_professional(qty_table, is_header=True, logger=logger)
-            except Exception as e:
-                logger.warning(f"Could not apply professional formatting to quantity table: {e}")
+                qty_rows.append([update.get('material', ''), update.get('previous', ''), update.get('new', ''), change_label])
+            add_table_from_rows(doc, qty_rows, preset='professional')
         
         # Add footer
         doc.add_paragraph()
@@ -4467,7 +4247,9 @@ Please find the detailed outward document attached."""
         send_email = method in ['email', 'both']
         send_whatsapp = method in ['whatsapp', 'both']
         
-        for recipient in recipients:
+        delivery_log = DeliveryLog()
+        notification_bytes = os.path.getsize(notification_file) if os.path.exists(notification_file) else 0
+        for recipient_index, recipient in enumerate(recipients):
             recipient_name = recipient.get('Name', 'Unknown')
             recipient_email = recipient.get('Email ID - To', '').strip()
             recipient_phone_raw = recipient.get('Contact No.', '').strip()
@@ -4477,19 +4259,14 @@ Please find the detailed outward document attached."""
             recipient_phone = f"{country_code}{recipient_phone_raw}".replace(' ', '') if recipient_phone_raw else ''
             contact_identifiers = [value for value in [recipient_email, recipient_phone] if value]
             contact_display = " | ".join(contact_identifiers) if contact_identifiers else "N/A"
-            recipient_success = False
-            recipient_fail_reasons = []
-            channel_status = {
-                "email": {"status": "not_enabled", "reason": ""},
-                "whatsapp": {"status": "not_enabled", "reason": ""}
-            }
+            recipient_id = delivery_log.recipient_id(recipient_name, contact_display, recipient_index)
             
             logger.info(f"Processing recipient: {recipient_name}")
             
             # Send email
             if send_email:
-                channel_status["email"]["status"] = "pending"
                 if recipient_email:
+                    send_started = time.perf_counter()
                     try:
                         email_subject = f"{notification_title} - {factory}"
                         if is_inward:
@@ -4576,35 +4353,23 @@ Please find the detailed outward document attached."""
                         )
                         
                         if success is True:
-                            recipient_success = True
-                            channel_status["email"]["status"] = "success"
-                            result["delivery_stats"]["email_successful"] += 1
+                            delivery_log.append(recipient_id, 'email', 'success', seconds=time.perf_counter() - send_started, nbytes=notification_bytes * 4 // 3)
                             logger.info(f"Email sent successfully to {recipient_name} ({recipient_email})")
                         else:
                             failure_reason = f"Email error: {success}" if isinstance(success, str) else "Email send failed"
-                            recipient_fail_reasons.append(failure_reason)
-                            channel_status["email"]["status"] = "failed"
-                            channel_status["email"]["reason"] = failure_reason
+                            delivery_log.append(recipient_id, 'email', 'failed', failure_reason, time.perf_counter() - send_started)
                             logger.error(f"Failed to send email to {recipient_name}: {success}")
                             
                     except Exception as e:
-                        exception_reason = f"Email exception: {str(e)}"
-                        recipient_fail_reasons.append(exception_reason)
-                        channel_status["email"]["status"] = "failed"
-                        channel_status["email"]["reason"] = exception_reason
+                        delivery_log.append(recipient_id, 'email', 'failed', f"Email exception: {str(e)}", time.perf_counter() - send_started)
                         logger.error(f"Error sending email to {recipient_name}: {e}")
                 else:
-                    no_email_reason = "Email: No recipient address provided"
-                    recipient_fail_reasons.append(no_email_reason)
-                    channel_status["email"]["status"] = "skipped"
-                    channel_status["email"]["reason"] = no_email_reason
-            else:
-                channel_status["email"]["status"] = "not_enabled"
+                    delivery_log.append(recipient_id, 'email', 'skipped', "Email: No recipient address provided")
             
             # Send WhatsApp
             if send_whatsapp:
-                channel_status["whatsapp"]["status"] = "pending"
                 if recipient_phone_raw and country_code:
+                    send_started = time.perf_counter()
                     try:
                         success = send_whatsapp_message(
                             contact_name=recipient_name,
@@ -4615,58 +4380,27 @@ Please find the detailed outward document attached."""
                         )
                         
                         if success is True:
-                            recipient_success = True
-                            channel_status["whatsapp"]["status"] = "success"
-                            result["delivery_stats"]["whatsapp_successful"] += 1
+                            delivery_log.append(recipient_id, 'whatsapp', 'success', seconds=time.perf_counter() - send_started, nbytes=notification_bytes)
                             logger.info(f"WhatsApp sent successfully to {recipient_name} ({recipient_phone})")
                         else:
                             failure_reason = f"WhatsApp error: {success}" if isinstance(success, str) else "WhatsApp send failed"
-                            recipient_fail_reasons.append(failure_reason)
-                            channel_status["whatsapp"]["status"] = "failed"
-                            channel_status["whatsapp"]["reason"] = failure_reason
+                            delivery_log.append(recipient_id, 'whatsapp', 'failed', failure_reason, time.perf_counter() - send_started)
                             logger.error(f"Failed to send WhatsApp to {recipient_name}: {success}")
                             
                     except Exception as e:
-                        exception_reason = f"WhatsApp exception: {str(e)}"
-                        recipient_fail_reasons.append(exception_reason)
-                        channel_status["whatsapp"]["status"] = "failed"
-                        channel_status["whatsapp"]["reason"] = exception_reason
+                        delivery_log.append(recipient_id, 'whatsapp', 'failed', f"WhatsApp exception: {str(e)}", time.perf_counter() - send_started)
                         logger.error(f"Error sending WhatsApp to {recipient_name}: {e}")
                 else:
-                    whatsapp_skip_reason = "WhatsApp: Missing phone number or country code"
-                    recipient_fail_reasons.append(whatsapp_skip_reason)
-                    channel_status["whatsapp"]["status"] = "skipped"
-                    channel_status["whatsapp"]["reason"] = whatsapp_skip_reason
-            else:
-                channel_status["whatsapp"]["status"] = "not_enabled"
-            
-            # Count overall success: recipient is successful if at least one enabled channel succeeded
-            enabled_channels = [ch for ch, status in channel_status.items() if status.get("status") != "not_enabled"]
-            has_success = any(
-                channel_status[ch].get("status") == "success" 
-                for ch in enabled_channels
-            )
-            
-            if has_success:
-                result["delivery_stats"]["successful_deliveries"] += 1
-            else:
-                result["delivery_stats"]["failed_deliveries"] += 1
-
-            # Add to failed_contacts if ANY enabled channel failed or was skipped
-            # This allows the frontend to show which specific channel failed for each contact
-            any_channel_failed_or_skipped = any(
-                channel_status[ch].get("status") in ("failed", "skipped")
-                for ch in enabled_channels
-            ) if enabled_channels else False
-
-            if any_channel_failed_or_skipped:
-                reason_text = " | ".join(recipient_fail_reasons) if recipient_fail_reasons else "No delivery methods attempted"
-                result["delivery_stats"]["failed_contacts"].append({
-                    "name": recipient_name,
-                    "contact": contact_display,
-                    "reason": reason_text,
-                    "channel_status": channel_status
-                })
+                    delivery_log.append(recipient_id, 'whatsapp', 'skipped', "WhatsApp: Missing phone number or country code")
+        
+        # A recipient counts once, delivered if any enabled channel succeeded
+        delivery_metrics = delivery_log.metrics()
+        result["delivery_stats"] = {
+            **delivery_log.to_delivery_stats(total_recipients=len(recipients), channels=['email', 'whatsapp'], label_reasons=False),
+            "email_successful": delivery_metrics.get('email', {}).get('success', 0),
+            "whatsapp_successful": delivery_metrics.get('whatsapp', {}).get('success', 0)
+        }
+        result["delivery_metrics"] = delivery_metrics
         
         # Delete generated documents after notifications are completed
         # Only delete if Drive upload succeeded
@@ -0,0 +1,553 @@
+# reactor_benchmark.py - Times process_reactor_reports stage by stage against recorded or synthetic sheets
+#
+# Record:  python -m Utils.reactor_benchmark record --date 05/03/2025 --out fixtures/kr.json.gz
+# Run:     python -m Utils.reactor_benchmark run --fixture fixtures/kr.json.gz --out bench/
+#          python -m Utils.reactor_benchmark run --sheets 1,3,6 --tables 5,20,50 --out bench/
+# Compare: add --baseline bench/previous.json --max-regression 0.25 to fail on slower stages.
+#
+# Sheets are served by FakeGspreadClient, notifications by no-op senders that replay the recorded
+# latencies, and the sheet/fragment caches point at a temporary directory for every case.
+import os
+import sys
+import copy
+import gzip
+import json
+import time
+import logging
+import argparse
+import shutil
+import platform
+import tempfile
+import statistics
+from contextlib import ExitStack
+from datetime import datetime, timedelta
+from types import ModuleType
+from unittest import mock
+from Utils.cache_utils import TTLCache
+from Utils.delivery_log import DeliveryLog
+from Utils.grid_utils import SheetGrid
+from Utils.latency_stats import LatencyStats
+from Utils.reactor_matchers import DRAIN_VALVE_MATCHER, REQUIRED_COLUMNS, HeaderIndex
+from Utils.reactor_sheet_cache import reactor_sheet_cache, reactor_fragment_cache
+from Utils.reactor_date_index import reactor_date_index
+
+STAGES = ('fetch', 'filter', 'render', 'convert', 'notify')
+DEFAULT_SHEET_COUNTS = (1, 3, 6)
+DEFAULT_TABLE_COUNTS = (5, 20, 50)
+DEFAULT_REPEAT = 3
+FIXTURE_VERSION = 1
+
+SYNTHETIC_HEADERS = ['Sr. No.', 'Particulars', 'Start Date & Time', 'End Date & Time', 'Temperature', 'Pressure']
+SYNTHETIC_OPERATIONS = ['Charging (with circulation)', 'Heating', 'Reaction hold', 'Cooling',
+                        'Sampling', 'ML & A & B Drain Valve']
+SYNTHETIC_ROWS_PER_TABLE = 8
+
+
+# ----------------------------------------------------------------------------
+# Fake gspread client
+# ----------------------------------------------------------------------------
+
+class FakeResponse:
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class FakeWorksheet:
+    def __init__(self, client, sheet_id, title, values, latency):
+        self._client = client
+        self.id = sheet_id
+        self.title = title
+        self._values = values
+        self._latency = latency
+
+    def get_all_values(self):
+        self._client.calls['get_all_values'] += 1
+        if self._latency:
+            time.sleep(self._latency)
+        return copy.deepcopy(self._values)
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, sheet_id, entry):
+        self.id = sheet_id
+        self.sheet1 = FakeWorksheet(client, sheet_id, entry['title'], entry['values'],
+                                    entry.get('latency_seconds', 0))
+
+
+class FakeGspreadClient:
+    """
+    Serves fixture grids through the subset of the gspread client used by the reactor flow:
+    open_by_key(id).sheet1.get_all_values() and request() for the Drive revision lookup.
+    """
+
+    def __init__(self, sheets):
+        self.sheets = sheets
+        self.calls = {'open_by_key': 0, 'get_all_values': 0, 'request': 0}
+
+    def open_by_key(self, sheet_id):
+        self.calls['open_by_key'] += 1
+        if sheet_id not in self.sheets:
+            raise KeyError(f"Spreadsheet {sheet_id} is not in the benchmark fixture")
+        return FakeSpreadsheet(self, sheet_id, self.sheets[sheet_id])
+
+    def request(self, method, url, params=None, **kwargs):
+        self.calls['request'] += 1
+        sheet_id = url.rstrip('/').rsplit('/', 1)[-1]
+        entry = self.sheets.get(sheet_id)
+        if entry is None:
+            raise KeyError(f"Spreadsheet {sheet_id} is not in the benchmark fixture")
+        return FakeResponse({'modifiedTime': entry.get('modified_time'), 'version': entry.get('version', '1')})
+
+
+# ----------------------------------------------------------------------------
+# Fixtures
+# ----------------------------------------------------------------------------
+
+def load_fixture(path):
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        fixture = json.load(f)
+    if fixture.get('version') != FIXTURE_VERSION:
+        raise ValueError(f"Unsupported fixture version {fixture.get('version')} in {path}")
+    return fixture
+
+
+def save_fixture(fixture, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        json.dump(fixture, f)
+
+
+def _table_range_rows(table_defs):
+    rows = [['Table Ranges'], ['Table No.', 'Table Name', 'Start Range', 'End Range']]
+    rows.extend([str(t['no']), t['name'], t['start'], t['end']] for t in table_defs)
+    return rows
+
+
+def _synthetic_recipients():
+    return [['Name', 'Email ID - To', 'Email ID - CC', 'Email ID - BCC', 'Contact No.'],
+            ['Bench Recipient 1', 'bench1@example.com', '', '', '9000000001'],
+            ['Bench Recipient 2', 'bench2@example.com', '', '', '9000000002']]
+
+
+def synthetic_fixture(input_date='05/03/2025'):
+    """
+    One reactor sheet with six operation rows and a single table template; build_case()
+    replicates both to the requested sheet and table counts.
+    """
+    rows = [['Reactor KR-01 - Batch log'], list(SYNTHETIC_HEADERS)]
+    for i, operation in enumerate(SYNTHETIC_OPERATIONS, start=1):
+        rows.append([str(i), operation, f"{input_date} 0{i}:00", '', f"{60 + i}", f"{1.0 + i / 10:.1f}"])
+    rows.append([''] * len(SYNTHETIC_HEADERS))
+    first = len(rows) + 1
+    rows.append(['Time', 'Parameter', 'Set Point', 'Actual', 'Deviation', 'Remarks'])
+    for r in range(SYNTHETIC_ROWS_PER_TABLE):
+        rows.append([f"{r:02d}:00", f"Param {r}", f"{70 + r}", f"{70 + r + 0.5}", '0.5', '-'])
+    last = len(rows)
+    return {
+        'version': FIXTURE_VERSION,
+        'source': 'synthetic',
+        'input_date': input_date,
+        'sheet_id_mapping': [['Date', 'Sheet ID'], [input_date, 'synthetic-reactor']],
+        'recipients': _synthetic_recipients(),
+        'table_ranges': _table_range_rows([{'no': 1, 'name': 'Process Parameters',
+                                            'start': f"A{first}", 'end': f"F{last}"}]),
+        'sheets': {'synthetic-reactor': {'title': 'KR-01', 'values': rows,
+                                         'modified_time': '2025-03-05T00:00:00Z', 'latency_seconds': 0}},
+        'latencies': {'email': 0, 'whatsapp': 0, 'drive_upload': 0}
+    }
+
+
+def _parse_table_defs(table_ranges):
+    """Table definitions from a Table Ranges tab, located by header name as process_reactor_reports does"""
+    headers = [h.strip().lower() for h in table_ranges[1]] if len(table_ranges) > 1 else []
+    idx_name, idx_start, idx_end = (headers.index(h) if h in headers else default
+                                    for h, default in (('table name', 1), ('start range', 2), ('end range', 3)))
+    table_defs = []
+    for row in table_ranges[2:]:
+        if len(row) > max(idx_name, idx_start, idx_end) and row[idx_name].strip() and row[idx_start].strip() and row[idx_end].strip():
+            table_defs.append({'name': row[idx_name].strip(), 'start': row[idx_start].strip(), 'end': row[idx_end].strip()})
+    return table_defs
+
+
+def _open_drain_valve(values):
+    """Blank the drain valve end date so a previous-day copy of the sheet is always included"""
+    grid = SheetGrid(values, header_row=1)
+    header_index = HeaderIndex(grid.headers)
+    idx_particulars = header_index.find_any(REQUIRED_COLUMNS)
+    idx_end_date = header_index.find_any(DRAIN_VALVE_MATCHER.date_column_keywords)
+    if idx_particulars is None or idx_end_date is None:
+        return values
+    row = DRAIN_VALVE_MATCHER.find_row(grid, idx_particulars)
+    if row is not None and len(row) > idx_end_date:
+        row[idx_end_date] = ''
+    return values
+
+
+def build_case(fixture, sheet_count, table_count):
+    """
+    Scale a fixture to ``sheet_count`` consecutive daily sheets and ``table_count`` table ranges.
+
+    Recorded sheets are reused round-robin under new ids (so every case starts cold), and
+    recorded table ranges are cycled; repeated ranges render the same rows again, which is
+    what the render stage cost depends on.
+    """
+    if not 1 <= sheet_count <= 6:
+        raise ValueError("sheet_count must be between 1 and 6 (input date plus five previous days)")
+    input_dt = datetime.strptime(fixture['input_date'], '%d/%m/%Y')
+    source_ids = list(fixture['sheets'])
+    stamp = f"{sheet_count}x{table_count}"
+
+    sheets = {}
+    mapping = [list(fixture['sheet_id_mapping'][0])]
+    for day in range(sheet_count):
+        source = fixture['sheets'][source_ids[day % len(source_ids)]]
+        sheet_id = f"bench-{stamp}-{day}"
+        values = copy.deepcopy(source['values'])
+        if day:
+            values = _open_drain_valve(values)
+        sheets[sheet_id] = dict(source, values=values)
+        mapping.append([(input_dt - timedelta(days=day)).strftime('%d/%m/%Y'), sheet_id])
+
+    source_defs = _parse_table_defs(fixture['table_ranges'])
+    if not source_defs:
+        raise ValueError("Fixture has no table ranges")
+    table_defs = []
+    for i in range(table_count):
+        source = source_defs[i % len(source_defs)]
+        table_defs.append({'no': i + 1, 'name': f"{source['name']} #{i + 1}",
+                           'start': source['start'], 'end': source['end']})
+
+    return {
+        'input_date': fixture['input_date'],
+        'sheet_id_mapping': mapping,
+        'recipients': fixture['recipients'],
+        'table_ranges': _table_range_rows(table_defs),
+        'sheets': sheets,
+        'latencies': fixture.get('latencies', {})
+    }
+
+
+def record_fixture(input_date, out_path, config_sheet_id=None, logger=None):
+    """Download the reactor config tabs and the sheets for a date into a fixture file"""
+    import gspread
+    from Utils.config import creds
+    from Utils.reactor_scheduler import REACTOR_CONFIG_SHEET_ID
+    from Utils.reactor_sheet_cache import get_drive_revision
+
+    log = logger or logging
+    client = gspread.authorize(creds)
+    config = client.open_by_key(config_sheet_id or REACTOR_CONFIG_SHEET_ID)
+    mapping = config.worksheet('Sheet_ID_Reactor').get_all_values()
+    recipients = config.worksheet('Recipients').get_all_values()
+    table_ranges = config.worksheet('Table Ranges').get_all_values()
+
+    input_dt = datetime.strptime(input_date, '%d/%m/%Y').date()
+    wanted = {input_dt - timedelta(days=i) for i in range(6)}
+    sheets = {}
+    for row in mapping[1:]:
+        if len(row) < 2 or not row[1].strip():
+            continue
+        try:
+            row_date = datetime.strptime(row[0].strip(), '%d/%m/%Y').date()
+        except ValueError:
+            continue
+        if row_date not in wanted:
+            continue
+        sheet_id = row[1].strip()
+        started = time.perf_counter()
+        worksheet = client.open_by_key(sheet_id).sheet1
+        values = worksheet.get_all_values()
+        latency = time.perf_counter() - started
+        revision = get_drive_revision(client, sheet_id)
+        sheets[sheet_id] = {'title': worksheet.title, 'values': values, 'latency_seconds': round(latency, 4),
+                            'modified_time': revision.get('modifiedTime'), 'version': revision.get('version')}
+        log.info(f"Recorded sheet {sheet_id} ({len(values)} rows, {latency:.2f}s)")
+
+    if not sheets:
+        raise ValueError(f"No reactor sheets found for {input_date} and the five previous days")
+
+    # Recipient contact details are not needed to time the flow and are not written to disk
+    def anonymize(cell, i):
+        if '@' in cell:
+            return f"recipient{i}@example.com"
+        return '9000000000' if sum(c.isdigit() for c in cell) >= 10 else cell
+
+    anonymized = [recipients[0]] + [
+        [f"Recipient {i}"] + [anonymize(cell, i) for cell in row[1:]]
+        for i, row in enumerate(recipients[1:], start=1)
+    ]
+    fixture = {
+        'version': FIXTURE_VERSION,
+        'source': 'recorded',
+        'recorded_at': datetime.now().isoformat(),
+        'input_date': input_dt.strftime('%d/%m/%Y'),
+        'sheet_id_mapping': [mapping[0]] + [row for row in mapping[1:] if len(row) > 1 and row[1].strip() in sheets],
+        'recipients': anonymized,
+        'table_ranges': table_ranges,
+        'sheets': sheets,
+        'latencies': {'email': 0, 'whatsapp': 0, 'drive_upload': 0}
+    }
+    save_fixture(fixture, out_path)
+    return fixture
+
+
+# ----------------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------------
+
+def _fake_notifiers(case):
+    """Stand-ins for the Gmail, WhatsApp, Drive and log report calls made at the end of the flow"""
+    latencies = case.get('latencies', {})
+
+    def send_email_gmail_api(*args, **kwargs):
+        time.sleep(latencies.get('email', 0))
+        return True
+
+    def handle_reactor_report_notification_with_stats(recipients_data, **kwargs):
+        count = max(0, len(recipients_data) - 1)
+        delivery_log = DeliveryLog()
+        for n in range(count):
+            time.sleep(latencies.get('whatsapp', 0))
+            delivery_log.record(f"recipient-{n + 1}", 'whatsapp', 'success', seconds=latencies.get('whatsapp', 0))
+        return {'delivery_stats': delivery_log.to_delivery_stats(), 'delivery_log': delivery_log}
+
+    def upload_reactor_report_to_drive(**kwargs):
+        time.sleep(latencies.get('drive_upload', 0))
+        return False, None, None, 'benchmark run - file kept'
+
+    fake_app = ModuleType('app')
+    fake_app.send_log_report_to_user = lambda *args, **kwargs: None
+    return {
+        'send_email_gmail_api': send_email_gmail_api,
+        'handle_reactor_report_notification_with_stats': handle_reactor_report_notification_with_stats,
+        'upload_reactor_report_to_drive': upload_reactor_report_to_drive,
+    }, fake_app
+
+
+def _template_path(template, work_dir):
+    if template and os.path.exists(template):
+        return template
+    from docx import Document
+    path = os.path.join(work_dir, 'blank_template.docx')
+    if not os.path.exists(path):
+        Document().save(path)
+    return path
+
+
+def run_case(case, template, work_dir, repeat=DEFAULT_REPEAT, notify=True, logger=None):
+    """
+    Run one case ``repeat`` times against fresh caches. The first run is cold (empty sheet,
+    fragment and date index caches); later runs show the warm-cache path a daily rerun takes.
+    """
+    from Utils import process_utils
+
+    log = logger or logging.getLogger(__name__)
+    cache_root = tempfile.mkdtemp(prefix='cache-', dir=work_dir)
+    output_dir = tempfile.mkdtemp(prefix='out-', dir=work_dir)
+    notifiers, fake_app = _fake_notifiers(case)
+    runs = []
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(reactor_sheet_cache, 'cache_dir', os.path.join(cache_root, 'sheets')))
+        stack.enter_context(mock.patch.object(reactor_fragment_cache, 'cache_dir', os.path.join(cache_root, 'fragments')))
+        stack.enter_context(mock.patch.object(reactor_fragment_cache, '_memory', TTLCache(max_entries=64)))
+        stack.enter_context(mock.patch.object(reactor_date_index, 'cache_dir', os.path.join(cache_root, 'date_index')))
+        stack.enter_context(mock.patch.object(reactor_date_index, '_states', {}))
+        # Keep benchmark timings out of the latency stats used for dry-run estimates
+        stack.enter_context(mock.patch.object(process_utils, 'latency_stats', LatencyStats(os.path.join(cache_root, 'latency_stats.json'))))
+        if notify:
+            for name, fake in notifiers.items():
+                stack.enter_context(mock.patch.object(process_utils, name, fake))
+            stack.enter_context(mock.patch.dict(sys.modules, {'app': fake_app}))
+
+        for attempt in range(repeat):
+            client = FakeGspreadClient(case['sheets'])
+            started = time.perf_counter()
+            result = process_utils.process_reactor_reports(
+                sheet_id_mapping_data=case['sheet_id_mapping'],
+                sheet_recipients_data=case['recipients'],
+                table_range_data=case['table_ranges'],
+                input_date=case['input_date'],
+                user_id='benchmark@example.com',
+                send_email=notify,
+                send_whatsapp=notify,
+                template_path=template,
+                output_dir=output_dir,
+                gspread_client=client,
+                logger=log
+            )
+            total = time.perf_counter() - started
+            runs.append({
+                'run': 'cold' if attempt == 0 else 'warm',
+                'total': round(total, 4),
+                'timings': result.get('timings', {}),
+                'sheets_processed': result.get('sheets_processed', 0),
+                'output_bytes': os.path.getsize(result['output_file']) if result.get('output_file') and os.path.exists(result['output_file']) else 0,
+                'api_calls': dict(client.calls),
+                'errors': result.get('errors', [])
+            })
+    return runs
+
+
+def _summarize(runs):
+    summary = {'cold': runs[0]}
+    warm = runs[1:]
+    if warm:
+        summary['warm_median'] = {
+            'total': round(statistics.median(r['total'] for r in warm), 4),
+            'timings': {stage: round(statistics.median(r['timings'].get(stage, 0) for r in warm), 4)
+                        for stage in STAGES},
+            'api_calls': warm[-1]['api_calls']
+        }
+    return summary
+
+
+def run_benchmark(fixture, sheet_counts=DEFAULT_SHEET_COUNTS, table_counts=DEFAULT_TABLE_COUNTS,
+                  repeat=DEFAULT_REPEAT, template=None, notify=True, logger=None):
+    """Run every (sheets, tables) combination and return the report dict"""
+    log = logger or logging.getLogger(__name__)
+    cases = []
+    with tempfile.TemporaryDirectory(prefix='reactor-bench-') as work_dir:
+        template_path = _template_path(template, work_dir)
+        for sheet_count in sheet_counts:
+            for table_count in table_counts:
+                case = build_case(fixture, sheet_count, table_count)
+                log.info(f"Benchmarking {sheet_count} sheet(s) x {table_count} table(s)")
+                runs = run_case(case, template_path, work_dir, repeat=repeat, notify=notify, logger=log)
+                cases.append({'sheets': sheet_count, 'tables': table_count, 'runs': runs, **_summarize(runs)})
+    return {
+        'generated_at': datetime.now().isoformat(),
+        'fixture': fixture.get('source', 'unknown'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'libreoffice': bool(shutil.which('libreoffice'))
+        },
+        'repeat': repeat,
+        'notify': notify,
+        'cases': cases
+    }
+
+
+def compare_reports(report, baseline, max_regression=0.25, min_seconds=0.05):
+    """
+    List stages that got slower than the baseline by more than ``max_regression`` (a fraction).
+    Stages below ``min_seconds`` in both reports are ignored as noise.
+    """
+    baseline_cases = {(c['sheets'], c['tables']): c for c in baseline.get('cases', [])}
+    regressions = []
+    for case in report['cases']:
+        previous = baseline_cases.get((case['sheets'], case['tables']))
+        if not previous:
+            continue
+        for run in ('cold', 'warm_median'):
+            if run not in case or run not in previous:
+                continue
+            for stage in STAGES + ('total',):
+                now = case[run]['total'] if stage == 'total' else case[run]['timings'].get(stage, 0)
+                before = previous[run]['total'] if stage == 'total' else previous[run]['timings'].get(stage, 0)
+                if max(now, before) < min_seconds:
+                    continue
+                if before and (now - before) / before > max_regression:
+                    regressions.append({'sheets': case['sheets'], 'tables': case['tables'], 'run': run,
+                                        'stage': stage, 'baseline': before, 'current': now})
+    return regressions
+
+
+def render_markdown(report, regressions=None):
+    lines = [
+        '# Reactor report benchmark',
+        '',
+        f"Generated {report['generated_at']} from {report['fixture']} fixture; "
+        f"Python {report['environment']['python']}, LibreOffice "
+        f"{'available' if report['environment']['libreoffice'] else 'not installed (convert stage falls back to DOCX)'}, "
+        f"{report['repeat']} run(s) per case, notifications {'faked' if report['notify'] else 'disabled'}.",
+        '',
+        '| Sheets | Tables | Run | ' + ' | '.join(s.capitalize() for s in STAGES) + ' | Total (s) | Sheet API calls |',
+        '|---:|---:|---|' + '---:|' * (len(STAGES) + 2),
+    ]
+    for case in report['cases']:
+        for run in ('cold', 'warm_median'):
+            if run not in case:
+                continue
+            data = case[run]
+            stages = ' | '.join(f"{data['timings'].get(s, 0):.3f}" for s in STAGES)
+            calls = data['api_calls']
+            lines.append(f"| {case['sheets']} | {case['tables']} | {run.replace('_', ' ')} | {stages} | "
+                         f"{data['total']:.3f} | {calls['get_all_values']} grid, {calls['request']} revision |")
+    failing = [c for c in report['cases'] if any(r['errors'] for r in c['runs'])]
+    if failing:
+        lines += ['', '## Errors', '']
+        for case in failing:
+            for error in dict.fromkeys(e for r in case['runs'] for e in r['errors']):
+                lines.append(f"- {case['sheets']} sheet(s) x {case['tables']} table(s): {error}")
+    if regressions is not None:
+        lines += ['', '## Regressions', '']
+        if not regressions:
+            lines.append('None.')
+        for r in regressions:
+            lines.append(f"- {r['sheets']} sheet(s) x {r['tables']} table(s), {r['run']} {r['stage']}: "
+                         f"{r['baseline']:.3f}s -> {r['current']:.3f}s")
+    return '\n'.join(lines) + '\n'
+
+
+def _int_list(value):
+    return [int(part) for part in value.split(',') if part.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark reactor report generation with recorded sheet fixtures')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    record_parser = subparsers.add_parser('record', help='Record live reactor sheets into a fixture file')
+    record_parser.add_argument('--date', required=True, help='Input date (dd/mm/yyyy)')
+    record_parser.add_argument('--out', required=True, help='Fixture path (.json or .json.gz)')
+    record_parser.add_argument('--config-sheet-id', help='Reactor configuration spreadsheet id')
+
+    run_parser = subparsers.add_parser('run', help='Replay a fixture and write benchmark.json / benchmark.md')
+    run_parser.add_argument('--fixture', help='Recorded fixture (a synthetic sheet is used when omitted)')
+    run_parser.add_argument('--out', required=True, help='Report directory')
+    run_parser.add_argument('--sheets', type=_int_list, default=list(DEFAULT_SHEET_COUNTS), help='e.g. 1,3,6')
+    run_parser.add_argument('--tables', type=_int_list, default=list(DEFAULT_TABLE_COUNTS), help='e.g. 5,20,50')
+    run_parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    run_parser.add_argument('--template', help='Reactor report template (a blank document when omitted)')
+    run_parser.add_argument('--no-notify', action='store_true', help='Skip the (faked) notification stage')
+    run_parser.add_argument('--baseline', help='Previous benchmark.json to compare against')
+    run_parser.add_argument('--max-regression', type=float, default=0.25,
+                            help='Allowed slowdown per stage as a fraction of the baseline')
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    logger = logging.getLogger('reactor_benchmark')
+    logger.setLevel(logging.INFO)
+
+    if args.command == 'record':
+        fixture = record_fixture(args.date, args.out, args.config_sheet_id, logger)
+        print(f"Recorded {len(fixture['sheets'])} sheet(s) to {args.out}")
+        return 0
+
+    fixture = load_fixture(args.fixture) if args.fixture else synthetic_fixture()
+    report = run_benchmark(fixture, args.sheets, args.tables, max(1, args.repeat), args.template,
+                           notify=not args.no_notify, logger=logger)
+    regressions = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_reports(report, json.load(f), args.max_regression)
+        report['regressions'] = regressions
+
+    os.makedirs(args.out, exist_ok=True)
+    with open(os.path.join(args.out, 'benchmark.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    markdown = render_markdown(report, regressions)
+    with open(os.path.join(args.out, 'benchmark.md'), 'w') as f:
+        f.write(markdown)
+    print(markdown)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,169 @@
+# reactor_date_index.py - Persistent date -> sheet id index over the Sheet_ID_Reactor mapping tab
+import os
+import gzip
+import json
+import bisect
+import hashlib
+import logging
+import threading
+from datetime import datetime, date
+
+REACTOR_DATE_INDEX_DIR = os.getenv(
+    'REACTOR_DATE_INDEX_DIR',
+    os.path.join(os.getenv('OUTPUT_DIR', os.path.join(os.path.expanduser('~'), 'Salary_Slips')), 'reactor_date_index')
+)
+
+# Same formats, in the same order, as the mapping parser in process_reactor_reports always used
+MAPPING_DATE_FORMATS = ["%d/%m/%y", "%d/%m/%Y", "%m/%d/%Y", "%Y-%m-%d"]
+
+
+def parse_mapping_date(value):
+    """Parse a mapping-tab date with the first matching format, or return None"""
+    for fmt in MAPPING_DATE_FORMATS:
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def _rows_digest(rows, digest=None):
+    digest = digest or hashlib.sha256()
+    for row in rows:
+        digest.update(json.dumps(row, separators=(',', ':')).encode('utf-8'))
+        digest.update(b'\n')
+    return digest
+
+
+class SheetDateMap:
+    """Read-only date -> sheet id lookups; later mapping rows win for duplicate dates"""
+
+    def __init__(self, entries):
+        self._entries = entries
+        self._dates = sorted(entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, day):
+        return day in self._entries
+
+    def get(self, day, default=None):
+        return self._entries.get(day, default)
+
+    def window(self, start, end):
+        """(date, sheet_id) pairs with start <= date <= end, oldest first"""
+        lo = bisect.bisect_left(self._dates, start)
+        hi = bisect.bisect_right(self._dates, end)
+        return [(day, self._entries[day]) for day in self._dates[lo:hi]]
+
+
+class ReactorDateIndex:
+    """
+    Incrementally maintained index of the Sheet_ID_Reactor tab.
+
+    The tab only grows by appended rows, so a sync parses just the rows after the last synced
+    one. The synced prefix is verified with a digest; if earlier rows were edited or removed the
+    index is rebuilt from scratch. State is kept in memory and as gzipped JSON, one file per
+    mapping tab (identified by its header and first data row).
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, cache_dir=REACTOR_DATE_INDEX_DIR):
+        self.cache_dir = cache_dir
+        self._states = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _index_key(mapping_data):
+        return _rows_digest(mapping_data[:2]).hexdigest()[:16]
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json.gz")
+
+    def _load(self, key):
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('version') != self.FORMAT_VERSION:
+                return None
+            state['entries'] = {date.fromisoformat(d): sheet_id for d, sheet_id in state['entries'].items()}
+            return state
+        except Exception as e:
+            logging.warning(f"Discarding unreadable reactor date index {path}: {e}")
+            return None
+
+    def _persist(self, key, state):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{self._path(key)}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                json.dump({
+                    'version': self.FORMAT_VERSION,
+                    'rows_synced': state['rows_synced'],
+                    'digest': state['digest'],
+                    'entries': {d.isoformat(): sheet_id for d, sheet_id in state['entries'].items()},
+                    'synced_at': datetime.now().isoformat()
+                }, f)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            logging.warning(f"Could not persist reactor date index {key}: {e}")
+
+    def sync(self, mapping_data, warnings=None):
+        """
+        Bring the index up to date with the mapping tab values (header row first).
+
+        Args:
+            mapping_data: Rows of Sheet_ID_Reactor as returned by get_all_values()
+            warnings: Optional list that receives messages for rows that could not be read
+
+        Returns:
+            SheetDateMap: Lookups by date or date window
+        """
+        if not mapping_data:
+            return SheetDateMap({})
+        rows = mapping_data[1:]
+        key = self._index_key(mapping_data)
+
+        with self._lock:
+            state = self._states.get(key) or self._load(key)
+            start = 0
+            if state and state['rows_synced'] <= len(rows):
+                prefix_digest = _rows_digest(rows[:state['rows_synced']])
+                if prefix_digest.hexdigest() == state['digest']:
+                    start = state['rows_synced']
+                    entries = dict(state['entries'])
+                    digest = prefix_digest
+            if not start:
+                entries = {}
+                digest = hashlib.sha256()
+            if state and start == len(rows) and start == state['rows_synced']:
+                self._states[key] = state
+                return SheetDateMap(state['entries'])
+
+            for row in rows[start:]:
+                try:
+                    date_str = row[0].strip()
+                    sheet_id = row[1].strip() if len(row) > 1 else None
+                    if not date_str or not sheet_id:
+                        continue
+                    day = parse_mapping_date(date_str)
+                    if day:
+                        entries[day] = sheet_id
+                except Exception as e:
+                    if warnings is not None:
+                        warnings.append(f"Error processing sheet mapping row: {e}")
+            _rows_digest(rows[start:], digest)
+
+            state = {'rows_synced': len(rows), 'digest': digest.hexdigest(), 'entries': entries}
+            self._states[key] = state
+            self._persist(key, state)
+            logging.info(f"Reactor date index synced: {len(rows) - start} new row(s), {len(entries)} dates")
+            return SheetDateMap(entries)
+
+
+reactor_date_index = ReactorDateIndex()
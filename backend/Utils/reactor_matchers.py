@@ -0,0 +1,156 @@
+# reactor_matchers.py - Precompiled row/header/date matchers for reactor sheets
+import re
+from datetime import datetime
+from itertools import islice
+
+REACTOR_CONFIG = {
+    'charging_operations': {
+        'patterns': [
+            'charging',
+            'charge',
+            'charging (with circulation)',
+            'charging with circulation',
+            'charging operation',
+            'start charging',
+            'reactor charging',
+            'material charging'
+        ],
+        'date_column_keywords': [
+            'Start Date & Time',
+            'Start Date',
+            'Start Time',
+            'Start Date\n& Time',
+            'Charging Start Date',
+            'Operation Start Date',
+            'Process Start Date',
+            'Begin Date',
+            'Initiation Date'
+        ]
+    },
+    'drain_valve_operations': {
+        'patterns': [
+            'ml & a & b drain valve',
+            'ml and a and b drain valve',
+            'drain valve',
+            'ml drain valve',
+            'a & b drain valve',
+            'drain operation',
+            'valve drain',
+            'ml drain',
+            'a b drain',
+            'drain process'
+        ],
+        'date_column_keywords': [
+            'End Date & Time',
+            'End Date',
+            'End Time',
+            'End Date\n& Time',
+            'Drain End Date',
+            'Operation End Date',
+            'Process End Date',
+            'Completion Date',
+            'Finish Date',
+            'Termination Date'
+        ]
+    },
+    'required_columns': [
+        'Particulars',
+        'Description',
+        'Operation',
+        'Process Step'
+    ]
+}
+
+# Formats tried (in this order) for dates found inside reactor sheets
+REACTOR_DATE_FORMATS = [
+    "%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y", "%Y/%m/%d",
+    "%d/%m/%y", "%m/%d/%y", "%d-%m-%y", "%y-%m-%d"
+]
+
+
+def _normalize_header(name):
+    return name.strip().lower()
+
+
+class OperationMatcher:
+    """Finds the first data row whose operation text contains any of the configured patterns"""
+
+    def __init__(self, patterns, date_column_keywords=()):
+        self.patterns = list(patterns)
+        self.date_column_keywords = list(date_column_keywords)
+        # Longest first so the reported match is the most specific one
+        alternation = '|'.join(re.escape(p.lower()) for p in sorted(self.patterns, key=len, reverse=True))
+        self._regex = re.compile(alternation)
+
+    def matches(self, text):
+        return self._regex.search(text.strip().lower()) is not None
+
+    def find_row(self, data, column_idx, first_data_row=2):
+        """Return the first row (Row 3 onwards by default) of a grid or row list whose column matches, or None"""
+        search = self._regex.search
+        for row in islice(data, first_data_row, None):
+            if len(row) > column_idx and search(row[column_idx].strip().lower()):
+                return row
+        return None
+
+
+class HeaderIndex:
+    """Normalized header -> column index map built once per sheet"""
+
+    def __init__(self, headers):
+        self.headers = headers
+        self._index = {}
+        for i, header in enumerate(headers):
+            self._index.setdefault(_normalize_header(header), i)
+
+    def find(self, name):
+        return self._index.get(_normalize_header(name))
+
+    def find_any(self, names):
+        """Index of the first name (in the given order) present in the headers, or None"""
+        for name in names:
+            idx = self._index.get(_normalize_header(name))
+            if idx is not None:
+                return idx
+        return None
+
+    def __contains__(self, name):
+        return _normalize_header(name) in self._index
+
+
+class DateParser:
+    """
+    Parses date cells with the formats in their fixed priority order.
+
+    Results are memoized per value, so one instance per sheet parses each distinct date once.
+    An ambiguous value (e.g. 03/04/2025) always resolves to the same format, whatever was
+    parsed before it.
+    """
+
+    def __init__(self, formats=REACTOR_DATE_FORMATS):
+        self.formats = list(formats)
+        self._cache = {}
+
+    def parse(self, value):
+        """Return (normalized 'YYYY-MM-DD', datetime) or (None, None); any time part is ignored"""
+        if not value:
+            return None, None
+        date_part = value.split()[0] if ' ' in value else value
+        if date_part in self._cache:
+            return self._cache[date_part]
+
+        parsed = (None, None)
+        for fmt in self.formats:
+            try:
+                parsed_date = datetime.strptime(date_part, fmt)
+            except ValueError:
+                continue
+            parsed = (parsed_date.strftime("%Y-%m-%d"), parsed_date)
+            break
+        self._cache[date_part] = parsed
+        return parsed
+
+
+CHARGING_MATCHER = OperationMatcher(**REACTOR_CONFIG['charging_operations'])
+DRAIN_VALVE_MATCHER = OperationMatcher(**REACTOR_CONFIG['drain_valve_operations'])
+REQUIRED_COLUMNS = REACTOR_CONFIG['required_columns']
@@ -0,0 +1,317 @@
+# reactor_scheduler.py - Runs reactor reports for all configured plants on a schedule or on demand
+import os
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import gspread
+from Utils.config import creds
+from Utils.job_store import job_store as default_job_store
+from Utils.reactor_date_index import reactor_date_index
+from Utils.file_lock import FileLock, claim, purge_claims
+from Utils.temp_manager import get_job_temp_dir, cleanup_job_temp_dir
+
+REACTOR_CONFIG_SHEET_ID = "1XOLQvy6j7syAlOKpQ3J2o6DcgiSZsSO1xxWlWih_QOY"
+REACTOR_CONFIG_TABS = ('Sheet_ID_Reactor', 'Recipients', 'Table Ranges')
+
+# Plant definitions. 'schedule' is a list of local "HH:MM" times; 'run_as' is the user whose
+# email account sends scheduled reports. Override with a JSON file via REACTOR_PLANTS_FILE.
+DEFAULT_REACTOR_PLANTS = {
+    'KR': {
+        'config_sheet_id': REACTOR_CONFIG_SHEET_ID,
+        'template': 'reactorreportformat.docx',
+        'schedule': [],
+        'run_as': None,
+        'send_email': True,
+        'send_whatsapp': True,
+        'process_name': 'reactor-report',
+        'date_offset_days': 0
+    }
+}
+
+REACTOR_SCHEDULER_WORKERS = int(os.getenv('REACTOR_SCHEDULER_WORKERS', '3'))
+REACTOR_SCHEDULER_POLL_SECONDS = int(os.getenv('REACTOR_SCHEDULER_POLL_SECONDS', '30'))
+# A scheduled time is only fired within this window, so a restart does not replay old runs
+REACTOR_SCHEDULER_GRACE_MINUTES = int(os.getenv('REACTOR_SCHEDULER_GRACE_MINUTES', '30'))
+REACTOR_BACKFILL_MAX_DAYS = int(os.getenv('REACTOR_BACKFILL_MAX_DAYS', '62'))
+# Schedule claims older than this are deleted (they only need to outlive the grace window)
+REACTOR_SCHEDULE_CLAIM_MAX_AGE_SECONDS = 2 * 24 * 3600
+
+_INPUT_DATE_FORMATS = ["%d/%m/%y", "%d/%m/%Y", "%m/%d/%Y", "%Y-%m-%d"]
+
+
+class ReactorRunConflict(Exception):
+    """A run for the same plant and date is active with a different owner or options"""
+
+    def __init__(self, message, job=None):
+        super().__init__(message)
+        self.job = job
+
+
+def load_reactor_plants():
+    """Plant configuration from REACTOR_PLANTS_FILE merged over the defaults"""
+    plants = {name: dict(config) for name, config in DEFAULT_REACTOR_PLANTS.items()}
+    path = os.getenv('REACTOR_PLANTS_FILE')
+    if path:
+        try:
+            with open(path) as f:
+                for name, config in json.load(f).items():
+                    plants[name] = {**plants.get(name, DEFAULT_REACTOR_PLANTS['KR']), **config}
+        except Exception as e:
+            logging.error(f"Could not load reactor plant configuration from {path}: {e}")
+    return plants
+
+
+def _date_key(input_date):
+    """Normalize an input date so '05/03/2025' and '2025-03-05' share one run lock"""
+    for fmt in _INPUT_DATE_FORMATS:
+        try:
+            return datetime.strptime(input_date, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return input_date
+
+
+class ReactorScheduler:
+    """
+    Fans reactor report runs for several plants out over a worker pool.
+
+    All runs share one authorized Sheets client; PDF conversion is already serialized
+    in convert_docx_to_pdf. Only one run per (plant, date) is active at a time: a second
+    trigger with the same owner and options returns the running job, any other one raises
+    ReactorRunConflict. Runs hold a file lock so the rule also holds across gunicorn workers.
+    Every run is recorded in the job store.
+
+    Every gunicorn worker builds its own scheduler, so each scheduled time is claimed through
+    file_lock.claim before it is triggered; only the worker that wins the claim runs it.
+    """
+
+    def __init__(self, output_dir, base_dir, logger=None, plants=None, job_store=None,
+                 max_workers=REACTOR_SCHEDULER_WORKERS):
+        self.output_dir = output_dir
+        self.base_dir = base_dir
+        self.logger = logger or logging.getLogger(__name__)
+        self.plants = plants if plants is not None else load_reactor_plants()
+        self.job_store = job_store or default_job_store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='reactor-report')
+        self._lock = threading.Lock()
+        self._active = {}      # (plant, date) -> (job id, run options)
+        self._futures = {}     # job id -> Future
+        self._fired = set()    # (plant, date, "HH:MM") already handled by this process
+        self._sheets_client = None
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def sheets_client(self):
+        with self._lock:
+            if self._sheets_client is None:
+                self._sheets_client = gspread.authorize(creds)
+            return self._sheets_client
+
+    def trigger(self, plant, input_date, user_id, send_email=True, send_whatsapp=True, process_name=None,
+                google_access_token=None, google_refresh_token=None, source='manual', job_id=None, dry_run=False):
+        """
+        Queue a reactor report run. ``job_id`` lets the caller subscribe to the progress stream
+        before the run starts. A ``dry_run`` reads the sheets and returns an execution plan
+        without rendering or sending; it does not join or block a real run for the same date.
+
+        Returns:
+            tuple: (job dict, created) - created is False when the same plant/date is already running
+
+        Raises:
+            ReactorRunConflict: The plant/date is running for another user, with other options,
+                or in another worker process
+        """
+        if plant not in self.plants:
+            raise ValueError(f"Unknown reactor plant '{plant}'")
+        config = self.plants[plant]
+        process_name = process_name or config.get('process_name', 'reactor-report')
+        date_key = _date_key(input_date)
+        key = (plant, date_key) + (('dry_run',) if dry_run else ())
+        options = (user_id, bool(send_email), bool(send_whatsapp), process_name)
+        with self._lock:
+            running = self._active.get(key)
+            if running:
+                running_id, running_options = running
+                if running_options != options:
+                    raise ReactorRunConflict(
+                        f"A reactor report for {plant} on {input_date} is already running with different options",
+                        job=self.job_store.get(running_id))
+                return self.job_store.get(running_id), False
+            run_lock = None
+            if not dry_run:
+                # Held until _run finishes; another worker process may own this plant/date
+                run_lock = FileLock(f"reactor_run_{plant}_{date_key}")
+                if not run_lock.acquire(blocking=False):
+                    raise ReactorRunConflict(f"A reactor report for {plant} on {input_date} is already running")
+            try:
+                job = self.job_store.create('reactor_report', owner=user_id, params={
+                    'plant': plant,
+                    'date': input_date,
+                    'send_email': send_email,
+                    'send_whatsapp': send_whatsapp,
+                    'process_name': process_name,
+                    'source': source,
+                    'dry_run': dry_run
+                }, job_id=job_id)
+                self._futures[job['id']] = self._executor.submit(
+                    self._run, key, job['id'], config, input_date, user_id, send_email, send_whatsapp,
+                    process_name, google_access_token, google_refresh_token, dry_run, run_lock
+                )
+            except Exception:
+                if run_lock:
+                    run_lock.release()
+                raise
+            self._active[key] = (job['id'], options)
+        self.logger.info(f"Queued reactor report job {job['id']} for {plant} on {input_date} ({source})")
+        return job, True
+
+    def wait(self, job_id, timeout=None):
+        """Block until a job started by this scheduler finishes; returns the stored job"""
+        future = self._futures.get(job_id)
+        if future is not None:
+            future.result(timeout=timeout)
+        return self.job_store.get(job_id)
+
+    def backfill(self, plant, start_date, end_date, user_id, send_email=False, send_whatsapp=False, process_name=None):
+        """
+        Queue one run for every date between start_date and end_date (datetime.date, inclusive)
+        that has a sheet in the plant's Sheet_ID_Reactor tab.
+
+        Returns:
+            list: [{'date', 'sheet_id', 'job_id', 'created'}] in date order; dates that could not be
+                queued because of a conflicting run also carry 'conflict'
+        """
+        if plant not in self.plants:
+            raise ValueError(f"Unknown reactor plant '{plant}'")
+        if end_date < start_date:
+            raise ValueError("end_date must not be before start_date")
+        if (end_date - start_date).days + 1 > REACTOR_BACKFILL_MAX_DAYS:
+            raise ValueError(f"Backfill is limited to {REACTOR_BACKFILL_MAX_DAYS} days")
+
+        config_sheet_id = self.plants[plant].get('config_sheet_id', REACTOR_CONFIG_SHEET_ID)
+        mapping = self.sheets_client().open_by_key(config_sheet_id).worksheet(REACTOR_CONFIG_TABS[0]).get_all_values()
+        queued = []
+        for day, sheet_id in reactor_date_index.sync(mapping).window(start_date, end_date):
+            try:
+                job, created = self.trigger(plant, day.strftime("%Y-%m-%d"), user_id,
+                                            send_email=send_email, send_whatsapp=send_whatsapp,
+                                            process_name=process_name, source='backfill')
+            except ReactorRunConflict as e:
+                queued.append({'date': day.isoformat(), 'sheet_id': sheet_id, 'job_id': e.job['id'] if e.job else None,
+                               'created': False, 'conflict': str(e)})
+                continue
+            queued.append({'date': day.isoformat(), 'sheet_id': sheet_id, 'job_id': job['id'], 'created': created})
+        self.logger.info(f"Backfill for {plant} {start_date}..{end_date} queued {len(queued)} run(s)")
+        return queued
+
+    def _fetch_config_tabs(self, config_sheet_id):
+        spreadsheet = self.sheets_client().open_by_key(config_sheet_id)
+        return [spreadsheet.worksheet(tab).get_all_values() for tab in REACTOR_CONFIG_TABS]
+
+    def _run(self, key, job_id, config, input_date, user_id, send_email, send_whatsapp, process_name,
+             google_access_token, google_refresh_token, dry_run=False, run_lock=None):
+        # Imported here: process_utils pulls in the Flask/notification stack
+        from Utils.process_utils import process_reactor_reports
+
+        plant = key[0]
+        self.job_store.start(job_id)
+        try:
+            template_path = os.path.join(self.base_dir, config.get('template', 'reactorreportformat.docx'))
+            if not os.path.exists(template_path):
+                raise FileNotFoundError("Reactor report template not found")
+
+            self.job_store.set_progress(job_id, 'fetch_config', f"Loading reactor configuration for {plant}")
+            sheet_id_mapping_data, sheet_recipients_data, table_range_data = self._fetch_config_tabs(
+                config.get('config_sheet_id', REACTOR_CONFIG_SHEET_ID))
+
+            # Per-job directory: runs of other plants/dates for the same user clean up only their own files
+            temp_dir = get_job_temp_dir(user_id, job_id, self.output_dir)
+            try:
+                self.job_store.set_progress(job_id, 'generate', f"Generating reactor report for {plant}")
+                result = process_reactor_reports(
+                    sheet_id_mapping_data=sheet_id_mapping_data,
+                    sheet_recipients_data=sheet_recipients_data,
+                    table_range_data=table_range_data,
+                    input_date=input_date,
+                    user_id=user_id,
+                    send_email=send_email,
+                    send_whatsapp=send_whatsapp,
+                    template_path=template_path,
+                    output_dir=temp_dir,
+                    gspread_client=self.sheets_client(),
+                    logger=self.logger,
+                    process_name=process_name,
+                    google_access_token=google_access_token,
+                    google_refresh_token=google_refresh_token,
+                    progress=self.job_store.emitter(job_id),
+                    dry_run=dry_run,
+                    plant=plant
+                )
+            finally:
+                cleanup_job_temp_dir(user_id, job_id, self.output_dir)
+
+            self.job_store.complete(job_id, result)
+            self.logger.info(f"Reactor report job {job_id} for {plant} finished: {result.get('message')}")
+        except Exception as e:
+            self.logger.error(f"Reactor report job {job_id} for {plant} failed: {e}", exc_info=True)
+            self.job_store.fail(job_id, e)
+        finally:
+            with self._lock:
+                self._active.pop(key, None)
+                self._futures.pop(job_id, None)
+            if run_lock:
+                run_lock.release()
+
+    def _tick(self, now):
+        grace = timedelta(minutes=REACTOR_SCHEDULER_GRACE_MINUTES)
+        for plant, config in self.plants.items():
+            run_as = config.get('run_as')
+            if not config.get('schedule') or not run_as:
+                continue
+            input_date = (now - timedelta(days=config.get('date_offset_days', 0))).strftime("%Y-%m-%d")
+            for run_time in config['schedule']:
+                try:
+                    hour, minute = (int(part) for part in run_time.split(':'))
+                except ValueError:
+                    self.logger.warning(f"Ignoring invalid schedule time '{run_time}' for plant {plant}")
+                    continue
+                scheduled_at = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+                fired_key = (plant, now.strftime("%Y-%m-%d"), run_time)
+                if fired_key in self._fired or not (scheduled_at <= now < scheduled_at + grace):
+                    continue
+                self._fired.add(fired_key)
+                if not claim(f"reactor_schedule_{plant}_{fired_key[1]}_{run_time}"):
+                    # Another worker process fired this slot
+                    continue
+                try:
+                    self.trigger(plant, input_date, run_as,
+                                 send_email=config.get('send_email', True),
+                                 send_whatsapp=config.get('send_whatsapp', True),
+                                 source='schedule')
+                except Exception as e:
+                    self.logger.error(f"Could not trigger scheduled reactor report for {plant}: {e}")
+        # Forget fired markers from previous days
+        today = now.strftime("%Y-%m-%d")
+        self._fired = {k for k in self._fired if k[1] == today}
+        purge_claims(REACTOR_SCHEDULE_CLAIM_MAX_AGE_SECONDS)
+
+    def _loop(self):
+        while not self._stop_event.wait(REACTOR_SCHEDULER_POLL_SECONDS):
+            try:
+                self._tick(datetime.now())
+            except Exception as e:
+                self.logger.error(f"Reactor scheduler tick failed: {e}", exc_info=True)
+
+    def start(self):
+        """Start the background schedule loop (manual triggers work without it)"""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._loop, name='reactor-scheduler', daemon=True)
+        self._thread.start()
+        self.logger.info(f"Reactor scheduler started for plants: {', '.join(self.plants)}")
+
+    def stop(self):
+        self._stop_event.set()
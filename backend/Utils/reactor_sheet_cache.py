@@ -0,0 +1,216 @@
+# reactor_sheet_cache.py - Persistent on-disk caches for reactor sheet grids and rendered report fragments
+import os
+import gzip
+import json
+import hashlib
+import logging
+import threading
+from collections import namedtuple
+from datetime import datetime
+from lxml import etree
+from docx.oxml import parse_xml
+from Utils.cache_utils import TTLCache
+
+DRIVE_FILES_URL = 'https://www.googleapis.com/drive/v3/files'
+
+REACTOR_SHEET_CACHE_DIR = os.getenv(
+    'REACTOR_SHEET_CACHE_DIR',
+    os.path.join(os.getenv('OUTPUT_DIR', os.path.join(os.path.expanduser('~'), 'Salary_Slips')), 'reactor_sheet_cache')
+)
+
+REACTOR_FRAGMENT_CACHE_DIR = os.getenv(
+    'REACTOR_FRAGMENT_CACHE_DIR',
+    os.path.join(os.path.dirname(REACTOR_SHEET_CACHE_DIR), 'reactor_fragment_cache')
+)
+
+# Stands in for a gspread worksheet when a grid is served from the cache (only the title is used)
+CachedWorksheet = namedtuple('CachedWorksheet', ['title'])
+
+
+def get_drive_revision(gspread_client, sheet_id):
+    """Return {'modifiedTime', 'version'} for a spreadsheet using the client's authorized session"""
+    response = gspread_client.request(
+        'get', f"{DRIVE_FILES_URL}/{sheet_id}",
+        params={'fields': 'modifiedTime,version', 'supportsAllDrives': True}
+    )
+    return response.json()
+
+
+class ReactorSheetCache:
+    """
+    Grids of reactor sheets stored as gzipped JSON, one file per sheet id.
+
+    An entry is reused while the spreadsheet's Drive version/modifiedTime is unchanged.
+    Sheets marked closed (drain valve end date filled in and in the past) are served
+    without contacting Google at all.
+    """
+
+    def __init__(self, cache_dir=REACTOR_SHEET_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+
+    def _path(self, sheet_id):
+        safe_id = ''.join(c for c in sheet_id if c.isalnum() or c in '-_')
+        return os.path.join(self.cache_dir, f"{safe_id}.json.gz")
+
+    def load(self, sheet_id):
+        path = self._path(sheet_id)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            logging.warning(f"Discarding unreadable reactor sheet cache entry {path}: {e}")
+            return None
+
+    def store(self, sheet_id, title, grid, revision, closed=False):
+        entry = {
+            'sheet_id': sheet_id,
+            'title': title,
+            'grid': grid,
+            'modified_time': revision.get('modifiedTime'),
+            'version': revision.get('version'),
+            'closed': closed,
+            'cached_at': datetime.now().isoformat()
+        }
+        path = self._path(sheet_id)
+        with self._lock:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, path)
+
+    def mark_closed(self, sheet_id):
+        """Flag a cached sheet as closed so later runs never refetch it"""
+        entry = self.load(sheet_id)
+        if entry and not entry.get('closed'):
+            try:
+                self.store(sheet_id, entry['title'], entry['grid'],
+                           {'modifiedTime': entry.get('modified_time'), 'version': entry.get('version')}, closed=True)
+            except Exception as e:
+                logging.warning(f"Could not mark reactor sheet {sheet_id} as closed: {e}")
+
+    def fetch(self, gspread_client, sheet_id, logger=None):
+        """
+        Return (worksheet, grid) for the first worksheet of a spreadsheet, using the cache when possible.
+
+        Returns:
+            tuple: (worksheet or CachedWorksheet, list of rows)
+        """
+        log = logger or logging
+        entry = self.load(sheet_id)
+        if entry and entry.get('closed'):
+            log.info(f"Reactor sheet {sheet_id} served from cache (closed)")
+            return CachedWorksheet(entry['title']), entry['grid']
+
+        revision = None
+        try:
+            revision = get_drive_revision(gspread_client, sheet_id)
+        except Exception as e:
+            log.warning(f"Could not read Drive revision for sheet {sheet_id}, bypassing cache: {e}")
+
+        if entry and revision and (
+            (revision.get('version') and revision.get('version') == entry.get('version')) or
+            (revision.get('modifiedTime') and revision.get('modifiedTime') == entry.get('modified_time'))
+        ):
+            log.info(f"Reactor sheet {sheet_id} served from cache (unchanged since {entry.get('modified_time')})")
+            return CachedWorksheet(entry['title']), entry['grid']
+
+        worksheet = gspread_client.open_by_key(sheet_id).sheet1  # Assume first worksheet
+        grid = worksheet.get_all_values()
+        if revision:
+            try:
+                self.store(sheet_id, worksheet.title, grid, revision)
+            except Exception as e:
+                log.warning(f"Could not cache reactor sheet {sheet_id}: {e}")
+        return worksheet, grid
+
+
+class ReactorFragmentCache:
+    """
+    Rendered DOCX body fragments (table titles, tables, spacing) for one reactor sheet.
+
+    One entry per sheet id, tagged with a digest of the sheet grid and the table range
+    definitions; a fragment is only reused when the digest matches, so the output is
+    identical. Storing a new fragment for a sheet replaces its previous one, so the cache
+    holds at most one fragment per sheet. Fragments are kept in memory and as gzipped
+    JSON on disk.
+    """
+
+    # Bump when the rendering code changes so stale fragments are not stitched in
+    FORMAT_VERSION = 1
+
+    def __init__(self, cache_dir=REACTOR_FRAGMENT_CACHE_DIR, max_memory_entries=64):
+        self.cache_dir = cache_dir
+        self._memory = TTLCache(max_entries=max_memory_entries)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def make_key(cls, sheet_id, grid, table_defs):
+        payload = json.dumps([cls.FORMAT_VERSION, sheet_id, grid, table_defs], separators=(',', ':'))
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def body_position(doc):
+        """Index in the document body where the next block element will be inserted"""
+        body = doc.element.body
+        return len(body) - (1 if body.sectPr is not None else 0)
+
+    def _path(self, sheet_id):
+        safe_id = ''.join(c for c in sheet_id if c.isalnum() or c in '-_')
+        return os.path.join(self.cache_dir, f"{safe_id}.json.gz")
+
+    def load(self, sheet_id, key):
+        """The sheet's fragment if it was rendered from the same content (make_key), else None"""
+        fragment = self._memory.get(sheet_id)
+        if fragment is None:
+            path = self._path(sheet_id)
+            if not os.path.exists(path):
+                return None
+            try:
+                with gzip.open(path, 'rt', encoding='utf-8') as f:
+                    fragment = json.load(f)
+            except Exception as e:
+                logging.warning(f"Discarding unreadable reactor fragment {path}: {e}")
+                return None
+            self._memory.set(sheet_id, fragment)
+        return fragment if fragment.get('key') == key else None
+
+    def store(self, sheet_id, key, doc, start, warnings, content_added):
+        """Serialize the body elements added since ``start`` (see body_position), replacing the sheet's previous fragment"""
+        body = doc.element.body
+        elements = list(body)[start:self.body_position(doc)]
+        fragment = {
+            'key': key,
+            'elements': [etree.tostring(element, encoding='unicode') for element in elements],
+            'warnings': list(warnings),
+            'content_added': content_added
+        }
+        self._memory.set(sheet_id, fragment)
+        try:
+            with self._lock:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = f"{self._path(sheet_id)}.{threading.get_ident()}.tmp"
+                with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+                    json.dump(fragment, f)
+                os.replace(tmp_path, self._path(sheet_id))
+        except Exception as e:
+            logging.warning(f"Could not persist reactor fragment for sheet {sheet_id}: {e}")
+
+    @staticmethod
+    def insert(doc, fragment):
+        """Stitch a cached fragment into the document body before the final section properties"""
+        body = doc.element.body
+        sect_pr = body.sectPr
+        for xml in fragment['elements']:
+            element = parse_xml(xml)
+            if sect_pr is not None:
+                sect_pr.addprevious(element)
+            else:
+                body.append(element)
+
+
+reactor_sheet_cache = ReactorSheetCache()
+reactor_fragment_cache = ReactorFragmentCache()
@@ -0,0 +1,146 @@
+# report_runs.py - Server-side record of general report runs with failed recipients, for targeted retries
+import os
+import gzip
+import json
+import time
+import shutil
+import logging
+import threading
+from datetime import datetime
+
+from Utils.upload_buffers import UploadBuffer
+
+REPORT_RUN_DIR = os.getenv(
+    'REPORT_RUN_DIR',
+    os.path.join(os.getenv('OUTPUT_DIR', os.path.join(os.path.expanduser('~'), 'Salary_Slips')), 'report_runs')
+)
+# Runs older than this are removed the next time a run is saved
+REPORT_RUN_RETENTION_HOURS = float(os.getenv('REPORT_RUN_RETENTION_HOURS', '72'))
+
+
+class ReportRunStore:
+    """
+    One directory per run id: ``run.json.gz`` holds the run record and ``attachments/`` a copy
+    of the uploaded attachments (the per-user temp dir is cleaned up when the run finishes).
+
+    A run record is a plain dict: {'id', 'owner', 'sheet_id', 'sheet_name', 'headers', 'rows'
+    ({row_index: row} for the failed recipients only), 'templates' ([{filename, content}]),
+    'mail_subject', 'whatsapp_file_sequence', 'message_items', 'use_template_as_caption',
+    'send_email', 'send_whatsapp', 'delivery_stats', 'attempts', 'created_at', 'updated_at'}.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, store_dir=REPORT_RUN_DIR, retention_hours=REPORT_RUN_RETENTION_HOURS):
+        self.store_dir = store_dir
+        self.retention_hours = retention_hours
+        self._lock = threading.Lock()
+
+    def _run_dir(self, run_id):
+        return os.path.join(self.store_dir, run_id)
+
+    def _record_path(self, run_id):
+        return os.path.join(self._run_dir(run_id), 'run.json.gz')
+
+    def _write(self, record):
+        path = self._record_path(record['id'])
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as f:
+            json.dump({'version': self.FORMAT_VERSION, **record}, f, default=str)
+        os.replace(tmp_path, path)
+
+    def save(self, run_id, owner, record, attachment_paths=None):
+        """
+        Store a run and copy its attachments next to it.
+
+        Returns:
+            bool: True if the run was written
+        """
+        try:
+            self.purge_expired()
+            attachments_dir = os.path.join(self._run_dir(run_id), 'attachments')
+            os.makedirs(attachments_dir, exist_ok=True)
+            attachment_names = []
+            for attachment in attachment_paths or []:
+                # Paths or in-memory UploadBuffers
+                if isinstance(attachment, UploadBuffer):
+                    name = attachment.name
+                    attachment.save(os.path.join(attachments_dir, name))
+                else:
+                    name = os.path.basename(attachment)
+                    shutil.copy2(attachment, os.path.join(attachments_dir, name))
+                attachment_names.append(name)
+            now = datetime.now().isoformat()
+            record = {
+                **record,
+                'id': run_id,
+                'owner': owner,
+                'attachments': attachment_names,
+                'attempts': record.get('attempts', 1),
+                'created_at': now,
+                'updated_at': now
+            }
+            with self._lock:
+                self._write(record)
+            logging.info(f"Saved report run {run_id} with {len(record.get('rows', {}))} failed recipient(s)")
+            return True
+        except Exception as e:
+            logging.warning(f"Could not save report run {run_id}: {e}")
+            return False
+
+    def load(self, run_id):
+        """Return the run record with absolute 'attachment_paths', or None if unknown/expired"""
+        path = self._record_path(run_id)
+        if not run_id or not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                record = json.load(f)
+            if record.pop('version', None) != self.FORMAT_VERSION:
+                return None
+        except Exception as e:
+            logging.warning(f"Discarding unreadable report run {run_id}: {e}")
+            return None
+        attachments_dir = os.path.join(self._run_dir(run_id), 'attachments')
+        record['attachment_paths'] = [
+            os.path.join(attachments_dir, name) for name in record.get('attachments', [])
+            if os.path.exists(os.path.join(attachments_dir, name))
+        ]
+        return record
+
+    def update(self, run_id, **changes):
+        """Apply changes to a stored run; returns the updated record or None"""
+        with self._lock:
+            record = self.load(run_id)
+            if record is None:
+                return None
+            record.pop('attachment_paths', None)
+            record.update(changes)
+            record['updated_at'] = datetime.now().isoformat()
+            try:
+                self._write(record)
+            except Exception as e:
+                logging.warning(f"Could not update report run {run_id}: {e}")
+                return None
+            return record
+
+    def purge_expired(self):
+        """Remove runs older than the retention window; returns the number removed"""
+        if not os.path.isdir(self.store_dir):
+            return 0
+        cutoff = time.time() - self.retention_hours * 3600
+        removed = 0
+        for run_id in os.listdir(self.store_dir):
+            run_dir = self._run_dir(run_id)
+            try:
+                if os.path.isdir(run_dir) and os.path.getmtime(run_dir) < cutoff:
+                    shutil.rmtree(run_dir, ignore_errors=True)
+                    removed += 1
+            except OSError:
+                continue
+        if removed:
+            logging.info(f"Purged {removed} expired report run(s)")
+        return removed
+
+
+report_run_store = ReportRunStore()
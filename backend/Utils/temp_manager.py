@@ -101,6 +101,51 @@ def cleanup_old_user_temp_dirs(base_output_dir: str, max_age_hours: int = 24) ->
         logging.error(f"Error during old temp directories cleanup: {e}")
         return 0
 
+def get_job_temp_dir(user_email: str, job_id: str, base_output_dir: str) -> str:
+    """
+    Get a temporary directory owned by a single job of a user.
+    Concurrent jobs of one user each get their own directory, so cleaning up
+    one job never removes files another job is still writing.
+    
+    Args:
+        user_email: User's email address
+        job_id: Job identifier
+        base_output_dir: Base output directory path
+        
+    Returns:
+        str: Path to the job's directory inside the user's temp directory
+    """
+    sanitized_email = sanitize_email_for_directory(user_email)
+    job_temp_dir = os.path.join(base_output_dir, f"{sanitized_email}_temp", "jobs", job_id)
+    os.makedirs(job_temp_dir, exist_ok=True)
+    logging.info(f"Job temp directory: {job_temp_dir}")
+    return job_temp_dir
+
+def cleanup_job_temp_dir(user_email: str, job_id: str, base_output_dir: str) -> bool:
+    """
+    Clean up the directory of a single job, leaving the rest of the user's temp directory alone.
+    
+    Args:
+        user_email: User's email address
+        job_id: Job identifier
+        base_output_dir: Base output directory path
+        
+    Returns:
+        bool: True if cleanup was successful, False otherwise
+    """
+    try:
+        sanitized_email = sanitize_email_for_directory(user_email)
+        job_temp_dir = os.path.join(base_output_dir, f"{sanitized_email}_temp", "jobs", job_id)
+        
+        if os.path.exists(job_temp_dir):
+            shutil.rmtree(job_temp_dir)
+            logging.info(f"Cleaned up job temp directory: {job_temp_dir}")
+        return True
+            
+    except Exception as e:
+        logging.error(f"Error cleaning up job temp directory for {user_email}/{job_id}: {e}")
+        return False
+
 def sanitize_email_for_directory(email: str) -> str:
     """
     Sanitize email address for use as directory name.
@@ -0,0 +1,81 @@
+# template_engine.py - Compiled {placeholder} templates for report messages, subjects and previews
+import re
+from functools import lru_cache
+
+# {Column Name} - any text without braces or line breaks, matched against sheet headers exactly
+PLACEHOLDER_RE = re.compile(r'\{([^{}\n]+)\}')
+
+
+class CompiledTemplate:
+    """
+    A template split once into literal and placeholder segments.
+
+    render() fills every placeholder in a single pass and joins the parts, so the cost no
+    longer depends on how many columns the sheet has. Placeholders without a value are
+    left in the output unchanged, as the old per-column str.replace loop did.
+    """
+
+    __slots__ = ('text', 'placeholders', '_parts', '_slots')
+
+    def __init__(self, text):
+        self.text = text or ''
+        parts = []
+        slots = []
+        position = 0
+        for match in PLACEHOLDER_RE.finditer(self.text):
+            parts.append(self.text[position:match.start()])
+            slots.append((len(parts), match.group(1)))
+            parts.append(match.group(0))
+            position = match.end()
+        parts.append(self.text[position:])
+        self._parts = parts
+        self._slots = tuple(slots)
+        # Unique names in order of first appearance
+        self.placeholders = tuple(dict.fromkeys(name for _, name in slots))
+
+    def render(self, values, missing=None):
+        """
+        Fill the template from a mapping of column name -> value.
+
+        Args:
+            values: Mapping such as dict(zip(headers, row))
+            missing: Optional set that receives placeholder names with no value
+
+        Returns:
+            str: Rendered text
+        """
+        if not self._slots:
+            return self.text
+        parts = self._parts.copy()
+        for index, name in self._slots:
+            value = values.get(name)
+            if value is None:
+                if missing is not None:
+                    missing.add(name)
+                continue
+            parts[index] = str(value)
+        return ''.join(parts)
+
+    def unknown_placeholders(self, columns):
+        """Placeholder names (in template order) that are not among the given columns"""
+        columns = columns if isinstance(columns, (set, frozenset, dict)) else set(columns)
+        return [name for name in self.placeholders if name not in columns]
+
+
+@lru_cache(maxsize=256)
+def compile_template(text):
+    """Compile (and memoize) a template string"""
+    return CompiledTemplate(text)
+
+
+def render_template(text, values, missing=None):
+    """Render a template string, compiling it on first use"""
+    return compile_template(text or '').render(values, missing)
+
+
+def describe_unknown_placeholders(label, template, columns):
+    """Warning message for placeholders that no sheet column will fill, or None"""
+    unknown = template.unknown_placeholders(columns)
+    if not unknown:
+        return None
+    return f"{label} has placeholders with no matching sheet column: " + ', '.join(f"{{{name}}}" for name in unknown)
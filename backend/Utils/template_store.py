@@ -0,0 +1,149 @@
+# template_store.py - Content-addressed cache of parsed .docx report templates
+import io
+import os
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+from Utils.template_engine import compile_template
+
+# Budget for the cached text of parsed templates (the upload bytes themselves are not kept)
+TEMPLATE_STORE_MAX_BYTES = int(os.getenv('TEMPLATE_STORE_MAX_BYTES', str(16 * 1024 * 1024)))
+TEMPLATE_STORE_MAX_ENTRIES = int(os.getenv('TEMPLATE_STORE_MAX_ENTRIES', '256'))
+
+
+def docx_message_text(doc):
+    """Message body of a template: every paragraph, joined by newlines"""
+    return "\n".join(paragraph.text for paragraph in doc.paragraphs)
+
+
+def docx_preview_text(doc):
+    """Readable preview of a template: non-empty paragraphs (headings spaced out), then tables"""
+    content = []
+
+    # Read paragraphs with proper spacing
+    for para in doc.paragraphs:
+        if para.text.strip():  # Only add non-empty paragraphs
+            # Add extra newline for paragraphs with specific formatting
+            if para.style.name.startswith('Heading') or para.style.name == 'Title':
+                content.append('\n' + para.text.strip() + '\n')
+            else:
+                content.append(para.text.strip())
+
+    # Read tables with proper formatting
+    for table in doc.tables:
+        content.append('\n')  # Add spacing before table
+        for row in table.rows:
+            row_content = []
+            for cell in row.cells:
+                if cell.text.strip():  # Only add non-empty cells
+                    row_content.append(cell.text.strip())
+            if row_content:  # Only add non-empty rows
+                content.append(' | '.join(row_content))
+        content.append('\n')  # Add spacing after table
+
+    # Join content with proper line breaks
+    return '\n'.join(content)
+
+
+class TemplateEntry:
+    """A parsed template: message text, preview text and the compiled message template"""
+
+    __slots__ = ('digest', 'filename', 'text', 'preview', 'compiled', 'size')
+
+    def __init__(self, digest, filename, text, preview):
+        self.digest = digest
+        self.filename = filename
+        self.text = text
+        self.preview = preview
+        self.compiled = compile_template(text)
+        self.size = len(text.encode('utf-8')) + len(preview.encode('utf-8'))
+
+    @property
+    def placeholders(self):
+        return self.compiled.placeholders
+
+
+class TemplateStore:
+    """
+    Parsed templates keyed by the SHA-256 of the uploaded .docx bytes.
+
+    Sending the same template again (or previewing it first) costs one hash instead of a
+    python-docx parse. Least recently used entries are evicted once the entry count or the
+    total cached text size goes over the limits.
+    """
+
+    def __init__(self, max_bytes=TEMPLATE_STORE_MAX_BYTES, max_entries=TEMPLATE_STORE_MAX_ENTRIES):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # digest -> TemplateEntry
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+
+    def get(self, data, filename=''):
+        """
+        Return the parsed template for the given .docx bytes, parsing them on first sight.
+        Any bytes-like object works; a memoryview is hashed in place and only read on a miss.
+
+        Raises:
+            Exception: Whatever python-docx raises for bytes that are not a valid .docx
+        """
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Parse outside the lock; two workers racing on the same new template both parse once
+        from docx import Document
+        doc = Document(io.BytesIO(data))
+        entry = TemplateEntry(digest, filename, docx_message_text(doc), docx_preview_text(doc))
+
+        with self._lock:
+            existing = self._entries.get(digest)
+            if existing is not None:
+                return existing
+            self._entries[digest] = entry
+            self._bytes += entry.size
+            self._evict()
+        logging.info(f"Parsed template {filename or digest[:12]} ({len(entry.placeholders)} placeholders)")
+        return entry
+
+    def get_upload(self, file_storage):
+        """Parse (or look up) an uploaded Werkzeug file; the stream is rewound for later readers"""
+        stream = file_storage.stream
+        stream.seek(0)
+        data = stream.read()
+        stream.seek(0)
+        return self.get(data, file_storage.filename)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+
+template_store = TemplateStore()
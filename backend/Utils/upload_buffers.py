@@ -0,0 +1,242 @@
+# upload_buffers.py - Uploaded files held in memory (spooled to disk when large) for attachments and parsing
+import io
+import os
+import logging
+import tempfile
+
+# Uploads up to this size stay in memory; larger ones are streamed to a temp file
+UPLOAD_SPOOL_MAX_BYTES = int(os.getenv('UPLOAD_SPOOL_MAX_BYTES', str(8 * 1024 * 1024)))
+_CHUNK_SIZE = 1024 * 1024
+
+
+def remove_numeric_prefix(filename):
+    """Remove a leading long numeric prefix followed by '-' from filename.
+    Example: '1755776006074-reactor_report_2025-08-02.pdf' -> 'reactor_report_2025-08-02.pdf'
+    Keeps the original name otherwise.
+    """
+    try:
+        base_name = os.path.basename(filename)
+        parts = base_name.split('-', 1)
+        if len(parts) == 2 and parts[0].isdigit() and len(parts[0]) >= 10:
+            return parts[1]
+        return base_name
+    except Exception:
+        return os.path.basename(filename)
+
+
+class UploadBuffer:
+    """
+    The content of one uploaded file.
+
+    Small uploads are kept as immutable bytes, so any number of dispatch workers can attach the
+    same buffer concurrently. Uploads above the spool threshold live in a temp file that each
+    reader opens separately. Either way ``name`` is the attachment file name and ``path`` is
+    None for in-memory buffers.
+    """
+
+    __slots__ = ('name', 'content_type', 'size', '_data', 'path')
+
+    def __init__(self, name, data=None, path=None, content_type=None):
+        self.name = name
+        self.content_type = content_type
+        self._data = data
+        self.path = path
+        self.size = len(data) if data is not None else os.path.getsize(path)
+
+    @classmethod
+    def from_upload(cls, file_storage, name=None, spool_dir=None, max_memory=UPLOAD_SPOOL_MAX_BYTES):
+        """Read a Werkzeug FileStorage once; the upload stream is left rewound"""
+        name = name or os.path.basename(file_storage.filename)
+        stream = file_storage.stream
+        stream.seek(0)
+        memory = io.BytesIO()
+        spool = None
+        try:
+            while True:
+                chunk = stream.read(_CHUNK_SIZE)
+                if not chunk:
+                    break
+                if spool is None and memory.tell() + len(chunk) > max_memory:
+                    if spool_dir:
+                        os.makedirs(spool_dir, exist_ok=True)
+                    spool = tempfile.NamedTemporaryFile(dir=spool_dir, prefix='upload_', suffix=f"_{name}", delete=False)
+                    spool.write(memory.getbuffer())
+                    memory = None
+                (spool or memory).write(chunk)
+        finally:
+            stream.seek(0)
+            if spool is not None:
+                spool.close()
+        if spool is not None:
+            logging.info(f"Spooled upload '{name}' to disk ({os.path.getsize(spool.name)} bytes)")
+            return cls(name, path=spool.name, content_type=file_storage.mimetype)
+        return cls(name, data=memory.getvalue(), content_type=file_storage.mimetype)
+
+    @property
+    def in_memory(self):
+        return self._data is not None
+
+    def read_bytes(self):
+        if self._data is not None:
+            return self._data
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def view(self):
+        """Zero-copy view of in-memory content (reads spooled content)"""
+        return memoryview(self.read_bytes())
+
+    def open(self):
+        """A new binary file object positioned at the start"""
+        if self._data is not None:
+            return io.BytesIO(self._data)
+        return open(self.path, 'rb')
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            f.write(self.read_bytes())
+
+    def discard(self):
+        """Delete the spool file, if any"""
+        if self.path:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+    def __repr__(self):
+        where = 'memory' if self.in_memory else self.path
+        return f"UploadBuffer({self.name!r}, {self.size} bytes, {where})"
+
+
+def buffer_uploads(files, spool_dir=None, max_memory=UPLOAD_SPOOL_MAX_BYTES, clean_names=False):
+    """
+    UploadBuffers for uploaded files; duplicates by name are skipped.
+
+    Buffers keep the uploaded file name, which is what a report's file_sequence refers to;
+    clean_names drops numeric upload prefixes instead.
+    """
+    buffers = []
+    seen = set()
+    for file_storage in files or []:
+        if not getattr(file_storage, 'filename', None):
+            continue
+        name = remove_numeric_prefix(file_storage.filename) if clean_names else os.path.basename(file_storage.filename)
+        if name in seen:
+            logging.warning(f"Duplicate upload '{name}' skipped")
+            continue
+        seen.add(name)
+        buffers.append(UploadBuffer.from_upload(file_storage, name=name, spool_dir=spool_dir, max_memory=max_memory))
+    return buffers
+
+
+def prepare_file_paths(file_paths, user_email=None, base_output_dir=None, is_upload=False, in_memory=False, clean_names=False):
+    """
+    Prepare file paths for processing with user-specific temporary directories.
+    
+    Args:
+        file_paths: List of file paths or uploaded file objects
+        user_email: User's email address for user-specific temp directory
+        base_output_dir: Base output directory path
+        is_upload: Boolean indicating if files are uploaded (need to be saved)
+        in_memory: Return uploads as UploadBuffers instead of saving them (only large uploads touch disk)
+        clean_names: Drop numeric upload prefixes from uploaded file names
+        
+    Returns:
+        list: List of valid file paths (or UploadBuffers) ready for processing
+    """
+    try:
+        # Import temp_manager here to avoid circular imports
+        from .temp_manager import get_user_temp_dir
+        
+        if not file_paths:
+            return []
+            
+        if not isinstance(file_paths, list):
+            file_paths = [file_paths]
+        
+        # Uploads kept in memory; only ones above the spool threshold go to the user temp dir
+        if is_upload and in_memory:
+            spool_dir = get_user_temp_dir(user_email, base_output_dir) if user_email and base_output_dir else None
+            buffers = buffer_uploads(file_paths, spool_dir=spool_dir, clean_names=clean_names)
+            logging.info(f"Buffered {len(buffers)} uploaded file(s) for user: {user_email}")
+            return buffers
+        
+        # Get user-specific temp directory
+        temp_dir = None
+        if is_upload and user_email and base_output_dir:
+            temp_dir = get_user_temp_dir(user_email, base_output_dir)
+        elif is_upload and not user_email and base_output_dir:
+            # Fallback to base temp directory if no user email provided
+            temp_dir = os.path.join(base_output_dir, "temp")
+            os.makedirs(temp_dir, exist_ok=True)
+            
+        valid_paths = []
+        seen_filenames = set()
+        errors = []
+        
+        for path in file_paths:
+            try:
+                if is_upload:
+                    if hasattr(path, 'filename') and path.filename:
+                        original_filename = os.path.basename(path.filename)
+                        filename = remove_numeric_prefix(original_filename) if clean_names else original_filename
+                        if temp_dir:
+                            temp_path = os.path.join(temp_dir, filename)
+                            path.save(temp_path)
+                            valid_paths.append(temp_path)
+                            seen_filenames.add(filename)
+                            logging.info(f"Saved attachment file as '{filename}' (original: '{original_filename}') to user temp dir: {temp_path}")
+                        else:
+                            errors.append("No temp directory available for uploaded file")
+                            logging.error("No temp directory available for uploaded file")
+                else:
+                    if os.path.exists(path) and os.path.isfile(path):
+                        filename = os.path.basename(path)
+                        if filename not in seen_filenames:
+                            valid_paths.append(path)
+                            seen_filenames.add(filename)
+                            logging.info(f"Added file: {path}")
+                        else:
+                            logging.warning(f"Duplicate file found: {path}. Skipping.")
+                    else:
+                        errors.append(f"Invalid or non-existent file path: {path}")
+                        logging.warning(f"Invalid or non-existent file path: {path}")
+            except Exception as e:
+                errors.append(f"Error processing file {path}: {str(e)}")
+                logging.error(f"Error processing file {path}: {str(e)}")
+                
+        logging.info(f"Prepared {len(valid_paths)} valid file paths for user: {user_email}")
+        if errors:
+            logging.warning(f"File preparation completed with {len(errors)} errors")
+        
+        return valid_paths
+    except Exception as e:
+        logging.error(f"Error preparing file paths: {str(e)}")
+        return []
+
+
+def attachment_name(attachment):
+    """File name of an attachment given as a path or an UploadBuffer"""
+    return attachment.name if isinstance(attachment, UploadBuffer) else os.path.basename(attachment)
+
+
+def attachment_exists(attachment):
+    return isinstance(attachment, UploadBuffer) or os.path.exists(attachment)
+
+
+def read_attachment(attachment):
+    """Bytes of an attachment given as a path or an UploadBuffer"""
+    if isinstance(attachment, UploadBuffer):
+        return attachment.read_bytes()
+    with open(attachment, 'rb') as f:
+        return f.read()
+
+
+def as_attachment_list(attachments):
+    """Normalize None, a single path/buffer or a list into a list"""
+    if attachments is None:
+        return []
+    if isinstance(attachments, (str, UploadBuffer)):
+        return [attachments]
+    return list(attachments)
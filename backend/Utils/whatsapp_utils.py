@@ -6,10 +6,31 @@ import json
 from typing import List, Dict, Optional, Union
 from datetime import datetime
 from flask import session
+from Utils.delivery_log import DeliveryLog
+from Utils.upload_buffers import (
+    UploadBuffer, as_attachment_list, attachment_exists, attachment_name, prepare_file_paths
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 
+
+def _upload_key(file_path):
+    # In-memory uploads are identified by name, files on disk by absolute path
+    return ('buffer', file_path.name) if isinstance(file_path, UploadBuffer) else os.path.abspath(file_path)
+
+
+def _upload_part(file_path):
+    """requests 'files' entry: in-memory buffers are sent from memory, paths as open files"""
+    if isinstance(file_path, UploadBuffer):
+        return (file_path.name, file_path.open(), file_path.content_type or 'application/octet-stream')
+    return open(file_path, 'rb')
+
+
+def _close_upload_part(file_part):
+    (file_part[1] if isinstance(file_part, tuple) else file_part).close()
+
+
 class WhatsAppNodeClient:
     """Client to interact with Node.js WhatsApp service"""
     
@@ -195,11 +216,8 @@ class WhatsAppNodeClient:
                 logging.error("WhatsApp service is not ready")
                 return "WHATSAPP_SERVICE_NOT_READY"
             
-            # Prepare file paths
-            if file_paths is None:
-                file_paths = []
-            elif isinstance(file_paths, str):
-                file_paths = [file_paths]
+            # Prepare file paths (paths or in-memory UploadBuffers)
+            file_paths = as_attachment_list(file_paths)
             
             # Prepare file sequence
             if file_sequence is None:
@@ -230,16 +248,16 @@ class WhatsAppNodeClient:
             if file_paths:
                 for file_path in file_paths:
                     # Normalize the file path to handle different representations of the same file
-                    normalized_path = os.path.abspath(file_path)
+                    normalized_path = _upload_key(file_path)
                     if normalized_path not in seen_files:
                         seen_files.add(normalized_path)
-                        if os.path.exists(file_path):
-                            files.append(('files', open(file_path, 'rb')))
-                            logging.info(f"Added file for upload: {file_path}")
+                        if attachment_exists(file_path):
+                            files.append(('files', _upload_part(file_path)))
+                            logging.info(f"Added file for upload: {attachment_name(file_path)}")
                         else:
                             logging.warning(f"File not found: {file_path}")
                     else:
-                        logging.info(f"Skipping duplicate file: {file_path}")
+                        logging.info(f"Skipping duplicate file: {attachment_name(file_path)}")
             
             logging.info(f"Sending WhatsApp message to {contact_name} ({whatsapp_number}) with process: {process_name}")
             
@@ -254,8 +272,8 @@ class WhatsAppNodeClient:
             )
             
             # Close file handles
-            for _, file_handle in files:
-                file_handle.close()
+            for _, file_part in files:
+                _close_upload_part(file_part)
             
             if response.status_code == 200:
                 result = response.json()
@@ -305,9 +323,8 @@ class WhatsAppNodeClient:
                 logging.error("WhatsApp service is not ready")
                 return []
             
-            # Prepare file paths
-            if file_paths is None:
-                file_paths = []
+            # Prepare file paths (paths or in-memory UploadBuffers)
+            file_paths = as_attachment_list(file_paths)
             
             # Prepare variables
             if variables is None:
@@ -331,16 +348,16 @@ class WhatsAppNodeClient:
             seen_files = set()  # Track unique file paths to prevent duplicates
             for file_path in file_paths:
                 # Normalize the file path to handle different representations of the same file
-                normalized_path = os.path.abspath(file_path)
+                normalized_path = _upload_key(file_path)
                 if normalized_path not in seen_files:
                     seen_files.add(normalized_path)
-                    if os.path.exists(file_path):
-                        files.append(('files', open(file_path, 'rb')))
-                        logging.info(f"Added file for bulk upload: {file_path}")
+                    if attachment_exists(file_path):
+                        files.append(('files', _upload_part(file_path)))
+                        logging.info(f"Added file for bulk upload: {attachment_name(file_path)}")
                     else:
                         logging.warning(f"File not found: {file_path}")
                 else:
-                    logging.info(f"Skipping duplicate file in bulk upload: {file_path}")
+                    logging.info(f"Skipping duplicate file in bulk upload: {attachment_name(file_path)}")
             
             logging.info(f"Sending bulk WhatsApp messages to {len(contacts)} contacts with process: {process_name}")
             
@@ -355,8 +372,8 @@ class WhatsAppNodeClient:
             )
             
             # Close file handles
-            for _, file_handle in files:
-                file_handle.close()
+            for _, file_part in files:
+                _close_upload_part(file_part)
             
             if response.status_code == 200:
                 result = response.json()
@@ -524,8 +541,15 @@ def handle_reactor_report_notification_with_stats(recipients_data, input_date, f
         
         success_count = 0
         total_recipients = 0
+        delivery_log = DeliveryLog()
+        # The report is the same for everyone, so a number listed on several rows is sent to once
+        sent_numbers = {}
+        sends_saved = 0
+        file_bytes = os.path.getsize(file_path) if file_path and os.path.exists(file_path) else 0
         
         for row in recipients_data[1:]:
+            send_started = None
+            send_bytes = 0
             try:
                 # Calculate the maximum index we need to check
                 max_indices = [name_idx]
@@ -580,18 +604,26 @@ def handle_reactor_report_notification_with_stats(recipients_data, input_date, f
                         logging.info(f"Valid phone number for {recipient_name}: {contact_number} -> Cleaned: {contact_cleaned}")
                         total_recipients += 1
                         
-                        # Send WhatsApp message using unified function
-                        success = client.send_message(
-                            contact_name=recipient_name,
-                            whatsapp_number=contact_number,
-                            process_name="reactor_report",
-                            file_paths=[file_path],
-                            variables={
-                                "input_date": input_date,
-                                "sheets_processed": sheets_processed
-                            },
-                            options={}
-                        )
+                        send_started = datetime.now()
+                        if contact_cleaned in sent_numbers:
+                            success = sent_numbers[contact_cleaned]
+                            sends_saved += 1
+                            logging.info(f"Reactor report already sent to {contact_number}; reusing result for {recipient_name}")
+                        else:
+                            # Send WhatsApp message using unified function
+                            success = client.send_message(
+                                contact_name=recipient_name,
+                                whatsapp_number=contact_number,
+                                process_name="reactor_report",
+                                file_paths=[file_path],
+                                variables={
+                                    "input_date": input_date,
+                                    "sheets_processed": sheets_processed
+                                },
+                                options={}
+                            )
+                            sent_numbers[contact_cleaned] = success
+                            send_bytes = file_bytes
                         
                         if success is True:
                             success_count += 1
@@ -603,35 +635,33 @@ def handle_reactor_report_notification_with_stats(recipients_data, input_date, f
                     failure_reason = "Missing contact number or name"
                     logging.warning(f"Skipping WhatsApp notification for {recipient_name}: {failure_reason}")
                 
-                # Track failed deliveries
-                if failure_reason:
-                    delivery_stats["failed_deliveries"] += 1
-                    delivery_stats["failed_contacts"].append({
-                        "name": recipient_name,
-                        "contact": contact_number if contact_number else "N/A",
-                        "reason": failure_reason
-                    })
-                else:
-                    delivery_stats["successful_deliveries"] += 1
+                # Rows that never reached a send are logged as skipped
+                sent = send_started is not None
+                delivery_log.record(
+                    recipient_name, 'whatsapp',
+                    ('failed' if failure_reason else 'success') if sent else 'skipped', failure_reason,
+                    seconds=(datetime.now() - send_started).total_seconds() if sent else 0.0,
+                    nbytes=send_bytes,
+                    contact=contact_number if contact_number else "N/A"
+                )
                     
             except Exception as e:
                 logging.error(f"Error sending reactor report WhatsApp notification to {recipient_name if 'recipient_name' in locals() else 'unknown'}: {e}")
-                delivery_stats["failed_deliveries"] += 1
-                delivery_stats["failed_contacts"].append({
-                    "name": recipient_name if 'recipient_name' in locals() else 'unknown',
-                    "contact": contact_number if 'contact_number' in locals() else "N/A",
-                    "reason": f"Exception: {str(e)}"
-                })
+                delivery_log.record(
+                    recipient_name if 'recipient_name' in locals() else 'unknown', 'whatsapp', 'failed', f"Exception: {str(e)}",
+                    contact=contact_number if 'contact_number' in locals() and contact_number else "N/A"
+                )
                 continue
         
-        # Update total recipients
-        delivery_stats["total_recipients"] = total_recipients
+        delivery_stats = delivery_log.to_delivery_stats(label_reasons=False)
         
-        logging.info(f"Reactor report WhatsApp notifications: {success_count}/{total_recipients} successful")
+        logging.info(f"Reactor report WhatsApp notifications: {success_count}/{total_recipients} successful ({sends_saved} duplicate number(s) not re-sent)")
         
         return {
             "success": success_count > 0,
-            "delivery_stats": delivery_stats
+            "delivery_stats": delivery_stats,
+            "delivery_log": delivery_log,
+            "sends_saved": sends_saved
         }
         
     except Exception as e:
@@ -812,90 +842,6 @@ def get_employee_contact(employee_name: str, contact_employees: List[Dict]) -> s
         return ""
 
 
-def prepare_file_paths(file_paths, user_email=None, base_output_dir=None, is_upload=False):
-    """
-    Prepare file paths for processing with user-specific temporary directories.
-    Maintains backward compatibility with temp_dir parameter.
-    
-    Args:
-        file_paths: List of file paths or uploaded file objects
-        user_email: User's email address for user-specific temp directory
-        base_output_dir: Base output directory path
-        is_upload: Boolean indicating if files are uploaded (need to be saved)
-        
-    Returns:
-        list: List of valid file paths ready for processing
-    """
-    try:
-        # Import temp_manager here to avoid circular imports
-        from .temp_manager import get_user_temp_dir
-        
-        if not file_paths:
-            return []
-            
-        if not isinstance(file_paths, list):
-            file_paths = [file_paths]
-            
-        valid_paths = []
-        seen_filenames = set()
-
-        def _remove_numeric_prefix(filename: str) -> str:
-            """Remove a leading long numeric prefix followed by '-' from filename.
-            Example: '1755776006074-reactor_report_2025-08-02.pdf' -> 'reactor_report_2025-08-02.pdf'
-            Keeps the original name otherwise.
-            """
-            try:
-                base_name = os.path.basename(filename)
-                parts = base_name.split('-', 1)
-                if len(parts) == 2 and parts[0].isdigit() and len(parts[0]) >= 10:
-                    return parts[1]
-                return base_name
-            except Exception:
-                return os.path.basename(filename)
-        
-        # Get user-specific temp directory
-        temp_dir = None
-        if is_upload and user_email and base_output_dir:
-            temp_dir = get_user_temp_dir(user_email, base_output_dir)
-        elif is_upload and not user_email and base_output_dir:
-            # Fallback to base temp directory if no user email provided
-            temp_dir = os.path.join(base_output_dir, "temp")
-            os.makedirs(temp_dir, exist_ok=True)
-        
-        for path in file_paths:
-            if is_upload:
-                if hasattr(path, 'filename') and path.filename:
-                    # Normalize and clean the filename to avoid unwanted numeric prefixes
-                    original_filename = os.path.basename(path.filename)
-                    cleaned_filename = _remove_numeric_prefix(original_filename)
-                    
-                    if temp_dir:
-                        temp_path = os.path.join(temp_dir, cleaned_filename)
-                        path.save(temp_path)
-                        valid_paths.append(temp_path)
-                        seen_filenames.add(cleaned_filename)
-                        logging.info(f"Saved attachment file as '{cleaned_filename}' (original: '{original_filename}') to user temp dir: {temp_path}")
-                    else:
-                        logging.error("No temp directory available for uploaded file")
-            else:
-                if os.path.exists(path) and os.path.isfile(path):
-                    filename = os.path.basename(path)
-                    if filename not in seen_filenames:
-                        valid_paths.append(path)
-                        seen_filenames.add(filename)
-                        logging.info(f"Added file: {path}")
-                    else:
-                        logging.warning(f"Duplicate file found: {path}. Skipping.")
-                else:
-                    logging.warning(f"Invalid or non-existent file path: {path}")
-                
-        logging.info(f"Prepared {len(valid_paths)} valid file paths for user: {user_email}")
-        return valid_paths
-    except Exception as e:
-        logging.error(f"Error preparing file paths: {str(e)}")
-        return []
-
-
 # Configuration
 WHATSAPP_NODE_SERVICE_URL = os.getenv('WHATSAPP_NODE_SERVICE_URL', 'https://whatsapp.bajajearths.com')
 
@@ -4,7 +4,8 @@ import webbrowser
 import sys
 import threading
 import time
-from flask import Flask, request, jsonify, Response, g, session, redirect, url_for, make_response
+import hmac
+from flask import Flask, request, jsonify, Response, g, session, redirect, url_for, make_response, stream_with_context
 from flask_cors import CORS
 from logging.handlers import RotatingFileHandler
 from Utils.fetch_data import fetch_google_sheet_data
@@ -16,6 +17,16 @@ from Utils.config import CLIENT_SECRETS_FILE, drive, creds
 from werkzeug.security import generate_password_hash, check_password_hash
 from functools import wraps
 from Utils.auth import auth_bp
+from Utils.health_utils import check_readiness
+from Utils.job_store import job_store, valid_job_id
+from Utils.report_runs import report_run_store
+from Utils.delivery_log import as_delivery_stats
+from Utils.reactor_scheduler import ReactorScheduler, ReactorRunConflict
+from Utils.template_engine import compile_template, render_template, describe_unknown_placeholders
+from Utils.template_store import template_store
+from Utils.upload_buffers import UploadBuffer
+from Utils.contact_validation import recipient_contacts
+from Utils.latency_stats import latency_stats, summarize_plan
 from Utils.email_utils import send_email_gmail_api, send_email_oauth
 from Utils.whatsapp_utils import (
     send_whatsapp_message,
@@ -42,8 +53,11 @@ from Utils.firebase_utils import (
     update_order_status,
     delete_order,
     get_all_orders,
+    query_orders,
+    backfill_order_items,
     get_factory_initials,
     get_next_order_id,
+    reset_order_counter,
     get_user_oauth_tokens,
     update_user_oauth_tokens,
     delete_material,
@@ -549,6 +563,12 @@ def get_base_dir():
 
 BASE_DIR = get_base_dir()
 OUTPUT_DIR = os.getenv("OUTPUT_DIR", os.path.join(os.path.expanduser("~"), "Salary_Slips"))
+
+# Reactor reports for all plants run on this scheduler (manual triggers and REACTOR_PLANTS_FILE schedules).
+# Every worker starts it; each scheduled time is claimed through Utils.file_lock so only one worker fires it.
+reactor_scheduler = ReactorScheduler(output_dir=OUTPUT_DIR, base_dir=os.path.dirname(__file__), logger=logger)
+if os.getenv('REACTOR_SCHEDULER_ENABLED', 'false').lower() == 'true':
+    reactor_scheduler.start()
 TEMPLATE_PATH = os.getenv("TEMPLATE_PATH", os.path.join(BASE_DIR, "ssformat.docx"))
 LOG_FILE_PATH = os.getenv("LOG_FILE_PATH", os.path.join(os.path.expanduser("~"), "app.log"))
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -656,19 +676,34 @@ def preview_file():
 
         logger.info('Processing file: %s', file.filename)
         
-        # Get user-specific temporary directory for file preview
+        # Read the upload in memory (spooled to the user temp dir only when large); .docx templates
+        # are parsed once and cached for the send that follows
         from Utils.temp_manager import get_user_temp_dir
-        temp_dir = get_user_temp_dir(user_id, BASE_DIR)
-        temp_path = os.path.join(temp_dir, file.filename)
-        
-        # Save the uploaded file
-        file.save(temp_path)
-        logger.info('File saved to: %s', temp_path)
+        upload = UploadBuffer.from_upload(file, spool_dir=get_user_temp_dir(user_id, BASE_DIR))
+        temp_path = upload.path
+        if os.path.splitext(upload.name)[1].lower() != '.docx':
+            content = preview_file_content(upload.name, upload.view())
+            logger.info('File processed successfully')
+            return jsonify({"content": content, "placeholders": []})
         
-        # Read the file content
-        content = process_reports(temp_path)
+        try:
+            entry = template_store.get(upload.view(), upload.name)
+        except Exception as e:
+            logger.error(f"Error reading file {upload.name}: {e}")
+            return jsonify({"content": f"Error reading file: {str(e)}", "placeholders": []})
         logger.info('File processed successfully')
-        return jsonify({"content": content})
+        
+        # Report the placeholders of the message text the send path fills (the preview text also
+        # shows table cells); with the sheet columns (JSON list in 'columns') also report the
+        # ones no column will fill
+        response = {"content": entry.preview, "placeholders": list(entry.placeholders)}
+        columns = request.form.get('columns')
+        if columns:
+            try:
+                response["unknown_placeholders"] = entry.compiled.unknown_placeholders(json.loads(columns))
+            except (ValueError, TypeError):
+                logger.warning("Ignoring invalid 'columns' in preview request")
+        return jsonify(response)
     except Exception as e:
         logger.error("Error previewing file: {}".format(e), exc_info=True)
         return jsonify({"error": str(e)}), 500
@@ -1280,8 +1315,45 @@ def generate_salary_slip_single():
 
 @app.route("/api/generate-salary-slips-batch", methods=["POST"])
 def generate_salary_slips_batch():
+    user_inputs = request.json or {}
+    job_id = _start_tracked_job('salary_slips_batch', session.get('user', {}).get('email'), {
+        'month': user_inputs.get('full_month'),
+        'year': user_inputs.get('full_year'),
+        'send_email': user_inputs.get('send_email', False),
+        'send_whatsapp': user_inputs.get('send_whatsapp', False),
+        'dry_run': bool(user_inputs.get('dry_run'))
+    }, user_inputs.get('job_id'))
+    return _finish_tracked_job(job_id, _generate_salary_slips_batch(user_inputs, job_store.emitter(job_id)))
+
+def _plan_salary_slips_batch(employees, email_employees, contact_employees, send_email, send_whatsapp):
+    """Dry-run plan for a salary slip batch: one slip (render, PDF, Drive upload) per employee plus notifications"""
+    names = [employee[4] for employee in employees if len(employee) > 4 and str(employee[4]).strip()]
+    missing_email = [name for name in names if send_email and not get_employee_email(name, email_employees)]
+    missing_contact = [name for name in names if send_whatsapp and not get_employee_contact(name, contact_employees)]
+    email_count = len(names) - len(missing_email) if send_email else 0
+    whatsapp_count = len(names) - len(missing_contact) if send_whatsapp else 0
+
+    # The batch runs one employee at a time
+    steps = {
+        'salary_slip': latency_stats.plan_step('salary_slip', len(names)),
+        'email': latency_stats.plan_step('email_send', email_count),
+        'whatsapp': latency_stats.plan_step('whatsapp_send', whatsapp_count)
+    }
+    slip_bytes = latency_stats.estimate('salary_slip')['bytes']
+    return summarize_plan(
+        steps,
+        # Drive upload of every slip, base64 encoded email attachments (4/3), WhatsApp uploads
+        estimated_bytes=slip_bytes * (len(names) + email_count * 4 / 3 + whatsapp_count),
+        employees=len(names),
+        messages={'email': email_count, 'whatsapp': whatsapp_count},
+        attachments=email_count + whatsapp_count,
+        drive_uploads=len(names),
+        missing_email=missing_email,
+        missing_contact=missing_contact
+    )
+
+def _generate_salary_slips_batch(user_inputs, progress):
     try:
-        user_inputs = request.json
         app.logger.info("Processing batch salary slips request")
 
         required_keys = ["sheet_id_salary", "sheet_id_drive", "full_month", "full_year"]
@@ -1322,6 +1394,9 @@ def generate_salary_slips_batch():
         contact_headers = (contact_data[1])
         contact_employees = [dict(zip(contact_headers, row)) for row in contact_data[2:]]
 
+        if user_inputs.get("dry_run"):
+            plan = _plan_salary_slips_batch(employees, email_employees, contact_employees, send_email, send_whatsapp)
+            return jsonify({"message": "Dry run: no salary slips were generated or sent", "plan": plan}), 200
         
        # Generate salary slips for each employee sequentially
         # Track upload status and file paths for conditional deletion
@@ -1331,6 +1406,7 @@ def generate_salary_slips_batch():
         for employee in employees:
             employee_name = employee[4]  # Assuming the employee name is at index 4
             app.logger.info("Processing salary slip for employee: {}".format(employee_name))
+            employee_started = datetime.now()
             try:
                 employee_data = [str(item) if item is not None else '' for item in employee]
                 # Get employee code from the employee data
@@ -1363,8 +1439,14 @@ def generate_salary_slips_batch():
                     pdf_path = result["output_file"]
                     employee_pdf_paths[employee_name] = pdf_path
                     employee_upload_status[employee_name] = result.get("drive_upload_success")
+                    slip_seconds = (datetime.now() - employee_started).total_seconds()
+                    latency_stats.record('salary_slip', slip_seconds, os.path.getsize(pdf_path) if os.path.exists(pdf_path) else None)
+                    progress('rendered', name=employee_name, seconds=round(slip_seconds, 3))
+                    if result.get("drive_upload_success"):
+                        progress('uploaded', name=employee_name)
                 else:
                     app.logger.warning(f"Failed to generate salary slip for {employee_name}")
+                    progress('failed', name=employee_name, stage='render', reason="Salary slip not generated")
                     continue
                 if send_email:
                     app.logger.info("Sending email to {}".format(employee[5]))  # Assuming email is at index 5
@@ -1399,6 +1481,7 @@ def generate_salary_slips_batch():
                             app.logger.warning(f"No PDF path found for {employee_name}, skipping email")
                             continue
                         
+                        send_started = time.perf_counter()
                         success = send_email_gmail_api(
                             user_email=user_email,
                             recipient_email=recipient_email,
@@ -1406,6 +1489,8 @@ def generate_salary_slips_batch():
                             body=email_body,
                             attachment_paths=[pdf_path]
                         )
+                        if success is True:
+                            latency_stats.record('email_send', time.perf_counter() - send_started)
                         
                         if success == "TOKEN_EXPIRED":
                             return jsonify({"error": "TOKEN_EXPIRED"}), 401
@@ -1426,8 +1511,10 @@ def generate_salary_slips_batch():
                         elif not success:
                             app.logger.error("Failed to send email to {}".format(recipient_email))
                             return jsonify({"error": "EMAIL_SEND_FAILED", "message": "Failed to send email. Please try again."}), 500
+                        progress('sent', name=employee_name, channel='email')
                     else:
                         app.logger.warning("No email found for {}".format(employee[4]))
+                        progress('failed', name=employee_name, channel='email', reason="No email found")
                         
                 if send_whatsapp:
                     app.logger.info("Sending WhatsApp message to {}".format(employee[6]))  # Assuming phone number is at index 6
@@ -1444,6 +1531,7 @@ def generate_salary_slips_batch():
                             app.logger.warning(f"No PDF path found for {contact_name}, skipping WhatsApp")
                             continue
                         
+                        send_started = time.perf_counter()
                         success = handle_whatsapp_notification(
                             contact_name=contact_name,
                             full_month=full_month,
@@ -1452,6 +1540,8 @@ def generate_salary_slips_batch():
                             file_path=[pdf_path],
                             is_special=False
                         )
+                        if success is True:
+                            latency_stats.record('whatsapp_send', time.perf_counter() - send_started)
                         
                         if success == "USER_NOT_LOGGED_IN":
                             return jsonify({"error": "USER_NOT_LOGGED_IN", "message": "User session expired. Please log in again."}), 401
@@ -1459,6 +1549,7 @@ def generate_salary_slips_batch():
                             # Instead of returning 503, log a warning and continue
                             logging.warning("WhatsApp service is not ready. Salary slips generated but WhatsApp messages could not be sent.")
                             app.logger.warning("WhatsApp service is not ready. Please authenticate WhatsApp first.")
+                            progress('failed', name=employee_name, channel='whatsapp', reason="WhatsApp service not ready")
                             # Continue processing - don't return error
                             # return jsonify({"error": "WHATSAPP_SERVICE_NOT_READY", "message": "WhatsApp service is not ready. Please try again later."}), 503
                         elif success == "INVALID_FILE_PATH":
@@ -1482,6 +1573,7 @@ def generate_salary_slips_batch():
                             return jsonify({"error": "WHATSAPP_SEND_FAILED", "message": "Failed to send WhatsApp message. Please try again."}), 500
                         else:
                             app.logger.info("WhatsApp message sent successfully to {}".format(contact_name))
+                            progress('sent', name=employee_name, channel='whatsapp')
                             
                 # Delete generated files conditionally based on Drive upload success
                 # Only delete if Drive upload succeeded
@@ -1639,8 +1731,28 @@ def update_permissions():
         logger.error("Error updating permissions: {}".format(e))
         return jsonify({"error": str(e)}), 500
 
+def _start_tracked_job(kind, owner, params, requested_id=None):
+    """Create and start a job for a synchronous request; a fresh client supplied id is reused
+    so the client can already be listening on /api/jobs/<id>/events"""
+    if not valid_job_id(requested_id) or job_store.get(requested_id):
+        requested_id = None
+    job = job_store.create(kind, params=params, owner=owner, job_id=requested_id)
+    job_store.start(job['id'])
+    return job['id']
+
+def _finish_tracked_job(job_id, response):
+    """Record the outcome of a (response, status) pair on its job"""
+    body, status = response if isinstance(response, tuple) else (response, response.status_code)
+    data = body.get_json(silent=True) if hasattr(body, 'get_json') else None
+    if status < 400:
+        job_store.complete(job_id, data)
+    else:
+        job_store.fail(job_id, (data or {}).get('error') or f"HTTP {status}", data)
+    return response
+
 @app.route("/api/send-reports", methods=["POST"])
 def generate_report():
+    job_id = None
     try:
         user_id = session.get('user', {}).get('email')
         if not user_id:
@@ -1657,6 +1769,16 @@ def generate_report():
         send_email = request.form.get('send_email') == 'true'
         mail_subject = request.form.get('mail_subject')
         use_template_as_caption = request.form.get('use_template_as_caption') == 'true'
+        # Read and validate the sheet, then return the execution plan without sending anything
+        dry_run = request.form.get('dry_run') == 'true'
+
+        job_id = _start_tracked_job('send_reports', user_id, {
+            'sheet_id': sheet_id,
+            'sheet_name': sheet_name,
+            'send_email': send_email,
+            'send_whatsapp': send_whatsapp,
+            'dry_run': dry_run
+        }, request.form.get('job_id'))
 
         # Import the new function from process_utils
         from Utils.process_utils import process_general_reports
@@ -1681,26 +1803,39 @@ def generate_report():
             prepare_file_paths_func=prepare_file_paths,
             fetch_google_sheet_data_func=fetch_google_sheet_data,
             process_template_func=process_template,
-            send_log_report_to_user_func=send_log_report_to_user
+            send_log_report_to_user_func=send_log_report_to_user,
+            progress=job_store.emitter(job_id),
+            run_id=job_id,
+            dry_run=dry_run
         )
 
         # Check if there were any errors
         if not result["success"]:
             if result["errors"]:
-                return jsonify({"error": result["errors"][0]}), 400
+                return _finish_tracked_job(job_id, (jsonify({"error": result["errors"][0], "job_id": job_id}), 400))
             else:
-                return jsonify({"error": "Unknown error occurred"}), 500
+                return _finish_tracked_job(job_id, (jsonify({"error": "Unknown error occurred", "job_id": job_id}), 500))
 
         # Return success response
-        return jsonify({
+        return _finish_tracked_job(job_id, (jsonify({
             "message": result["message"],
             "generated_files": result["generated_files"],
             "notifications_sent": result["notifications_sent"],
-            "delivery_stats": result["delivery_stats"]
-        }), 200
+            "delivery_stats": result["delivery_stats"],
+            # Rows rejected by contact validation before sending
+            "validation": result.get("validation"),
+            "plan": result.get("plan"),
+            # Duplicate sends collapsed before dispatch
+            "fanout": result.get("fanout"),
+            "job_id": job_id,
+            # Set when some recipients failed; POST it to /api/retry-reports to re-send only those
+            "run_id": result.get("run_id")
+        }), 200))
 
     except Exception as e:
         logger.error("Error generating reports: {}".format(e))
+        if job_id:
+            job_store.fail(job_id, e)
         return jsonify({"error": str(e)}), 500
     finally:
         # Optional cleanup or logging here if needed
@@ -1708,15 +1843,49 @@ def generate_report():
 
 @app.route("/api/retry-reports", methods=["POST"])
 def retry_reports():
-    """Retry sending reports after token refresh"""
+    """Retry sending reports after token refresh: by run_id (failed recipients only) or from original_request_data"""
     try:
         user_id = session.get('user', {}).get('email')
         if not user_id:
             logger.error("No user_id found in session. User must be logged in to send reports.")
             return jsonify({"error": "User not authenticated"}), 401
         
+        data = request.json or {}
+        
+        # Runs stored by /api/send-reports: re-send only the failed recipients and channels
+        run_id = data.get('run_id')
+        if run_id:
+            run = report_run_store.load(run_id) if valid_job_id(run_id) else None
+            current_user = session.get('user', {})
+            if not run or (run.get('owner') != user_id and current_user.get('role') != 'admin'):
+                return jsonify({"error": "RUN_NOT_FOUND", "message": "Report run not found or expired. Please send the reports again."}), 404
+            
+            job_id = _start_tracked_job('retry_reports', user_id, {'run_id': run_id}, data.get('job_id'))
+            try:
+                result = retry_general_report_run(
+                    run, user_id, logger,
+                    send_email_func=send_email_oauth,
+                    send_whatsapp_message=send_whatsapp_message,
+                    send_log_report_to_user_func=send_log_report_to_user,
+                    progress=job_store.emitter(job_id)
+                )
+            except Exception as e:
+                job_store.fail(job_id, e)
+                raise
+            if not result["success"]:
+                return _finish_tracked_job(job_id, (jsonify({"error": result["errors"][0] if result["errors"] else "Unknown error occurred", "job_id": job_id}), 500))
+            return _finish_tracked_job(job_id, (jsonify({
+                "success": True,
+                "message": result["message"],
+                "retried_recipients": result["retried_recipients"],
+                "delivery_stats": result["delivery_stats"],
+                "fanout": result.get("fanout"),
+                "warnings": result["warnings"],
+                "run_id": run_id,
+                "job_id": job_id
+            }), 200))
+        
         # Get the original request data from the request
-        data = request.json
         original_request_data = data.get('original_request_data')
         
         if not original_request_data:
@@ -1775,6 +1944,11 @@ def retry_reports():
         output_dir = os.path.join(OUTPUT_DIR, "reports")
         os.makedirs(output_dir, exist_ok=True)
         
+        compiled_subject = compile_template(mail_subject or '')
+        unknown_warning = describe_unknown_placeholders("Mail subject", compiled_subject, headers)
+        if unknown_warning:
+            logger.warning(unknown_warning)
+        
         # Process each template file
         generated_files = []
         for template_data in template_files_data:
@@ -1788,12 +1962,15 @@ def retry_reports():
                 
                 # Read template content for messages
                 try:
-                    doc = Document(temp_template_path)
-                    template_content = "\n".join([paragraph.text for paragraph in doc.paragraphs])
+                    compiled_content = template_store.get(file_content, file_name).compiled
                 except Exception as e:
                     logger.error("Error reading template content: {}".format(e))
                     continue
                 
+                unknown_warning = describe_unknown_placeholders(f"Template {file_name}", compiled_content, headers)
+                if unknown_warning:
+                    logger.warning(unknown_warning)
+                
                 if send_whatsapp:
                     pass
                 
@@ -1813,37 +1990,19 @@ def retry_reports():
                         process_template(temp_template_path, output_path, data_dict)
                         generated_files.append(output_path)
                         
-                        # Process template content for messages
-                        message_content = template_content
-                        email_content = template_content
-                        
-                        # Replace placeholders in message content
-                        for key, value in data_dict.items():
-                            placeholder = "{{{}}}".format(key)
-                            message_content = message_content.replace(placeholder, str(value))
-                            email_content = email_content.replace(placeholder, str(value))
-                            mail_subject = mail_subject.replace(placeholder, str(value))
-                        
-                        # Get contact details from Google Sheet data
-                        recipient_email = data_dict.get('Email ID - To')
-                        cc_email = data_dict.get('Email ID - CC', '')
-                        bcc_email = data_dict.get('Email ID - BCC', '')
+                        # Fill placeholders for this recipient in one pass
+                        message_content = compiled_content.render(data_dict)
+                        email_content = message_content
+                        recipient_subject = compiled_subject.render(data_dict)
                         
-                        # Helper to split emails by comma or newline and join as comma-separated string
-                        def clean_emails(email_str):
-                            if not email_str:
-                                return None
-                            emails = [e.strip() for e in re.split(r'[\n,]+', email_str) if e.strip()]
-                            return ','.join(emails) if emails else None
-                        
-                        recipient_email = clean_emails(recipient_email)
-                        cc_email = clean_emails(cc_email)
-                        bcc_email = clean_emails(bcc_email)
-                        
-                        country_code = data_dict.get('Country Code', '').strip()
-                        phone_no = data_dict.get('Contact No.', '').strip()
-                        # Format phone number properly: remove spaces and combine country code + number
-                        recipient_phone = f"{country_code}{phone_no}".replace(' ', '')
+                        # Contact details, normalized the same way as in /api/send-reports
+                        contacts = recipient_contacts(headers, row)
+                        recipient_email = contacts['email_to']
+                        cc_email = contacts['email_cc']
+                        bcc_email = contacts['email_bcc']
+                        country_code = contacts['country_code']
+                        phone_no = contacts['phone_no']
+                        recipient_phone = contacts['recipient_phone']
                         
                         if send_whatsapp:
                             # Validate phone number components
@@ -1907,7 +2066,7 @@ def retry_reports():
                                 logger.warning("No email found for recipient: {}".format(recipient_name))
                                 continue
                             try:
-                                email_subject = mail_subject
+                                email_subject = recipient_subject
                                 email_body = """
                                 <html>
                                 <body>
@@ -1972,135 +2131,161 @@ def retry_reports():
         logger.error("Error retrying reports: {}".format(e))
         return jsonify({"error": str(e)}), 500
     
-@app.route("/api/reactor_reports", methods=["POST"])
-def reactor_report():
+def _trigger_reactor_report(plant, process_name=None, use_google_tokens=False):
+    """Queue a reactor report run on the scheduler; waits for the result unless async=true"""
+    user_id = session.get('user', {}).get('email')
+    if not user_id:
+        logger.error("No user_id found in session. User must be logged in to send reports.")
+        return jsonify({"error": "User not authenticated"}), 401
+    
+    # Get form data
+    send_email = request.form.get('send_email') == 'true'
+    send_whatsapp = request.form.get('send_whatsapp') == 'true'
+    date = request.form.get('date')
+    if not date:
+        return jsonify({"error": "Date is required"}), 400
+    
+    # A fresh client supplied id lets the client follow /api/jobs/<id>/events during the run
+    requested_job_id = request.form.get('job_id')
+    if not valid_job_id(requested_job_id) or job_store.get(requested_job_id):
+        requested_job_id = None
+    
+    google_access_token = request.form.get('google_access_token') if use_google_tokens else None
+    google_refresh_token = request.form.get('google_refresh_token') if use_google_tokens else None
+    if not google_access_token:
+        # The run happens on a scheduler thread without this request's session, so tokens that
+        # only live in the session (GSI flow) are handed over here
+        google_access_token = session.get('user', {}).get('google_access_token')
+        google_refresh_token = session.get('user', {}).get('google_refresh_token')
+    
     try:
-        user_id = session.get('user', {}).get('email')
-        if not user_id:
-            logger.error("No user_id found in session. User must be logged in to send reports.")
-            return jsonify({"error": "User not authenticated"}), 401
-        # Get form data
-        send_email = request.form.get('send_email') == 'true'
-        send_whatsapp = request.form.get('send_whatsapp') == 'true'
-        date = request.form.get('date')
-        if not date:
-            return jsonify({"error": "Date is required"}), 400
-        # Fetch sheet IDs from Google Sheet (mapping sheet)
-        try:
-            reactor_reports_sheet_id = "1XOLQvy6j7syAlOKpQ3J2o6DcgiSZsSO1xxWlWih_QOY"
-            sheet_id_mapping_data = fetch_google_sheet_data(reactor_reports_sheet_id, 'Sheet_ID_Reactor')
-            sheet_recipients_data = fetch_google_sheet_data(reactor_reports_sheet_id, 'Recipients')
-            table_range_data = fetch_google_sheet_data(reactor_reports_sheet_id, 'Table Ranges')
-        except Exception as e:
-            logger.error(f"Error fetching sheet IDs from Google Sheet: {e}")
-            return jsonify({"error": "Failed to fetch sheet IDs from Google Sheet"}), 500
-        # Get user-specific temporary directory for processing
-        from Utils.temp_manager import get_user_temp_dir
-        temp_dir = get_user_temp_dir(user_id, OUTPUT_DIR)
-        template_path = os.path.join(os.path.dirname(__file__), "reactorreportformat.docx")
-        if not os.path.exists(template_path):
-            return jsonify({"error": "Reactor report template not found"}), 500
-        gspread_client = gspread.authorize(creds)
-        # Call the new utility function
-        result = process_reactor_reports(
-            sheet_id_mapping_data=sheet_id_mapping_data,
-            sheet_recipients_data=sheet_recipients_data,
-            table_range_data=table_range_data,
-            input_date=date,
-            user_id=user_id,
+        job, created = reactor_scheduler.trigger(
+            plant, date, user_id,
             send_email=send_email,
             send_whatsapp=send_whatsapp,
-            template_path=template_path,
-            output_dir=temp_dir,
-            gspread_client=gspread_client,
-            logger=logger
+            process_name=process_name,
+            google_access_token=google_access_token,
+            google_refresh_token=google_refresh_token,
+            job_id=requested_job_id,
+            dry_run=request.form.get('dry_run') == 'true'
         )
-        # Clean up user-specific temporary directory
-        from Utils.temp_manager import cleanup_user_temp_dir
-        cleanup_user_temp_dir(user_id, OUTPUT_DIR)
-        if 'error' in result:
-            return jsonify({"error": result['error']}), 400
-        return jsonify(result), 200
+    except ReactorRunConflict as e:
+        # Only the same user with the same options may join a running report
+        logger.info(f"Rejected reactor report for {plant} on {date}: {e}")
+        return jsonify({"error": str(e), "already_running": True}), 409
+    if not created:
+        logger.info(f"Reactor report for {plant} on {date} already running as job {job['id']}")
+    
+    if request.form.get('async') == 'true':
+        return jsonify({"success": True, "job_id": job['id'], "status": job['status'], "already_running": not created}), 202
+    
+    job = reactor_scheduler.wait(job['id'])
+    if job['status'] == 'failed':
+        return jsonify({"error": job['error'], "job_id": job['id']}), 500
+    result = dict(job['result'] or {})
+    result['job_id'] = job['id']
+    if 'error' in result:
+        return jsonify({"error": result['error']}), 400
+    return jsonify(result), 200
+
+@app.route("/api/reactor_reports", methods=["POST"])
+def reactor_report():
+    try:
+        return _trigger_reactor_report('KR')
     except Exception as e:
         logger.error(f"Error generating reactor reports: {e}")
         return jsonify({"error": str(e)}), 500
-    finally:
-        pass
 
 @app.route("/api/kr_reactor_reports", methods=["POST"])
 def kr_reactor_report():
-    """New endpoint specifically for KR_ReactorReports.jsx with OAuth email support"""
+    """Endpoint for KR_ReactorReports.jsx with OAuth email support"""
     try:
-        user_id = session.get('user', {}).get('email')
-        if not user_id:
-            logger.error("No user_id found in session. User must be logged in to send reports.")
-            return jsonify({"error": "User not authenticated"}), 401
-        
-        # Get form data
-        send_email = request.form.get('send_email') == 'true'
-        send_whatsapp = request.form.get('send_whatsapp') == 'true'
-        date = request.form.get('date')
-        process_name = request.form.get('process_name', 'reactor-report')  # Default to 'reactor-report'
-        
-        # Get Google tokens if provided by frontend
-        google_access_token = request.form.get('google_access_token')
-        google_refresh_token = request.form.get('google_refresh_token')
-        
-        if not date:
-            return jsonify({"error": "Date is required"}), 400
+        # Process name selects the OAuth email account; Google tokens are used if provided
+        return _trigger_reactor_report(
+            'KR',
+            process_name=request.form.get('process_name', 'reactor-report'),
+            use_google_tokens=True
+        )
+    except Exception as e:
+        logger.error(f"Error generating KR reactor reports: {e}")
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/reactor_reports/backfill", methods=["POST"])
+def reactor_report_backfill():
+    """Queue reactor report runs for every mapped date in a window (admin only)"""
+    try:
+        if 'user' not in session:
+            return jsonify({"error": "Not logged in"}), 401
+        current_user = session.get('user')
+        if current_user.get('role') != 'admin':
+            return jsonify({"error": "Admin access required"}), 403
         
-        # Fetch sheet IDs from Google Sheet (mapping sheet)
+        data = request.get_json(silent=True) or request.form
         try:
-            reactor_reports_sheet_id = "1XOLQvy6j7syAlOKpQ3J2o6DcgiSZsSO1xxWlWih_QOY"
-            sheet_id_mapping_data = fetch_google_sheet_data(reactor_reports_sheet_id, 'Sheet_ID_Reactor')
-            sheet_recipients_data = fetch_google_sheet_data(reactor_reports_sheet_id, 'Recipients')
-            table_range_data = fetch_google_sheet_data(reactor_reports_sheet_id, 'Table Ranges')
-        except Exception as e:
-            logger.error(f"Error fetching sheet IDs from Google Sheet: {e}")
-            return jsonify({"error": "Failed to fetch sheet IDs from Google Sheet"}), 500
-        
-        # Get user-specific temporary directory for processing
-        from Utils.temp_manager import get_user_temp_dir
-        temp_dir = get_user_temp_dir(user_id, OUTPUT_DIR)
-        template_path = os.path.join(os.path.dirname(__file__), "reactorreportformat.docx")
-        
-        if not os.path.exists(template_path):
-            return jsonify({"error": "Reactor report template not found"}), 500
-        
-        gspread_client = gspread.authorize(creds)
-        
-        # Call the new utility function with OAuth email support
-        result = process_reactor_reports(
-            sheet_id_mapping_data=sheet_id_mapping_data,
-            sheet_recipients_data=sheet_recipients_data,
-            table_range_data=table_range_data,
-            input_date=date,
-            user_id=user_id,
-            send_email=send_email,
-            send_whatsapp=send_whatsapp,
-            template_path=template_path,
-            output_dir=temp_dir,
-            gspread_client=gspread_client,
-            logger=logger,
-            process_name=process_name,  # Pass the process name for OAuth email selection
-            google_access_token=google_access_token,  # Pass Google tokens if available
-            google_refresh_token=google_refresh_token
+            start_date = datetime.strptime(data.get('start_date', ''), "%Y-%m-%d").date()
+            end_date = datetime.strptime(data.get('end_date', ''), "%Y-%m-%d").date()
+        except ValueError:
+            return jsonify({"error": "start_date and end_date are required (YYYY-MM-DD)"}), 400
+        
+        queued = reactor_scheduler.backfill(
+            data.get('plant', 'KR'), start_date, end_date, current_user.get('email'),
+            send_email=str(data.get('send_email')).lower() == 'true',
+            send_whatsapp=str(data.get('send_whatsapp')).lower() == 'true'
         )
-        
-        # Clean up user-specific temporary directory
-        from Utils.temp_manager import cleanup_user_temp_dir
-        cleanup_user_temp_dir(user_id, OUTPUT_DIR)
-        
-        if 'error' in result:
-            return jsonify({"error": result['error']}), 400
-        
-        return jsonify(result), 200
-        
+        return jsonify({"success": True, "jobs": queued, "count": len(queued)}), 202
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
-        logger.error(f"Error generating KR reactor reports: {e}")
+        logger.error(f"Error queuing reactor report backfill: {e}")
         return jsonify({"error": str(e)}), 500
-    finally:
-        pass
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def get_job_status(job_id):
+    """Status, progress and result of a background job"""
+    current_user = session.get('user')
+    if not current_user:
+        return jsonify({"error": "Not logged in"}), 401
+    job = job_store.get(job_id)
+    if not job or (job.get('owner') != current_user.get('email') and current_user.get('role') != 'admin'):
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify({"success": True, "job": job}), 200
+
+@app.route("/api/jobs/<job_id>/events", methods=["GET"])
+def stream_job_events(job_id):
+    """Server-Sent Events stream of a job's progress (rendered, uploaded, sent, failed, ..., end)"""
+    current_user = session.get('user')
+    if not current_user:
+        return jsonify({"error": "Not logged in"}), 401
+    if not valid_job_id(job_id):
+        return jsonify({"error": "Job not found"}), 404
+    def can_read(job):
+        return job.get('owner') == current_user.get('email') or current_user.get('role') == 'admin'
+    
+    # The stream may be opened before the job is created (client supplied ids); ownership is
+    # checked again on every poll of the stream
+    job = job_store.get(job_id)
+    if job and not can_read(job):
+        return jsonify({"error": "Job not found"}), 404
+    try:
+        last_event_id = int(request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0)
+    except ValueError:
+        last_event_id = 0
+    return Response(
+        stream_with_context(job_store.stream_events(job_id, last_event_id, can_read=can_read)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route("/api/jobs", methods=["GET"])
+def list_jobs():
+    """Recent jobs of the current user (all users for admins)"""
+    current_user = session.get('user')
+    if not current_user:
+        return jsonify({"error": "Not logged in"}), 401
+    owner = None if current_user.get('role') == 'admin' else current_user.get('email')
+    limit = min(request.args.get('limit', 50, type=int), 200)
+    jobs = job_store.list(kind=request.args.get('kind'), owner=owner, limit=limit)
+    return jsonify({"success": True, "jobs": jobs}), 200
 
 @app.route("/api/update_website_password", methods=["POST"])
 def update_website_password():
@@ -2299,10 +2484,10 @@ def process_template(template_path, output_path, data_dict):
         
         # Replace placeholders in the document
         for paragraph in doc.paragraphs:
-            for key, value in data_dict.items():
-                placeholder = "{{{}}}".format(key)
-                if placeholder in paragraph.text:
-                    paragraph.text = paragraph.text.replace(placeholder, str(value))
+            if '{' in paragraph.text:
+                rendered = render_template(paragraph.text, data_dict)
+                if rendered != paragraph.text:
+                    paragraph.text = rendered
         
         # Save the processed document
         doc.save(output_path)
@@ -2356,12 +2541,40 @@ def handle_exception(e):
     return jsonify({"error": "Internal server error", "details": str(e)}), 500
 
 # Health check endpoint for Render
+@app.route('/livez')
+def liveness_check():
+    # Process is up and serving requests; no dependency calls
+    return jsonify({"status": "alive"}), 200
+
+# Internal callers (deploy scripts, monitoring) send this token in X-Readiness-Token to bypass the cache
+READINESS_FORCE_TOKEN = os.getenv('READINESS_FORCE_TOKEN')
+
+def _may_force_readiness():
+    """Fresh probes on demand are limited to admins and internal callers holding the token"""
+    token = request.headers.get('X-Readiness-Token')
+    if READINESS_FORCE_TOKEN and token and hmac.compare_digest(token, READINESS_FORCE_TOKEN):
+        return True
+    return session.get('user', {}).get('role') == 'admin'
+
+@app.route('/readyz')
+def readiness_check():
+    # Cached per-dependency probes; 503 only when a critical dependency is down
+    force = request.args.get('force') == 'true'
+    if force and not _may_force_readiness():
+        return jsonify({"error": "force=true requires admin access or the readiness token"}), 403
+    result = check_readiness(force=force)
+    status_code = 503 if result['status'] == 'not_ready' else 200
+    return jsonify(result), status_code
+
 @app.route('/healthz')
 def health_check():
     try:
-        # Check Firebase connection by getting users
-        users = firebase_get_all_users()
-        return jsonify({"status": "healthy", "database": "connected"}), 200
+        # Backed by the cached readiness probes (single-document Firestore read)
+        result = check_readiness()
+        firestore_check = result['checks']['firestore']
+        if firestore_check['status'] != 'ok':
+            raise RuntimeError(firestore_check.get('error', 'Firestore unavailable'))
+        return jsonify({"status": "healthy", "database": "connected", "readiness": result['status']}), 200
     except Exception as e:
         logger.error("Health check failed: {}".format(e))
         return jsonify({"status": "unhealthy", "error": str(e)}), 500
@@ -3722,6 +3935,92 @@ def get_all_orders_endpoint():
             "message": f"Error fetching all orders: {str(e)}"
         }), 500
 
+@app.route("/api/backfill_order_items", methods=["POST"])
+def backfill_order_items_endpoint():
+    """Copy existing orders into the order_items subcollections read by get_orders_page (admin only)"""
+    try:
+        if 'user' not in session:
+            return jsonify({"error": "Not logged in"}), 401
+        current_user = session.get('user')
+        if current_user.get('role') != 'admin':
+            return jsonify({"error": "Admin access required"}), 403
+        
+        data = request.get_json(silent=True) or {}
+        result = backfill_order_items(data.get('factory'))
+        return jsonify(result), 200 if result['success'] else 500
+        
+    except Exception as e:
+        logger.error(f"Error backfilling order items: {str(e)}")
+        return jsonify({
+            "success": False,
+            "message": f"Error backfilling order items: {str(e)}"
+        }), 500
+
+@app.route("/api/get_orders_page", methods=["GET"])
+def get_orders_page():
+    """Get one page of orders with server-side filters, sorting and a cursor token"""
+    try:
+        if 'user' not in session:
+            return jsonify({"error": "Not logged in"}), 401
+        
+        factory = request.args.get('factory')
+        
+        # Listing across all factories is restricted like get_all_orders
+        current_user = session.get('user')
+        if not factory and current_user.get('role') != 'admin':
+            return jsonify({"error": "Admin access required"}), 403
+        
+        date_from = request.args.get('dateFrom')
+        date_to = request.args.get('dateTo')
+        try:
+            date_from = datetime.strptime(date_from, "%Y-%m-%d") if date_from else None
+            # dateTo is inclusive of the whole day
+            date_to = datetime.strptime(date_to, "%Y-%m-%d") + timedelta(days=1) if date_to else None
+        except ValueError:
+            return jsonify({
+                "success": False,
+                "message": "dateFrom and dateTo must be in YYYY-MM-DD format"
+            }), 400
+        
+        fields = request.args.get('fields')
+        fields = [f.strip() for f in fields.split(',') if f.strip()] if fields else None
+        
+        try:
+            page = query_orders(
+                factory=factory,
+                status=request.args.get('status'),
+                importance=request.args.get('importance'),
+                given_by=request.args.get('givenBy'),
+                material=request.args.get('material'),
+                date_from=date_from,
+                date_to=date_to,
+                sort_by=request.args.get('sortBy', 'createdAt'),
+                sort_dir=request.args.get('sortDir', 'desc'),
+                limit=request.args.get('limit', 50, type=int),
+                cursor=request.args.get('cursor'),
+                fields=fields
+            )
+        except ValueError as e:
+            return jsonify({
+                "success": False,
+                "message": str(e)
+            }), 400
+        
+        return jsonify({
+            "success": True,
+            "data": page['orders'],
+            "count": len(page['orders']),
+            "nextCursor": page['next_cursor'],
+            "factory": factory
+        }), 200
+        
+    except Exception as e:
+        logger.error(f"Error fetching orders page: {str(e)}")
+        return jsonify({
+            "success": False,
+            "message": f"Error fetching orders: {str(e)}"
+        }), 500
+
 @app.route("/api/get_plant_material_data", methods=["POST"])
 def get_plant_material_data():
     """Get material data for a specific plant from Google Sheets"""
@@ -4075,11 +4374,12 @@ def send_order_notification():
 
 def send_log_report_to_user(user_email, delivery_stats, send_email_enabled, send_whatsapp_enabled, logger):
     """
-    Send log report to the user who generated the reports
+    Send log report to the user who generated the reports (delivery_stats may be a DeliveryLog)
     """
     try:
         # Import the PDF generation function
         from Utils.process_utils import generate_log_report_pdf
+        delivery_stats = as_delivery_stats(delivery_stats)
         
         # Generate PDF log report
         pdf_path = generate_log_report_pdf(delivery_stats, OUTPUT_DIR, logger)
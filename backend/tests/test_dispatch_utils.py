@@ -0,0 +1,51 @@
+from Utils import dispatch_utils
+from Utils.delivery_log import DeliveryLog
+from Utils.dispatch_utils import ChannelDispatcher
+from Utils.latency_stats import LatencyStats
+
+CHANNELS = {'email': {'workers': 2}, 'whatsapp': {'workers': 1}}
+
+
+def _payload(name, email_to, phone, row_index):
+    return {
+        'name': name, 'contact': phone, 'row_index': row_index, 'channels': ['email', 'whatsapp'],
+        'email_to': email_to, 'email_cc': None, 'email_bcc': None, 'subject': 'Report',
+        'email_content': f"Hello {name}", 'recipient_phone': phone,
+        'template_contents': {'report.docx': f"Hello {name}"}, 'caption_message': ''
+    }
+
+
+def _senders():
+    return {
+        'email': lambda p: (p['email_to'] != 'c@example.com', 'Invalid recipient email address'),
+        'whatsapp': lambda p: (True, None)
+    }
+
+
+def test_dispatch_records_into_empty_log(monkeypatch, tmp_path):
+    monkeypatch.setattr(dispatch_utils, 'latency_stats', LatencyStats(path=str(tmp_path / 'latency.json')))
+    payloads = [_payload('A', 'a@example.com', '911', 0), _payload('B', 'b@example.com', '912', 1),
+                _payload('C', 'c@example.com', '913', 2)]
+    log = DeliveryLog()
+    results = []
+
+    ChannelDispatcher(channels=CHANNELS).dispatch(payloads, _senders(), on_result=lambda *args: results.append(args), log=log)
+
+    assert len(log) == 6
+    assert len(results) == 6
+    stats = log.to_delivery_stats()
+    assert stats['successful_deliveries'] == 3
+    assert [c['name'] for c in stats['failed_contacts']] == ['C']
+    assert stats['failed_contacts'][0]['row_index'] == 2
+
+
+def test_dispatch_deduplicated_records_every_payload_into_empty_log(monkeypatch, tmp_path):
+    monkeypatch.setattr(dispatch_utils, 'latency_stats', LatencyStats(path=str(tmp_path / 'latency.json')))
+    payloads = [_payload('A', 'a@example.com', '911', 0), _payload('B', 'b@example.com', '912', 1)]
+    log = DeliveryLog()
+
+    ChannelDispatcher(channels=CHANNELS).dispatch_deduplicated(payloads, _senders(), log=log)
+
+    stats = log.to_delivery_stats()
+    assert stats['successful_deliveries'] == 2
+    assert sorted(stats['channel_logs']['email']) == ['A', 'B']
@@ -0,0 +1,36 @@
+from Utils.fanout import FanoutPlan
+
+
+def _email(name, to, content='Report', cc=None):
+    return {'name': name, 'email_to': to, 'subject': 'Monthly report', 'email_content': content,
+            'email_cc': cc, 'email_bcc': None, 'channels': ['email']}
+
+
+def test_same_content_for_different_people_goes_out_once_in_bcc():
+    plan = FanoutPlan([_email('A', 'a@example.com', cc='boss@example.com'),
+                       _email('B', 'b@example.com', cc='boss@example.com'),
+                       _email('C', 'c@example.com', content='Other', cc='boss@example.com')])
+    merged, single = plan.units
+    assert plan.members == [[0, 1], [2]]
+    # Nobody sees the other rows' addresses and the CC gets a single copy of the shared content
+    assert merged['email_undisclosed'] and merged['email_bcc'] == 'a@example.com,b@example.com'
+    assert merged['email_cc'] == 'boss@example.com'
+    assert not single.get('email_undisclosed') and single['email_to'] == 'c@example.com'
+    assert plan.summary()['sends_saved'] == 1
+
+
+def test_merged_messages_are_chunked_and_rows_without_address_stay_apart():
+    payloads = [_email('A', 'a@example.com'), _email('B', 'b@example.com,c@example.com'),
+                _email('D', 'd@example.com'), _email('E', '')]
+    plan = FanoutPlan(payloads, max_email_recipients=2)
+    assert plan.members == [[3], [0], [1], [2]]
+    assert [unit['email_bcc'] for unit in plan.units[1:]] == ['a@example.com', 'b@example.com,c@example.com', 'd@example.com']
+
+
+def test_same_to_addresses_are_sent_once_and_expanded():
+    plan = FanoutPlan([_email('A', 'a@example.com'), _email('A again', 'A@example.com'), _email('B', 'b@example.com', content='Other')])
+    assert plan.members == [[0, 1], [2]]
+    assert not plan.units[0].get('email_undisclosed')
+    statuses = plan.expand([{'email': {'status': 'failed', 'reason': 'bad', 'seconds': 0.1}},
+                            {'email': {'status': 'success', 'reason': None, 'seconds': 0.1}}])
+    assert [s['email']['status'] for s in statuses] == ['failed', 'failed', 'success']
@@ -0,0 +1,18 @@
+from Utils import file_lock
+
+
+def test_claim_is_granted_once(tmp_path):
+    assert file_lock.claim('reactor_schedule_KR_2025-03-05_06:00', lock_dir=str(tmp_path))
+    assert not file_lock.claim('reactor_schedule_KR_2025-03-05_06:00', lock_dir=str(tmp_path))
+    assert file_lock.purge_claims(-1, lock_dir=str(tmp_path)) == 1
+    assert file_lock.claim('reactor_schedule_KR_2025-03-05_06:00', lock_dir=str(tmp_path))
+
+
+def test_file_lock_excludes_second_holder(tmp_path):
+    first = file_lock.FileLock('reactor_run', lock_dir=str(tmp_path))
+    second = file_lock.FileLock('reactor_run', lock_dir=str(tmp_path))
+    assert first.acquire(blocking=False)
+    assert not second.acquire(blocking=False)
+    first.release()
+    assert second.acquire(blocking=False)
+    second.release()
@@ -0,0 +1,31 @@
+import os
+import time
+
+from Utils.job_store import JobStore
+
+
+def test_stream_waits_for_job_and_rechecks_owner(tmp_path):
+    store = JobStore(store_dir=str(tmp_path))
+    stream = store.stream_events('job-0000001', can_read=lambda job: job['owner'] == 'a@example.com',
+                                 max_seconds=5, poll_seconds=0.01)
+    assert next(stream).startswith('retry:')
+    # The job is created for another user after the stream was opened
+    store.create('send_reports', owner='b@example.com', job_id='job-0000001')
+    store.publish('job-0000001', 'sent', name='X')
+    remaining = list(stream)
+    assert len(remaining) == 1 and 'not_found' in remaining[0]
+
+
+def test_purge_removes_old_finished_jobs(tmp_path):
+    store = JobStore(store_dir=str(tmp_path))
+    old = store.create('send_reports', owner='a@example.com', job_id='job-old-0001')
+    store.complete(old['id'], {'message': 'done'})
+    running = store.create('send_reports', owner='a@example.com', job_id='job-run-0001')
+    store.start(running['id'])
+    past = time.time() - 30 * 86400
+    for name in os.listdir(tmp_path):
+        os.utime(tmp_path / name, (past, past))
+
+    assert store.purge(max_age_seconds=86400) == 1
+    assert sorted(os.listdir(tmp_path)) == ['job-run-0001.events.ndjson', 'job-run-0001.json']
+    assert store.get(old['id']) is None
@@ -0,0 +1,23 @@
+from datetime import datetime
+from unittest import mock
+
+from Utils import reactor_matchers
+from Utils.reactor_matchers import DateParser
+
+
+def test_ambiguous_dates_follow_fixed_format_priority():
+    parser = DateParser()
+    # A month-first value must not make later ambiguous values parse month-first
+    assert parser.parse('12/25/2025')[0] == '2025-12-25'
+    assert parser.parse('03/04/2025')[0] == '2025-04-03'
+    assert DateParser().parse('03/04/2025')[0] == '2025-04-03'
+
+
+def test_time_part_is_ignored_and_results_are_memoized():
+    parser = DateParser(formats=['%Y-%m-%d'])
+    with mock.patch.object(reactor_matchers, 'datetime', mock.Mock(wraps=datetime)) as fake_datetime:
+        assert parser.parse('2025-03-05 06:30:00')[0] == '2025-03-05'
+        assert parser.parse('2025-03-05')[0] == '2025-03-05'
+        assert parser.parse('not a date') == (None, None)
+        assert parser.parse('not a date') == (None, None)
+    assert fake_datetime.strptime.call_count == 2
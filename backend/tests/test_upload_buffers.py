@@ -0,0 +1,27 @@
+import io
+
+from Utils.upload_buffers import prepare_file_paths
+
+
+class _Upload:
+    """The parts of a Werkzeug FileStorage that UploadBuffer reads"""
+
+    def __init__(self, filename, data=b'%PDF-1.4'):
+        self.filename = filename
+        self.stream = io.BytesIO(data)
+        self.mimetype = 'application/pdf'
+
+
+def _upload(filename):
+    return _Upload(filename)
+
+
+def test_report_buffers_keep_the_uploaded_name():
+    # file_sequence entries refer to the name the browser uploaded
+    buffers = prepare_file_paths([_upload('1755776006074-report.pdf')], is_upload=True, in_memory=True)
+    assert [b.name for b in buffers] == ['1755776006074-report.pdf']
+
+
+def test_clean_names_drops_numeric_upload_prefix():
+    buffers = prepare_file_paths([_upload('1755776006074-report.pdf')], is_upload=True, in_memory=True, clean_names=True)
+    assert [b.name for b in buffers] == ['report.pdf']
@@ -18,6 +18,7 @@ import KR_Add_MaterialList from './KR_Departments/KR_Services/KR_Add_MaterialLis
 import KR_Delete_MaterialList from './KR_Departments/KR_Services/KR_Delete_MaterialList';
 import KR_MaterialInward from './KR_Departments/KR_Services/KR_MaterialInward';
 import KR_MaterialOutward from './KR_Departments/KR_Services/KR_MaterialOutward';
+import KR_OrderStatus from './KR_Departments/KR_Services/KR_OrderStatus';
 
 // Import OM Store Services components
 import OM_PurchaseIndent from './OM_Departments/OM_Services/OM_PurchaseIndent';
@@ -1107,6 +1108,11 @@ function App() {
             <KR_MaterialOutward /> : 
             <Navigate to="/login" replace />
         } />
+        <Route path="/kerur/kr_store/kr_order_status" element={
+          isAuthenticated ? 
+            <KR_OrderStatus /> : 
+            <Navigate to="/login" replace />
+        } />
 
         {/* GB Store Routes */}
         <Route path="/gulbarga/gb_store/gb_add_material_list" element={
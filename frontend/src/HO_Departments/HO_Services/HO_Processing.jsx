@@ -10,6 +10,7 @@ import { Route, Routes, useNavigate } from 'react-router-dom';
 import { getApiUrl, makeApiCall, ENDPOINTS } from '../../config.js';
 import { useAuth } from '../../Components/AuthContext';
 import axios from 'axios';
+import { newJobId, followJobEvents, describeJobEvent } from '../../utils/jobEvents';
 import AttachmentSequence from '../../Components/AttachmentSequence';
 import BackButton from '../../Components/BackButton';
 
@@ -157,6 +158,7 @@ function Processing({ mode = 'single' }) {
   const [selectedPlant, setSelectedPlant] = useState('');
   const [selectedPlantData, setSelectedPlantData] = useState({});
   const [loading, setLoading] = useState(false);
+  const [progressText, setProgressText] = useState('');
   const [employeeDetails, setEmployeeDetails] = useState('');
   const [refreshTrigger, setRefreshTrigger] = useState(0);
   const [employeeCode, setEmployeeCode] = useState('');
@@ -246,6 +248,14 @@ function Processing({ mode = 'single' }) {
     setError(null);
     setResult(null);
 
+    // Progress of a batch run, streamed while the request is in flight
+    const jobId = mode === 'single' ? null : newJobId();
+    const counts = { rendered: 0, sent: 0, failed: 0, noun: 'slip' };
+    const stopJobEvents = jobId ? followJobEvents(jobId, (jobEvent) => {
+      const text = describeJobEvent(jobEvent, counts);
+      if (text) setProgressText(text);
+    }) : () => {};
+
     const monthsData = months.map(monthData => {
       const [fyStartYear] = monthData.financialYear.split('-').map(Number);
       const calendarYear = monthData.month === 'January' || monthData.month === 'February' || monthData.month === 'March' 
@@ -277,6 +287,9 @@ function Processing({ mode = 'single' }) {
       if (mode === 'single') {
         payload.employee_code = employeeDetails;
       }
+      if (jobId) {
+        payload.job_id = jobId;
+      }
 
       const response = await axios.post(getApiUrl(endpoint), payload);
 
@@ -358,6 +371,8 @@ function Processing({ mode = 'single' }) {
         console.log('User session expired, redirecting to login...');
       }
     } finally {
+      stopJobEvents();
+      setProgressText('');
       setLoading(false);
     }
   };
@@ -405,6 +420,7 @@ function Processing({ mode = 'single' }) {
     <>
       <Navbar />
       {loading && <LoadingSpinner />}
+      {loading && progressText && <div className="processing-progress">{progressText}</div>}
       <Routes>
         <Route path="settings" element={<Settings />} />
         <Route path="" element={
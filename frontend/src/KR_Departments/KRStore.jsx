@@ -6,6 +6,7 @@ import KR_Add_MaterialList from './KR_Services/KR_Add_MaterialList';
 import KR_Delete_MaterialList from './KR_Services/KR_Delete_MaterialList';
 import KR_MaterialInward from './KR_Services/KR_MaterialInward';
 import KR_MaterialOutward from './KR_Services/KR_MaterialOutward';
+import KR_OrderStatus from './KR_Services/KR_OrderStatus';
 // DEPARTMENTS_CONFIG removed - using centralized FACTORY_RBAC_CONFIG instead
 import '../App.css';
 import BackButton from '../Components/BackButton';
@@ -20,6 +21,7 @@ const KRStore = () => {
   // Static services for KR Store department (only existing services)
   const krStoreServices = [
     { key: 'kr_purchase_indent', name: 'Purchase Indent', route: '/kerur/kr_store/kr_purchase_indent' },
+    { key: 'kr_order_status', name: 'Order Status', route: '/kerur/kr_store/kr_order_status' },
     // { key: 'kr_add_material_list', name: 'Add Material', route: '/kerur/kr_store/kr_add_material_list' },
     // { key: 'kr_delete_material_list', name: 'Delete Material', route: '/kerur/kr_store/kr_delete_material_list'},
     // { key: 'kr_material_inward', name: 'Material Inward', route: '/kerur/kr_store/kr_material_inward' },
@@ -127,6 +129,9 @@ const KRStore = () => {
       {/* KR Material Outward Service Route */}
       <Route path="kr_material_outward" element={<KR_MaterialOutward />} />
       
+      {/* KR Order Status Service Route */}
+      <Route path="kr_order_status" element={<KR_OrderStatus />} />
+      
       {/* Default Department View */}
       <Route path="" element={
         <div>
@@ -0,0 +1,267 @@
+import React, { useState, useEffect, useCallback } from 'react'
+import axios from 'axios'
+import { useNavigate } from 'react-router-dom'
+import { getApiUrl } from '../../config'
+import '../../OrderStatus.css'
+import LoadingSpinner from '../../LoadingSpinner'
+import BackButton from '../../Components/BackButton'
+
+const FACTORY = 'KR'
+const PAGE_SIZE = 50
+const STATUS_OPTIONS = ['Pending', 'In Progress', 'Completed', 'Cancelled', 'On Hold']
+const IMPORTANCE_OPTIONS = ['Normal', 'Urgent']
+const SORT_OPTIONS = [
+  { value: 'createdAt', label: 'Created' },
+  { value: 'updatedAt', label: 'Last Updated' },
+  { value: 'orderId', label: 'Order ID' },
+  { value: 'status', label: 'Status' },
+  { value: 'importance', label: 'Importance' }
+]
+// The backend only has indexes for status combined with one other filter (see query_orders),
+// so importance, given by and material are offered as a single choice next to status
+const EXTRA_FILTERS = [
+  { value: '', label: 'None' },
+  { value: 'importance', label: 'Importance', param: 'importance' },
+  { value: 'givenBy', label: 'Given By', param: 'givenBy' },
+  { value: 'material', label: 'Material', param: 'material' }
+]
+const LIST_FIELDS = ['orderId', 'givenBy', 'description', 'importance', 'status', 'createdAt', 'updatedAt', 'updatedBy', 'materialNames']
+
+const formatDate = (value) => {
+  if (!value) return '-'
+  const date = new Date(value)
+  return isNaN(date.getTime()) ? String(value) : date.toLocaleString()
+}
+
+const KR_OrderStatus = () => {
+  const navigate = useNavigate()
+  const [orders, setOrders] = useState([])
+  const [nextCursor, setNextCursor] = useState(null)
+  const [loading, setLoading] = useState(false)
+  const [error, setError] = useState('')
+  const [updatingId, setUpdatingId] = useState(null)
+  const [filters, setFilters] = useState({
+    status: '',
+    extraFilter: '',
+    extraValue: '',
+    dateFrom: '',
+    dateTo: '',
+    sortBy: 'createdAt',
+    sortDir: 'desc'
+  })
+
+  const hasDateRange = Boolean(filters.dateFrom || filters.dateTo)
+  // Sorting on a filtered field is rejected by the backend, date ranges need createdAt
+  const sortOptions = SORT_OPTIONS.filter(option => {
+    if (hasDateRange) return option.value === 'createdAt'
+    if (filters.status && option.value === 'status') return false
+    if (filters.extraFilter === 'importance' && filters.extraValue && option.value === 'importance') return false
+    return true
+  })
+
+  const buildParams = (cursor) => {
+    const params = {
+      factory: FACTORY,
+      sortBy: filters.sortBy,
+      sortDir: filters.sortDir,
+      limit: PAGE_SIZE,
+      fields: LIST_FIELDS.join(',')
+    }
+    if (filters.status) params.status = filters.status
+    const extra = EXTRA_FILTERS.find(f => f.value === filters.extraFilter)
+    if (extra && extra.param && filters.extraValue.trim()) params[extra.param] = filters.extraValue.trim()
+    if (filters.dateFrom) params.dateFrom = filters.dateFrom
+    if (filters.dateTo) params.dateTo = filters.dateTo
+    if (cursor) params.cursor = cursor
+    return params
+  }
+
+  const fetchOrders = useCallback(async (cursor = null) => {
+    setLoading(true)
+    setError('')
+    try {
+      const response = await axios.get(getApiUrl('get_orders_page'), {
+        params: buildParams(cursor),
+        withCredentials: true
+      })
+      if (response.data.success) {
+        setOrders(prev => (cursor ? [...prev, ...response.data.data] : response.data.data))
+        setNextCursor(response.data.nextCursor)
+      } else {
+        setError(response.data.message || 'Failed to load orders')
+      }
+    } catch (err) {
+      console.error('Error fetching orders:', err)
+      setError(err.response?.data?.message || err.response?.data?.error || 'Failed to load orders')
+    } finally {
+      setLoading(false)
+    }
+  // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [filters])
+
+  useEffect(() => {
+    fetchOrders()
+  }, [fetchOrders])
+
+  const handleFilterChange = (field, value) => {
+    setFilters(prev => {
+      const next = { ...prev, [field]: value }
+      if (field === 'extraFilter') next.extraValue = ''
+      // Keep the sort field valid for the new filters
+      if (next.dateFrom || next.dateTo) next.sortBy = 'createdAt'
+      if (next.status && next.sortBy === 'status') next.sortBy = 'createdAt'
+      if (next.extraFilter === 'importance' && next.extraValue && next.sortBy === 'importance') next.sortBy = 'createdAt'
+      return next
+    })
+  }
+
+  const handleStatusUpdate = async (order, status) => {
+    setUpdatingId(order.orderId)
+    try {
+      const response = await axios.post(getApiUrl('update_order_status'), {
+        factory: FACTORY,
+        orderId: order.orderId,
+        status
+      }, { withCredentials: true })
+      if (response.data.success) {
+        setOrders(prev => prev.map(o => (
+          o.orderId === order.orderId ? { ...o, status, updatedAt: new Date().toISOString() } : o
+        )))
+      } else {
+        alert(response.data.message || 'Failed to update order status')
+      }
+    } catch (err) {
+      console.error('Error updating order status:', err)
+      alert(err.response?.data?.message || 'Failed to update order status')
+    } finally {
+      setUpdatingId(null)
+    }
+  }
+
+  const extraFilter = EXTRA_FILTERS.find(f => f.value === filters.extraFilter)
+
+  return (
+    <div className="os-container">
+      <BackButton label="Back to Store" onClick={() => navigate('/kerur/kr_store')} />
+      <h2 className="os-title">Order Status</h2>
+
+      <div className="os-filters">
+        <div className="os-filter-group">
+          <label htmlFor="os-status">Status</label>
+          <select id="os-status" value={filters.status} onChange={(e) => handleFilterChange('status', e.target.value)}>
+            <option value="">All</option>
+            {STATUS_OPTIONS.map(option => <option key={option} value={option}>{option}</option>)}
+          </select>
+        </div>
+
+        <div className="os-filter-group">
+          <label htmlFor="os-extra-filter">Filter By</label>
+          <select id="os-extra-filter" value={filters.extraFilter} onChange={(e) => handleFilterChange('extraFilter', e.target.value)}>
+            {EXTRA_FILTERS.map(option => <option key={option.value} value={option.value}>{option.label}</option>)}
+          </select>
+        </div>
+
+        {extraFilter && extraFilter.value === 'importance' && (
+          <div className="os-filter-group">
+            <label htmlFor="os-extra-value">Importance</label>
+            <select id="os-extra-value" value={filters.extraValue} onChange={(e) => handleFilterChange('extraValue', e.target.value)}>
+              <option value="">All</option>
+              {IMPORTANCE_OPTIONS.map(option => <option key={option} value={option}>{option}</option>)}
+            </select>
+          </div>
+        )}
+        {extraFilter && (extraFilter.value === 'givenBy' || extraFilter.value === 'material') && (
+          <div className="os-filter-group">
+            <label htmlFor="os-extra-value">{extraFilter.label}</label>
+            <input
+              id="os-extra-value"
+              type="text"
+              value={filters.extraValue}
+              placeholder={extraFilter.value === 'material' ? 'Exact material name' : 'Exact name'}
+              onChange={(e) => handleFilterChange('extraValue', e.target.value)}
+            />
+          </div>
+        )}
+
+        <div className="os-filter-group">
+          <label htmlFor="os-date-from">From</label>
+          <input id="os-date-from" type="date" value={filters.dateFrom} onChange={(e) => handleFilterChange('dateFrom', e.target.value)} />
+        </div>
+        <div className="os-filter-group">
+          <label htmlFor="os-date-to">To</label>
+          <input id="os-date-to" type="date" value={filters.dateTo} onChange={(e) => handleFilterChange('dateTo', e.target.value)} />
+        </div>
+
+        <div className="os-filter-group">
+          <label htmlFor="os-sort-by">Sort By</label>
+          <select id="os-sort-by" value={filters.sortBy} onChange={(e) => handleFilterChange('sortBy', e.target.value)}>
+            {sortOptions.map(option => <option key={option.value} value={option.value}>{option.label}</option>)}
+          </select>
+        </div>
+        <div className="os-filter-group">
+          <label htmlFor="os-sort-dir">Order</label>
+          <select id="os-sort-dir" value={filters.sortDir} onChange={(e) => handleFilterChange('sortDir', e.target.value)}>
+            <option value="desc">Newest / Z-A</option>
+            <option value="asc">Oldest / A-Z</option>
+          </select>
+        </div>
+      </div>
+
+      {error && <div className="os-error">{error}</div>}
+
+      <div className="os-table-wrapper">
+        <table className="os-table">
+          <thead>
+            <tr>
+              <th>Order ID</th>
+              <th>Given By</th>
+              <th>Materials</th>
+              <th>Description</th>
+              <th>Importance</th>
+              <th>Created</th>
+              <th>Last Updated</th>
+              <th>Status</th>
+            </tr>
+          </thead>
+          <tbody>
+            {orders.map(order => (
+              <tr key={order.orderId}>
+                <td>{order.orderId}</td>
+                <td>{order.givenBy || '-'}</td>
+                <td>{(order.materialNames || []).join(', ') || '-'}</td>
+                <td>{order.description || '-'}</td>
+                <td className={order.importance === 'Urgent' ? 'os-urgent' : ''}>{order.importance || '-'}</td>
+                <td>{formatDate(order.createdAt)}</td>
+                <td>{formatDate(order.updatedAt)}{order.updatedBy ? ` (${order.updatedBy})` : ''}</td>
+                <td>
+                  <select
+                    value={order.status || ''}
+                    disabled={updatingId === order.orderId}
+                    onChange={(e) => handleStatusUpdate(order, e.target.value)}
+                  >
+                    {!STATUS_OPTIONS.includes(order.status) && <option value={order.status || ''}>{order.status || '-'}</option>}
+                    {STATUS_OPTIONS.map(option => <option key={option} value={option}>{option}</option>)}
+                  </select>
+                </td>
+              </tr>
+            ))}
+            {!loading && orders.length === 0 && (
+              <tr>
+                <td colSpan="8" className="os-empty">No orders found</td>
+              </tr>
+            )}
+          </tbody>
+        </table>
+      </div>
+
+      {loading && <LoadingSpinner />}
+      {!loading && nextCursor && (
+        <button type="button" className="os-load-more" onClick={() => fetchOrders(nextCursor)}>
+          Load More
+        </button>
+      )}
+    </div>
+  )
+}
+
+export default KR_OrderStatus
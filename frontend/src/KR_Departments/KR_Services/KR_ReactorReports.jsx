@@ -3,12 +3,14 @@ import { useNavigate } from 'react-router-dom';
 import { useAuth } from '../../Components/AuthContext';
 import '../../Reports.css';
 import { getApiUrl } from '../../config';
+import { newJobId, followJobEvents, describeJobEvent } from '../../utils/jobEvents';
 import LoadingSpinner from '../../LoadingSpinner';
 
 const KR_ReactorReports = () => {
   const navigate = useNavigate();
   const { user, hasPermission } = useAuth();
   const [isLoading, setIsLoading] = useState(false);
+  const [progressText, setProgressText] = useState('');
   const [sendEmail, setSendEmail] = useState(false);
   const [sendWhatsapp, setSendWhatsapp] = useState(false);
   const [date, setDate] = useState(() => {
@@ -62,12 +64,21 @@ const KR_ReactorReports = () => {
 
     setIsLoading(true);
 
+    // Progress of this run (sheets read, rendered, sent), streamed while the request is in flight
+    const jobId = newJobId();
+    const counts = { rendered: 0, sent: 0, failed: 0, noun: 'sheet' };
+    const stopJobEvents = followJobEvents(jobId, (jobEvent) => {
+      const text = describeJobEvent(jobEvent, counts);
+      if (text) setProgressText(text);
+    });
+
     try {
       const formData = new FormData();
 
       formData.append('send_email', sendEmail);
       formData.append('send_whatsapp', sendWhatsapp);
       formData.append('date', date);
+      formData.append('job_id', jobId);
       formData.append('process_name', 'kr_reactor-report');
       
       // Send Google tokens if available in session
@@ -199,6 +210,8 @@ const KR_ReactorReports = () => {
       console.error('Error generating reports:', error);
       alert(error.message || 'Failed to generate reports. Please try again.');
     } finally {
+      stopJobEvents();
+      setProgressText('');
       setIsLoading(false);
     }
   };
@@ -319,7 +332,7 @@ const KR_ReactorReports = () => {
           onClick={handleSubmit}
           disabled={isLoading || (!sendWhatsapp && !sendEmail)}
         >
-          {isLoading ? 'Generating Reports...' : 'Generate Reports'}
+          {isLoading ? (progressText || 'Generating Reports...') : 'Generate Reports'}
         </button>
         
       </div>
@@ -2,6 +2,7 @@ import React, { useState, useCallback, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import '../../Reports.css';
 import { getApiUrl } from '../../config';
+import { newJobId, followJobEvents, describeJobEvent } from '../../utils/jobEvents';
 import { useAuth } from '../../Components/AuthContext';
 import LoadingSpinner from '../../LoadingSpinner';
 
@@ -15,6 +16,7 @@ const Reports = () => {
   const [sheetName, setSheetName] = useState('');
   const [sheetError, setSheetError] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  const [progressText, setProgressText] = useState('');
 
   const [sendWhatsapp, setSendWhatsapp] = useState(false);
   const [sendEmail, setSendEmail] = useState(false);
@@ -124,9 +126,10 @@ const Reports = () => {
           'Content-Type': 'application/json',
         },
         credentials: 'include',
-        body: JSON.stringify({
-          original_request_data: requestData
-        })
+        // Runs stored by send-reports are retried by run_id: only the failed recipients are re-sent
+        body: JSON.stringify(requestData?.run_id
+          ? { run_id: requestData.run_id }
+          : { original_request_data: requestData })
       });
 
       if (!response.ok) {
@@ -678,6 +681,14 @@ const Reports = () => {
 
     setIsLoading(true);
 
+    // Progress of this run, streamed while the send-reports request is in flight
+    const jobId = newJobId();
+    const counts = { rendered: 0, sent: 0, failed: 0 };
+    const stopJobEvents = followJobEvents(jobId, (jobEvent) => {
+      const text = describeJobEvent(jobEvent, counts);
+      if (text) setProgressText(text);
+    });
+
     try {
       const formData = new FormData();
       
@@ -709,6 +720,7 @@ const Reports = () => {
       formData.append('send_whatsapp', sendWhatsapp);
       formData.append('send_email', sendEmail);
       formData.append('mail_subject', mailSubject);
+      formData.append('job_id', jobId);
       formData.append('use_template_as_caption', useTemplateAsCaption);
 
       // Add file sequencing information as a JSON string
@@ -828,6 +840,20 @@ const Reports = () => {
       
       // Show detailed log report
       showDetailedLogReport(result);
+
+      // Some recipients failed: the server kept this run, so a retry re-sends only those
+      if (result.run_id) {
+        const failedContacts = result.delivery_stats?.failed_contacts || [];
+        if (failedContacts.some(contact => /token expired|session expired/i.test(contact.reason || ''))) {
+          setStoredRequestData({ run_id: result.run_id });
+          setShowTokenExpiredModal(true);
+          return;
+        }
+        if (window.confirm(`${failedContacts.length} recipient(s) could not be reached. Retry only the failed recipients now?`)) {
+          await retryReports({ run_id: result.run_id });
+          return;
+        }
+      }
       
       // Reset form
       setTemplateFiles([]);
@@ -847,6 +873,8 @@ const Reports = () => {
       console.error('Error generating reports:', error);
       alert(error.message || 'Failed to generate reports. Please try again.');
     } finally {
+      stopJobEvents();
+      setProgressText('');
       setIsLoading(false);
     }
   };
@@ -1269,7 +1297,7 @@ const Reports = () => {
         onClick={handleSubmit}
         disabled={previewItems.filter(item => item.file_type === 'message').length === 0 || !sheetId || !!sheetError || isLoading || (!sendWhatsapp && !sendEmail)}
       >
-        {isLoading ? 'Generating Reports...' : 'Generate Reports'}
+        {isLoading ? (progressText || 'Generating Reports...') : 'Generate Reports'}
       </button>
     </div>
   );
@@ -10,6 +10,7 @@ import { Route, Routes } from 'react-router-dom';
 import { getApiUrl, makeApiCall, ENDPOINTS } from './config.js';
 import { useAuth } from './Components/AuthContext';
 import axios from 'axios';
+import { newJobId, followJobEvents, describeJobEvent } from './utils/jobEvents';
 import AttachmentSequence from './Components/AttachmentSequence';
 
 const plantData = [
@@ -155,6 +156,7 @@ function Processing({ mode = 'single' }) {
   const [selectedPlant, setSelectedPlant] = useState('');
   const [selectedPlantData, setSelectedPlantData] = useState({});
   const [loading, setLoading] = useState(false);
+  const [progressText, setProgressText] = useState('');
   const [employeeDetails, setEmployeeDetails] = useState('');
   const [refreshTrigger, setRefreshTrigger] = useState(0);
   const [employeeCode, setEmployeeCode] = useState('');
@@ -244,6 +246,14 @@ function Processing({ mode = 'single' }) {
     setError(null);
     setResult(null);
 
+    // Progress of a batch run, streamed while the request is in flight
+    const jobId = mode === 'single' ? null : newJobId();
+    const counts = { rendered: 0, sent: 0, failed: 0, noun: 'slip' };
+    const stopJobEvents = jobId ? followJobEvents(jobId, (jobEvent) => {
+      const text = describeJobEvent(jobEvent, counts);
+      if (text) setProgressText(text);
+    }) : () => {};
+
     const monthsData = months.map(monthData => {
       const [fyStartYear] = monthData.financialYear.split('-').map(Number);
       const calendarYear = monthData.month === 'January' || monthData.month === 'February' || monthData.month === 'March' 
@@ -275,6 +285,9 @@ function Processing({ mode = 'single' }) {
       if (mode === 'single') {
         payload.employee_code = employeeDetails;
       }
+      if (jobId) {
+        payload.job_id = jobId;
+      }
 
       const response = await axios.post(getApiUrl(endpoint), payload);
 
@@ -356,6 +369,8 @@ function Processing({ mode = 'single' }) {
         console.log('User session expired, redirecting to login...');
       }
     } finally {
+      stopJobEvents();
+      setProgressText('');
       setLoading(false);
     }
   };
@@ -404,6 +419,7 @@ function Processing({ mode = 'single' }) {
     <>
       <Navbar />
       {loading && <LoadingSpinner />}
+      {loading && progressText && <div className="processing-progress">{progressText}</div>}
       <Routes>
         <Route path="settings" element={<Settings />} />
         <Route path="" element={
@@ -1,9 +1,11 @@
 import React, { useState } from 'react';
 import './Reports.css';
 import { getApiUrl } from './config';
+import { newJobId, followJobEvents, describeJobEvent } from './utils/jobEvents';
 
 const ReactorReports = () => {
   const [isLoading, setIsLoading] = useState(false);
+  const [progressText, setProgressText] = useState('');
   const [sendEmail, setSendEmail] = useState(false);
   const [sendWhatsapp, setSendWhatsapp] = useState(false);
   const [date, setDate] = useState(() => {
@@ -30,12 +32,21 @@ const ReactorReports = () => {
 
     setIsLoading(true);
 
+    // Progress of this run (sheets read, rendered, sent), streamed while the request is in flight
+    const jobId = newJobId();
+    const counts = { rendered: 0, sent: 0, failed: 0, noun: 'sheet' };
+    const stopJobEvents = followJobEvents(jobId, (jobEvent) => {
+      const text = describeJobEvent(jobEvent, counts);
+      if (text) setProgressText(text);
+    });
+
     try {
       const formData = new FormData();
 
       formData.append('send_email', sendEmail);
       formData.append('send_whatsapp', sendWhatsapp);
       formData.append('date', date);
+      formData.append('job_id', jobId);
 
       const response = await fetch(getApiUrl('reactor_reports'), {
         method: 'POST',
@@ -137,6 +148,8 @@ const ReactorReports = () => {
       console.error('Error generating reports:', error);
       alert(error.message || 'Failed to generate reports. Please try again.');
     } finally {
+      stopJobEvents();
+      setProgressText('');
       setIsLoading(false);
     }
   };
@@ -195,7 +208,7 @@ const ReactorReports = () => {
         onClick={handleSubmit}
         disabled={isLoading || (!sendWhatsapp && !sendEmail)}
       >
-        {isLoading ? 'Generating Reports...' : 'Generate Reports'}
+        {isLoading ? (progressText || 'Generating Reports...') : 'Generate Reports'}
       </button>
     </div>
   );
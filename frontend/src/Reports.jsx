@@ -1,6 +1,7 @@
 import React, { useState, useCallback, useEffect } from 'react';
 import './Reports.css';
 import { getApiUrl } from './config';
+import { newJobId, followJobEvents, describeJobEvent } from './utils/jobEvents';
 import { useAuth } from './Components/AuthContext';
 
 const Reports = () => {
@@ -12,6 +13,7 @@ const Reports = () => {
   const [sheetName, setSheetName] = useState('');
   const [sheetError, setSheetError] = useState('');
   const [isLoading, setIsLoading] = useState(false);
+  const [progressText, setProgressText] = useState('');
 
   const [sendWhatsapp, setSendWhatsapp] = useState(false);
   const [sendEmail, setSendEmail] = useState(false);
@@ -122,9 +124,10 @@ const Reports = () => {
           'Content-Type': 'application/json',
         },
         credentials: 'include',
-        body: JSON.stringify({
-          original_request_data: requestData
-        })
+        // Runs stored by send-reports are retried by run_id: only the failed recipients are re-sent
+        body: JSON.stringify(requestData?.run_id
+          ? { run_id: requestData.run_id }
+          : { original_request_data: requestData })
       });
 
       if (!response.ok) {
@@ -572,6 +575,14 @@ const Reports = () => {
 
     setIsLoading(true);
 
+    // Progress of this run, streamed while the send-reports request is in flight
+    const jobId = newJobId();
+    const counts = { rendered: 0, sent: 0, failed: 0 };
+    const stopJobEvents = followJobEvents(jobId, (jobEvent) => {
+      const text = describeJobEvent(jobEvent, counts);
+      if (text) setProgressText(text);
+    });
+
     try {
       const formData = new FormData();
       
@@ -603,6 +614,7 @@ const Reports = () => {
       formData.append('send_whatsapp', sendWhatsapp);
       formData.append('send_email', sendEmail);
       formData.append('mail_subject', mailSubject);
+      formData.append('job_id', jobId);
 
       // Add file sequencing information as a JSON string
       formData.append('file_sequence', JSON.stringify(sortedItems.map(item => ({
@@ -721,6 +733,20 @@ const Reports = () => {
       
       // Show success message
       alert(result.message || 'Reports generated and sent successfully!');
+
+      // Some recipients failed: the server kept this run, so a retry re-sends only those
+      if (result.run_id) {
+        const failedContacts = result.delivery_stats?.failed_contacts || [];
+        if (failedContacts.some(contact => /token expired|session expired/i.test(contact.reason || ''))) {
+          setStoredRequestData({ run_id: result.run_id });
+          setShowTokenExpiredModal(true);
+          return;
+        }
+        if (window.confirm(`${failedContacts.length} recipient(s) could not be reached. Retry only the failed recipients now?`)) {
+          await retryReports({ run_id: result.run_id });
+          return;
+        }
+      }
       
       // Reset form
       setTemplateFiles([]);
@@ -739,6 +765,8 @@ const Reports = () => {
       console.error('Error generating reports:', error);
       alert(error.message || 'Failed to generate reports. Please try again.');
     } finally {
+      stopJobEvents();
+      setProgressText('');
       setIsLoading(false);
     }
   };
@@ -1068,7 +1096,7 @@ const Reports = () => {
         onClick={handleSubmit}
         disabled={previewItems.filter(item => item.file_type === 'message').length === 0 || !sheetId || !!sheetError || isLoading || (!sendWhatsapp && !sendEmail)}
       >
-        {isLoading ? 'Generating Reports...' : 'Generate Reports'}
+        {isLoading ? (progressText || 'Generating Reports...') : 'Generate Reports'}
       </button>
     </div>
   );
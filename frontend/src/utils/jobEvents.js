@@ -0,0 +1,71 @@
+import { getApiUrl } from '../config';
+
+// Client supplied job id (the backend accepts 8-64 letters, digits, '-' and '_')
+export const newJobId = () => {
+  if (typeof crypto !== 'undefined' && crypto.randomUUID) {
+    return crypto.randomUUID().replace(/-/g, '');
+  }
+  return `${Date.now().toString(36)}${Math.random().toString(36).slice(2, 12)}`;
+};
+
+// Subscribe to a job's progress stream (/api/jobs/<id>/events). The stream can be opened
+// before the request that creates the job. onEvent gets {event, data}; returns a function
+// that closes the stream.
+export const followJobEvents = (jobId, onEvent) => {
+  if (typeof window === 'undefined' || !window.EventSource || !jobId) {
+    return () => {};
+  }
+  const source = new EventSource(getApiUrl(`jobs/${jobId}/events`), { withCredentials: true });
+  const handle = (message) => {
+    try {
+      const payload = JSON.parse(message.data);
+      onEvent({ event: payload.event || message.type, data: payload.data || {} });
+    } catch (error) {
+      console.error('Error reading job event:', error);
+    }
+    if (message.type === 'end') {
+      source.close();
+    }
+  };
+  ['stage', 'rendered', 'uploaded', 'sent', 'failed', 'status', 'progress', 'end'].forEach(type => {
+    source.addEventListener(type, handle);
+  });
+  return () => source.close();
+};
+
+// Reactor report stages, reported as each one finishes
+const STAGE_DONE = {
+  fetch: 'Read the reactor sheets',
+  filter: 'Selected the sheets for the date',
+  render: 'Built the report',
+  convert: 'Converted the report to PDF',
+  notify: 'Sent notifications'
+};
+
+// Short status line for a progress event, or null for events that do not change it.
+// counts.noun names what is rendered ('report' by default, 'slip', 'sheet')
+export const describeJobEvent = ({ event, data }, counts) => {
+  const noun = counts.noun || 'report';
+  switch (event) {
+    case 'stage':
+      if (data.stage === 'fetched') return `Read ${data.recipients} recipient(s)`;
+      if (data.stage === 'sending') return `Sending to ${data.recipients} recipient(s)...`;
+      return STAGE_DONE[data.stage] || null;
+    case 'progress':
+      return data.message || null;
+    case 'rendered':
+      counts.rendered += 1;
+      return `Generated ${counts.rendered} ${noun}(s)`;
+    case 'uploaded':
+      counts.uploaded = (counts.uploaded || 0) + 1;
+      return `Uploaded ${counts.uploaded} ${noun}(s)`;
+    case 'sent':
+      counts.sent += data.count || 1;
+      return `Sent ${counts.sent}, failed ${counts.failed}`;
+    case 'failed':
+      counts.failed += 1;
+      return `Sent ${counts.sent}, failed ${counts.failed}`;
+    default:
+      return null;
+  }
+};